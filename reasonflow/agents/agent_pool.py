@@ -0,0 +1,150 @@
+import hashlib
+import json
+import threading
+import time
+from typing import Any, Callable, Dict, Optional
+
+DEFAULT_IDLE_TIMEOUT = 300.0
+
+
+def _identify(value: Any) -> str:
+    # Live objects in a config (shared memory, trackers, ...) are told apart by identity
+    return f"{type(value).__module__}.{type(value).__qualname__}@{id(value)}"
+
+
+def agent_key(agent_type: str, agent_class: Any, agent_config: Dict[str, Any]) -> str:
+    """Pool key of an agent: its type, implementing class and a hash of its configuration."""
+    payload = json.dumps(
+        [agent_type, _identify(agent_class), agent_config], sort_keys=True, default=_identify
+    )
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+class _PoolEntry:
+    __slots__ = ("agent", "leases", "last_used")
+
+    def __init__(self, agent: Any):
+        self.agent = agent
+        self.leases = 0
+        self.last_used = time.monotonic()
+
+
+class AgentPool:
+    """
+    Keeps agent instances warm so tasks with the same agent type and configuration reuse
+    one instance (and its HTTP session, vector store connection, ...) across tasks and
+    workflows. An agent is shared by everyone who acquires it; agent classes that keep
+    per-call state can opt out with a class attribute `poolable = False`.
+    Agents not leased for `idle_timeout` seconds are evicted and closed.
+    """
+
+    def __init__(self, idle_timeout: Optional[float] = DEFAULT_IDLE_TIMEOUT):
+        self.idle_timeout = idle_timeout
+        self._entries: Dict[str, _PoolEntry] = {}
+        self._keys: Dict[int, str] = {}
+        self._lock = threading.Lock()
+        self.created = 0
+        self.reused = 0
+        self.evicted = 0
+
+    def acquire(self, key: str, factory: Callable[[], Any]) -> Any:
+        """
+        Lease the agent stored under `key`, creating it with `factory` on a miss.
+        Every acquire must be paired with a release().
+        """
+        self.evict_idle()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                entry.leases += 1
+                self.reused += 1
+                return entry.agent
+
+        # Agents are created outside the lock; if another thread won the race, keep theirs
+        agent = factory()
+        if agent is None or getattr(agent, "poolable", True) is False:
+            return agent
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                entry = self._entries[key] = _PoolEntry(agent)
+                self._keys[id(agent)] = key
+                self.created += 1
+            else:
+                self.reused += 1
+            entry.leases += 1
+            winner = entry.agent
+        if winner is not agent:
+            self._close(agent)
+        return winner
+
+    def release(self, agent: Any) -> None:
+        """Return a leased agent to the pool."""
+        with self._lock:
+            key = self._keys.get(id(agent))
+            entry = self._entries.get(key) if key else None
+            if entry is None or entry.agent is not agent:
+                return
+            entry.leases = max(0, entry.leases - 1)
+            entry.last_used = time.monotonic()
+
+    def evict_idle(self) -> int:
+        """Close and drop agents idle for longer than the timeout. Returns the number evicted."""
+        if self.idle_timeout is None:
+            return 0
+        deadline = time.monotonic() - self.idle_timeout
+        with self._lock:
+            idle = [
+                key for key, entry in self._entries.items()
+                if entry.leases == 0 and entry.last_used <= deadline
+            ]
+            agents = [self._remove(key) for key in idle]
+            self.evicted += len(agents)
+        for agent in agents:
+            self._close(agent)
+        return len(agents)
+
+    def clear(self) -> None:
+        """Close and drop every pooled agent that is not leased."""
+        with self._lock:
+            agents = [self._remove(key) for key, entry in list(self._entries.items()) if entry.leases == 0]
+        for agent in agents:
+            self._close(agent)
+
+    def stats(self) -> Dict[str, int]:
+        """Pool size and reuse counters."""
+        with self._lock:
+            return {
+                "agents": len(self._entries),
+                "leased": sum(1 for entry in self._entries.values() if entry.leases),
+                "created": self.created,
+                "reused": self.reused,
+                "evicted": self.evicted,
+            }
+
+    def _remove(self, key: str) -> Any:
+        entry = self._entries.pop(key)
+        self._keys.pop(id(entry.agent), None)
+        return entry.agent
+
+    @staticmethod
+    def _close(agent: Any) -> None:
+        close = getattr(agent, "close", None)
+        if callable(close):
+            try:
+                close()
+            except Exception as e:
+                print(f"Error closing agent: {str(e)}")
+
+
+_default_pool: Optional[AgentPool] = None
+_default_pool_lock = threading.Lock()
+
+
+def default_agent_pool() -> AgentPool:
+    """The process-wide pool shared by all workflow engines that don't bring their own."""
+    global _default_pool
+    with _default_pool_lock:
+        if _default_pool is None:
+            _default_pool = AgentPool()
+        return _default_pool
@@ -7,8 +7,13 @@ from reasonchain.memory import Memory, SharedMemory
 from reasonflow.observability.tracker import TaskTracker
 
 class APIConnectorAgent:
-    def __init__(self, base_url: str, api_key: Optional[str] = None, memory=None, shared_memory=None, task_tracker=None):
+    def __init__(self, base_url: str, api_key: Optional[str] = None, memory=None, shared_memory=None, task_tracker=None,
+                 timeout: Optional[float] = None):
+        """
+        :param timeout: Default seconds to wait for a response; a request's own `timeout` overrides it.
+        """
         self.base_url = base_url.rstrip('/')
+        self.timeout = timeout
         self.api_key = api_key or os.getenv("API_KEY")
         self.memory = memory or Memory()
         self.shared_memory = shared_memory
@@ -21,6 +26,8 @@ class APIConnectorAgent:
     def request(self, method: str, endpoint: str, task_id: Optional[str] = None, **kwargs) -> Dict:
         try:
             url = urljoin(f"{self.base_url}/", endpoint.lstrip('/'))
+            if self.timeout is not None:
+                kwargs.setdefault("timeout", self.timeout)
             response = self.session.request(method, url, **kwargs)
             response.raise_for_status()
 
@@ -50,7 +57,10 @@ class APIConnectorAgent:
             }
 
 
-            
+    def close(self) -> None:
+        """Close the HTTP session and its pooled connections."""
+        self.session.close()
+
     def get(self, endpoint: str, **kwargs) -> Dict:
         return self.request("GET", endpoint, **kwargs)
         
@@ -1,8 +1,10 @@
 from typing import Dict, Any, Type, Optional
+import inspect
 from reasonflow.agents.llm_agent import LLMAgent
 from reasonflow.agents.data_retrieval_agent import DataRetrievalAgent
 from reasonflow.agents.custom_task_agent import CustomTaskAgent
 from reasonflow.agents.api_connector_agent import APIConnectorAgent
+from reasonflow.agents.agent_pool import AgentPool, agent_key
 
 class CustomAgentBuilder:
     AGENT_TYPES = {
@@ -12,8 +14,12 @@ class CustomAgentBuilder:
         "api_connector": APIConnectorAgent
     }
     
-    def __init__(self):
+    def __init__(self, agent_pool: Optional[AgentPool] = None):
+        """
+        :param agent_pool: Optional pool used by acquire_agent() to reuse agent instances.
+        """
         self.custom_agents: Dict[str, Type] = {}
+        self.agent_pool = agent_pool
         
     def register_agent_type(self, agent_type: str, agent_class: Type) -> None:
         """Register a new agent type"""
@@ -29,8 +35,8 @@ class CustomAgentBuilder:
     def create_agent(self, agent_type: str, config: Dict[str, Any]) -> Optional[Any]:
         """Create an agent instance based on type and configuration"""
         try:
-            # Extract agent configuration
-            agent_config = config.get("agent_config", {})
+            # Extract agent configuration; copied so the task config is never modified
+            agent_config = dict(config.get("agent_config", {}))
 
             # For LLM agents, extract the agent instance from config
             if agent_type == "llm" and "agent" in config:
@@ -55,6 +61,36 @@ class CustomAgentBuilder:
             print(f"Error creating agent: {str(e)}")
             return None
             
+    def acquire_agent(self, agent_type: str, config: Dict[str, Any]) -> Optional[Any]:
+        """
+        Get an agent for a task, reusing a pooled instance with the same type and
+        agent_config when the builder has a pool. Pair with release_agent().
+        """
+        if self.agent_pool is None or (agent_type == "llm" and "agent" in config):
+            return self.create_agent(agent_type, config)
+        agent_class = self.get_agent_types().get(agent_type)
+        if agent_class is None:
+            return self.create_agent(agent_type, config)
+        try:
+            key = agent_key(agent_type, agent_class, config.get("agent_config", {}))
+        except Exception as e:
+            print(f"Error pooling agent: {str(e)}")
+            return self.create_agent(agent_type, config)
+        return self.agent_pool.acquire(key, lambda: self.create_agent(agent_type, config))
+
+    def release_agent(self, agent: Any) -> None:
+        """Hand an agent obtained from acquire_agent() back to the pool."""
+        if self.agent_pool is not None and agent is not None:
+            self.agent_pool.release(agent)
+
+    @staticmethod
+    def supports_async(agent: Any) -> bool:
+        """
+        Check whether an agent implements the optional async protocol, i.e. defines
+        `async def aexecute(**params)` alongside the regular `execute(**params)`.
+        """
+        return inspect.iscoroutinefunction(getattr(agent, "aexecute", None))
+
     def get_agent_types(self) -> Dict[str, Type]:
         """Get all available agent types"""
         return {**self.AGENT_TYPES, **self.custom_agents} 
\ No newline at end of file
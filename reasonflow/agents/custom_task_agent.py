@@ -4,6 +4,45 @@ from reasonflow.tasks.task_manager import TaskManager
 import logging
 logging.basicConfig(level=logging.INFO, format="%(asctime)s [%(levelname)s] %(message)s")
 
+# Functions already loaded in this process, keyed by file path. Worker processes of the
+# engine's process pool keep this cache warm so each module is executed only once.
+_FUNCTION_CACHE: Dict[str, Callable] = {}
+
+
+def load_custom_function(function_path: Optional[str]) -> Callable:
+    """
+    Load the `execute` function defined in a Python file.
+    :param function_path: Path to the custom function script.
+    :return: The loaded function.
+    """
+    if not function_path or not function_path.endswith('.py'):
+        raise ValueError("A valid Python function file path must be provided.")
+
+    spec = importlib.util.spec_from_file_location("custom_module", function_path)
+    if not (spec and spec.loader):
+        raise ImportError("Failed to load the custom function module.")
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    function = getattr(module, "execute", None)
+    if not function:
+        raise AttributeError("The custom function file does not define an 'execute' function.")
+    return function
+
+
+def run_custom_function(function_path: str, params: Dict[str, Any]) -> Dict:
+    """
+    Entry point for process pool workers: run a custom function with the given
+    parameters, loading its module on first use in this process.
+    Only the path, the parameters and the result cross the process boundary.
+    """
+    try:
+        function = _FUNCTION_CACHE.get(function_path)
+        if function is None:
+            function = _FUNCTION_CACHE[function_path] = load_custom_function(function_path)
+        return {"status": "success", "result": function(**params)}
+    except Exception as e:
+        return {"status": "error", "message": f"Error executing custom task: {str(e)}"}
+
 class CustomTaskAgent:
     def __init__(self, function_path: Optional[str] = None, task_manager: Optional[TaskManager] = None, shared_memory=None):
         """
@@ -22,19 +61,8 @@ class CustomTaskAgent:
         Dynamically load a function from the provided file path.
         """
         try:
-            if not self.function_path or not self.function_path.endswith('.py'):
-                raise ValueError("A valid Python function file path must be provided.")
-
             # Load Python function dynamically
-            spec = importlib.util.spec_from_file_location("custom_module", self.function_path)
-            if spec and spec.loader:
-                module = importlib.util.module_from_spec(spec)
-                spec.loader.exec_module(module)
-                self.loaded_function = getattr(module, "execute", None)
-                if not self.loaded_function:
-                    raise AttributeError("The custom function file does not define an 'execute' function.")
-            else:
-                raise ImportError("Failed to load the custom function module.")
+            self.loaded_function = load_custom_function(self.function_path)
         except Exception as e:
             error_message = f"Error loading custom function: {str(e)}"
             logging.error(error_message)
@@ -42,12 +70,14 @@ class CustomTaskAgent:
                 self.shared_memory.store("function_load_error", error_message)
             raise
 
-    def execute(self, params: Dict[str, Any]) -> Dict:
+    def execute(self, params: Optional[Dict[str, Any]] = None, **kwargs) -> Dict:
         """
         Execute the custom function with provided parameters.
-        :param params: Parameters for the function.
+        :param params: Parameters for the function, as a dict.
+        :param kwargs: Parameters passed as keywords, as the workflow engine does.
         :return: Execution status and result or error message.
         """
+        params = {**(params or {}), **kwargs}
         try:
             if not self.loaded_function:
                 logging.info("Loading the custom function before execution.")
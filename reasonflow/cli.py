@@ -0,0 +1,77 @@
+import argparse
+import importlib
+import signal
+import sys
+import threading
+from typing import List, Optional
+from reasonflow.agents.agent_pool import default_agent_pool
+from reasonflow.agents.custom_agent_builder import CustomAgentBuilder
+from reasonflow.orchestrator.distributed import Worker
+from reasonflow.orchestrator.task_queue import DEFAULT_LEASE_SECONDS, DEFAULT_MAX_ATTEMPTS, SQLiteTaskQueue
+
+
+def _load_class(path: str):
+    """Import a class given as "package.module:ClassName"."""
+    module_name, _, class_name = path.partition(":")
+    if not class_name:
+        raise ValueError(f"Expected module:ClassName, got '{path}'")
+    return getattr(importlib.import_module(module_name), class_name)
+
+
+def _run_worker(args: argparse.Namespace) -> int:
+    queue = SQLiteTaskQueue(args.queue, max_attempts=args.max_attempts)
+    agent_builder = CustomAgentBuilder(agent_pool=default_agent_pool())
+    for spec in args.agent_type:
+        name, _, path = spec.partition("=")
+        if not name or not path:
+            print(f"Error: --agent-type expects name=module:ClassName, got '{spec}'")
+            return 2
+        agent_builder.register_agent_type(name, _load_class(path))
+
+    worker = Worker(
+        queue,
+        agent_builder=agent_builder,
+        worker_id=args.name,
+        lease_seconds=args.lease,
+        poll_interval=args.poll_interval,
+        concurrency=args.concurrency,
+    )
+    stop_event = threading.Event()
+    if threading.current_thread() is threading.main_thread():
+        # Finish the tasks in hand, then exit
+        for signum in (signal.SIGINT, signal.SIGTERM):
+            signal.signal(signum, lambda *_: stop_event.set())
+
+    print(f"Worker {worker.worker_id} processing tasks from {args.queue}")
+    processed = worker.run(stop_event, max_tasks=args.max_tasks)
+    print(f"Worker {worker.worker_id} stopped after {processed} tasks")
+    return 0
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(prog="reasonflow", description="ReasonFlow command line tools")
+    commands = parser.add_subparsers(dest="command")
+
+    worker = commands.add_parser("worker", help="Execute workflow tasks from a durable task queue")
+    worker.add_argument("--queue", default="reasonflow_queue.db", help="Path of the SQLite task queue")
+    worker.add_argument("--name", default=None, help="Worker id (defaults to host-pid-random)")
+    worker.add_argument("--concurrency", type=int, default=1, help="Tasks executed at the same time")
+    worker.add_argument("--lease", type=float, default=DEFAULT_LEASE_SECONDS,
+                        help="Seconds a task stays leased without a heartbeat before it is re-delivered")
+    worker.add_argument("--max-attempts", type=int, default=DEFAULT_MAX_ATTEMPTS,
+                        help="Deliveries of a task before it is given up")
+    worker.add_argument("--poll-interval", type=float, default=1.0, help="Seconds between polls of an empty queue")
+    worker.add_argument("--max-tasks", type=int, default=None, help="Exit after processing this many tasks")
+    worker.add_argument("--agent-type", action="append", default=[], metavar="NAME=MODULE:CLASS",
+                        help="Register a custom agent type; may be repeated")
+    worker.set_defaults(handler=_run_worker)
+
+    args = parser.parse_args(argv)
+    if args.command is None:
+        parser.print_help()
+        return 1
+    return args.handler(args)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
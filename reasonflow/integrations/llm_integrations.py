@@ -57,9 +57,14 @@ class LLMIntegration:
         logging.basicConfig(level=logging.INFO)
         self.logger = logging.getLogger(f"{self.provider}-{self.model}")
         
-    def execute(self, prompt: str, **kwargs) -> Dict:
-        """Generate a response using the specified provider and model."""
+    def execute(self, prompt: str, timeout: Optional[float] = None, **kwargs) -> Dict:
+        """
+        Generate a response using the specified provider and model.
+        :param timeout: Seconds to wait for the provider before giving up.
+        """
         try:
+            if timeout is not None:
+                kwargs["timeout"] = timeout
             response = self._generate_response(prompt, **kwargs)
             return {
                 "status": "success",
@@ -100,6 +105,11 @@ class LLMIntegration:
             self.logger.error(f"Error in LLM generation: {e}")
             raise e
 
+    @staticmethod
+    def _request_options(kwargs: Dict) -> Dict:
+        """Per-request options for the OpenAI-compatible clients."""
+        return {"timeout": kwargs["timeout"]} if kwargs.get("timeout") is not None else {}
+
     def _generate_with_openai(self, prompt, model= None, **kwargs):
         """
         Generate a response using OpenAI API.
@@ -120,7 +130,8 @@ class LLMIntegration:
                 model=model,
                 messages=[{"role": "user", "content": prompt}],
                 temperature=0.7,
-                max_tokens=2000
+                max_tokens=2000,
+                **self._request_options(kwargs)
             )
             message = response.choices[0].message.content.strip()
             formatted_response = {
@@ -152,7 +163,7 @@ class LLMIntegration:
         """
         import ollama
         model = model or self.model
-        ollama_client = ollama.Client(host='http://localhost:11434')  # Ollama local client
+        ollama_client = ollama.Client(host='http://localhost:11434', timeout=kwargs.get("timeout"))  # Ollama local client
         try:
             # Add 'query' to the prompt if provided
             if 'query' in kwargs:
@@ -208,7 +219,8 @@ class LLMIntegration:
                     {"role": "user", "content": prompt}
                 ],
                 temperature=0.1,
-                max_tokens=2000
+                max_tokens=2000,
+                **self._request_options(kwargs)
             )
             if response.choices:
                 message = response.choices[0].message.content.strip()
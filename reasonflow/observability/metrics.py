@@ -1,11 +1,23 @@
+import math
 import time
-from collections import defaultdict
+import threading
+from collections import defaultdict, deque
+
+# Recent durations kept per task for latency percentiles
+DURATION_WINDOW = 200
+
+
 class Metrics:
     def __init__(self, shared_memory: None):
         # Dictionary to store metrics
         self.task_metrics = defaultdict(lambda: {"execution_count": 0, "total_duration": 0.0, "success_count": 0, "failure_count": 0})
         self.workflow_metrics = defaultdict(lambda: {"execution_count": 0, "total_duration": 0.0, "success_count": 0, "failure_count": 0})
+        self.recent_durations = defaultdict(lambda: deque(maxlen=DURATION_WINDOW))
+        # Hedged requests per task: sent, won by the hedge, and denied by the hedge budget
+        self.hedge_metrics = defaultdict(lambda: {"hedged_count": 0, "hedge_wins": 0, "denied_count": 0})
         self.shared_memory = shared_memory
+        # Tasks may finish concurrently on worker threads
+        self.lock = threading.Lock()
 
     def start_timer(self):
         """
@@ -29,16 +41,19 @@ class Metrics:
         :param duration: Duration of the task in seconds.
         :param success: Whether the task was successful.
         """
-        metrics = self.task_metrics[task_name]
-        metrics["execution_count"] += 1
-        metrics["total_duration"] += duration
-        if success:
-            metrics["success_count"] += 1
-        else:
-            metrics["failure_count"] += 1
-         # Save to shared memory
+        with self.lock:
+            metrics = self.task_metrics[task_name]
+            metrics["execution_count"] += 1
+            metrics["total_duration"] += duration
+            if success:
+                metrics["success_count"] += 1
+                self.recent_durations[task_name].append(duration)
+            else:
+                metrics["failure_count"] += 1
+            snapshot = dict(metrics)
+        # Save to shared memory
         if self.shared_memory:
-            self.shared_memory.store(f"metrics_{task_name}", metrics)
+            self.shared_memory.store(f"metrics_{task_name}", snapshot)
 
     def record_workflow_metrics(self, workflow_name, duration, success=True):
         """
@@ -66,6 +81,50 @@ class Metrics:
         """
         return self.task_metrics.get(task_name, {})
 
+    def get_average_duration(self, task_name):
+        """
+        Get the mean recorded duration of a task.
+        :param task_name: Name of the task.
+        :return: Average duration in seconds, or None if the task has no history.
+        """
+        metrics = self.task_metrics.get(task_name)
+        if not metrics or not metrics["execution_count"]:
+            return None
+        return metrics["total_duration"] / metrics["execution_count"]
+
+    def get_duration_percentile(self, task_name, percentile, min_samples=1):
+        """
+        Get a percentile of the recent successful durations of a task.
+        :param task_name: Name of the task.
+        :param percentile: Percentile between 0 and 100.
+        :param min_samples: Durations needed before a percentile is reported.
+        :return: Duration in seconds, or None with too little history.
+        """
+        with self.lock:
+            durations = sorted(self.recent_durations.get(task_name, ()))
+        if not durations or len(durations) < min_samples:
+            return None
+        rank = max(0, math.ceil(percentile / 100.0 * len(durations)) - 1)
+        return durations[min(rank, len(durations) - 1)]
+
+    def record_hedge(self, task_name, event):
+        """
+        Count a hedging decision for a task.
+        :param task_name: Name of the task.
+        :param event: "hedged" (duplicate sent), "won" (the duplicate finished first) or "denied" (over budget).
+        """
+        key = {"hedged": "hedged_count", "won": "hedge_wins", "denied": "denied_count"}[event]
+        with self.lock:
+            self.hedge_metrics[task_name][key] += 1
+
+    def get_hedge_metrics(self, task_name):
+        """
+        Get hedging counts for a task.
+        :param task_name: Name of the task.
+        :return: Dictionary with hedged_count, hedge_wins and denied_count.
+        """
+        return dict(self.hedge_metrics.get(task_name, {}))
+
     def get_workflow_metrics(self, workflow_name):
         """
         Get metrics for a specific workflow.
@@ -82,4 +141,5 @@ class Metrics:
         return {
             "task_metrics": dict(self.task_metrics),
             "workflow_metrics": dict(self.workflow_metrics),
+            "hedge_metrics": dict(self.hedge_metrics),
         }
@@ -0,0 +1,142 @@
+import threading
+import time
+from concurrent.futures import Future
+from typing import Any, Callable, List, Optional
+
+
+class TaskCancelled(Exception):
+    """Raised while waiting on a task whose token was cancelled or whose deadline passed."""
+
+    def __init__(self, reason: str):
+        super().__init__(reason)
+        self.reason = reason
+
+
+class CancelToken:
+    """
+    Cooperative cancellation signal with an optional deadline.
+    Tokens form a tree: a child token (e.g. one task of a workflow run) counts as
+    cancelled when any ancestor is, and expires no later than its parent.
+    Agents may declare a `cancel_token` parameter and check `cancelled` between steps.
+    """
+
+    def __init__(self, timeout: Optional[float] = None, parent: Optional["CancelToken"] = None):
+        self.parent = parent
+        self.timeout = timeout
+        deadline = time.monotonic() + timeout if timeout is not None else None
+        if parent is not None and parent.deadline is not None:
+            deadline = parent.deadline if deadline is None else min(deadline, parent.deadline)
+        self.deadline = deadline
+        self._reason: Optional[str] = None
+        self._callbacks: List[Callable[[], Any]] = []
+        self._lock = threading.Lock()
+
+    def child(self, timeout: Optional[float] = None) -> "CancelToken":
+        """A token cancelled with this one, optionally with a shorter deadline."""
+        return CancelToken(timeout, parent=self)
+
+    def cancel(self, reason: str = "cancelled") -> None:
+        with self._lock:
+            if self._reason is not None:
+                return
+            self._reason = reason
+            callbacks, self._callbacks = self._callbacks, []
+        for callback in callbacks:
+            try:
+                callback()
+            except Exception as e:
+                print(f"Error in cancellation callback: {str(e)}")
+
+    @property
+    def expired(self) -> bool:
+        return self.deadline is not None and time.monotonic() >= self.deadline
+
+    @property
+    def cancelled(self) -> bool:
+        """True once this token or an ancestor was cancelled, or the deadline passed."""
+        return self._cancel_reason() is not None or self.expired
+
+    @property
+    def reason(self) -> Optional[str]:
+        reason = self._cancel_reason()
+        if reason is None and self.expired:
+            reason = "deadline exceeded"
+        return reason
+
+    def _cancel_reason(self) -> Optional[str]:
+        token = self
+        while token is not None:
+            if token._reason is not None:
+                return token._reason
+            token = token.parent
+        return None
+
+    def remaining(self) -> Optional[float]:
+        """Seconds until the deadline, or None without one."""
+        if self.deadline is None:
+            return None
+        return max(0.0, self.deadline - time.monotonic())
+
+    def raise_if_cancelled(self) -> None:
+        if self.cancelled:
+            raise TaskCancelled(self.reason)
+
+    def add_callback(self, callback: Callable[[], Any]) -> Callable[[], None]:
+        """
+        Call `callback` when this token or an ancestor is cancelled (right away if one
+        already is). Deadlines do not trigger callbacks. The callback may run once per
+        cancelled token, so it should be idempotent.
+        :return: Function that unregisters the callback.
+        """
+        registered = []
+        token = self
+        while token is not None:
+            with token._lock:
+                already_cancelled = token._reason is not None
+                if not already_cancelled:
+                    token._callbacks.append(callback)
+                    registered.append(token)
+            if already_cancelled:
+                self._remove_callback(registered, callback)
+                callback()
+                return lambda: None
+            token = token.parent
+        return lambda: self._remove_callback(registered, callback)
+
+    @staticmethod
+    def _remove_callback(tokens: List["CancelToken"], callback: Callable[[], Any]) -> None:
+        for token in tokens:
+            with token._lock:
+                if callback in token._callbacks:
+                    token._callbacks.remove(callback)
+
+    def signal(self) -> Future:
+        """Future resolving when the token is cancelled, to wait on alongside task futures."""
+        future = Future()
+
+        def resolve():
+            if not future.done():
+                try:
+                    future.set_result(self.reason)
+                except Exception:
+                    pass
+
+        self.add_callback(resolve)
+        return future
+
+    def wait_for(self, future: Future) -> Any:
+        """Wait for a future's result, raising TaskCancelled if the token is cancelled or expires first."""
+        if not future.done():
+            woken = threading.Event()
+            future.add_done_callback(lambda _: woken.set())
+            remove = self.add_callback(woken.set)
+            try:
+                woken.wait(self.remaining())
+            finally:
+                remove()
+        if not future.done():
+            raise TaskCancelled(self.reason or "cancelled")
+        return future.result()
+
+    def __repr__(self):
+        return f"CancelToken(cancelled={self.cancelled}, remaining={self.remaining()})"
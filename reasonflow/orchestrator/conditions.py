@@ -0,0 +1,101 @@
+import operator
+from typing import Any, Callable, Dict, List, Optional, Union
+
+# Condition on a dependency edge: {"field": "output.count", "op": "gt", "value": 0},
+# a list of such dicts (all must hold), or a callable taking the upstream result
+Condition = Union[Dict[str, Any], List[Dict[str, Any]], Callable[[Any], bool]]
+
+# How a task's incoming edges decide whether it runs: "all" of them active, or "any" one
+TRIGGER_RULES = ("all", "any")
+DEFAULT_CONDITION_FIELD = "output"
+
+
+def _contains(container: Any, item: Any) -> bool:
+    return container is not None and item in container
+
+
+def _is_empty(value: Any) -> bool:
+    if value is None:
+        return True
+    try:
+        return len(value) == 0
+    except TypeError:
+        return False
+
+
+OPERATORS: Dict[str, Callable[[Any, Any], bool]] = {
+    "eq": operator.eq,
+    "ne": operator.ne,
+    "gt": operator.gt,
+    "gte": operator.ge,
+    "lt": operator.lt,
+    "lte": operator.le,
+    "in": lambda actual, expected: _contains(expected, actual),
+    "not_in": lambda actual, expected: not _contains(expected, actual),
+    "contains": _contains,
+    "not_contains": lambda actual, expected: not _contains(actual, expected),
+}
+# Operators that only look at the field
+UNARY_OPERATORS: Dict[str, Callable[[Any], bool]] = {
+    "truthy": bool,
+    "falsy": operator.not_,
+    "empty": _is_empty,
+    "not_empty": lambda value: not _is_empty(value),
+}
+
+
+def validate_condition(condition: Condition) -> None:
+    """Raise ValueError for a condition that cannot be evaluated."""
+    if callable(condition):
+        return
+    if isinstance(condition, list):
+        for item in condition:
+            validate_condition(item)
+        return
+    if not isinstance(condition, dict):
+        raise ValueError(f"Condition must be a dict, a list of dicts or a callable, got {condition!r}")
+    op = condition.get("op")
+    if op in UNARY_OPERATORS:
+        return
+    if op not in OPERATORS:
+        known = sorted(OPERATORS) + sorted(UNARY_OPERATORS)
+        raise ValueError(f"Unknown condition operator {op!r}; expected one of {known}")
+    if "value" not in condition:
+        raise ValueError(f"Condition operator '{op}' needs a 'value'")
+
+
+def _lookup(result: Any, field: str) -> Any:
+    """Follow a dotted path (e.g. "output.documents.0") into a task result; None when missing."""
+    value = result
+    for part in field.split("."):
+        if isinstance(value, dict):
+            value = value.get(part)
+        elif isinstance(value, (list, tuple)) and part.lstrip("-").isdigit():
+            index = int(part)
+            value = value[index] if -len(value) <= index < len(value) else None
+        else:
+            return None
+        if value is None:
+            return None
+    return value
+
+
+def evaluate_condition(condition: Optional[Condition], result: Any) -> bool:
+    """
+    Whether an edge condition holds for the upstream task's result. A comparison that
+    cannot be made (e.g. a missing field compared with "gt") does not hold.
+    """
+    if condition is None:
+        return True
+    if callable(condition):
+        return bool(condition(result))
+    if isinstance(condition, list):
+        return all(evaluate_condition(item, result) for item in condition)
+    actual = _lookup(result, condition.get("field", DEFAULT_CONDITION_FIELD))
+    op = condition["op"]
+    try:
+        if op in UNARY_OPERATORS:
+            return bool(UNARY_OPERATORS[op](actual))
+        return bool(OPERATORS[op](actual, condition["value"]))
+    except TypeError:
+        return False
@@ -0,0 +1,177 @@
+import json
+import os
+import socket
+import threading
+import time
+import uuid
+from concurrent.futures import Future
+from typing import Any, Dict, Optional
+from reasonflow.agents.agent_pool import default_agent_pool
+from reasonflow.agents.custom_agent_builder import CustomAgentBuilder
+from reasonflow.orchestrator.streaming import DEFAULT_STREAM_BUFFER, gather_streams, wrap_streams
+from reasonflow.orchestrator.task_queue import DEFAULT_LEASE_SECONDS, QueuedTask, TaskQueue
+
+DEFAULT_POLL_INTERVAL = 0.2
+
+
+def task_payload(workflow_id: Optional[str], task_id: str, agent_type: str, config: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Queue payload of a task with resolved params. Raises ValueError for configs that
+    cannot be sent to another process (e.g. a live object under "agent").
+    """
+    payload = {"workflow_id": workflow_id, "task_id": task_id, "agent_type": agent_type, "config": config}
+    try:
+        json.dumps(payload)
+    except (TypeError, ValueError) as e:
+        raise ValueError(f"Task {task_id} cannot be sent to a worker, its config is not JSON-serializable: {e}")
+    return payload
+
+
+class QueueCoordinator:
+    """
+    Engine side of distributed execution: submits tasks to a TaskQueue and resolves
+    the returned futures as workers report results, polling the queue from a single
+    background thread while tasks are outstanding.
+    """
+
+    def __init__(self, queue: TaskQueue, poll_interval: float = DEFAULT_POLL_INTERVAL):
+        self.queue = queue
+        self.poll_interval = poll_interval
+        self._pending: Dict[str, Future] = {}
+        self._lock = threading.Lock()
+        self._poller = None
+
+    def submit(self, payload: Dict[str, Any]) -> Future:
+        """Enqueue a task payload; the future resolves to the task's result."""
+        queue_id = self.queue.put(payload)
+        future = Future()
+        with self._lock:
+            self._pending[queue_id] = future
+            if self._poller is None:
+                self._poller = threading.Thread(target=self._poll, name="reasonflow-queue-poller", daemon=True)
+                self._poller.start()
+        return future
+
+    def pending(self) -> int:
+        with self._lock:
+            return len(self._pending)
+
+    def _poll(self) -> None:
+        while True:
+            with self._lock:
+                queue_ids = list(self._pending)
+                if not queue_ids:
+                    self._poller = None
+                    return
+            try:
+                results = self.queue.results(queue_ids)
+                if results:
+                    self.queue.acknowledge(list(results))
+            except Exception as e:
+                print(f"Error polling task queue: {str(e)}")
+                results = {}
+            for queue_id, result in results.items():
+                with self._lock:
+                    future = self._pending.pop(queue_id, None)
+                if future is not None:
+                    future.set_result(result)
+            if not results:
+                time.sleep(self.poll_interval)
+
+
+class Worker:
+    """
+    Worker side of distributed execution: leases tasks from a TaskQueue, runs them with
+    its own agents and reports the results. While a task runs, its lease is renewed by
+    heartbeats, so a task is only delivered again if this worker dies or hangs.
+    Agent types other than the built-in ones must be registered on agent_builder.
+    """
+
+    def __init__(self, queue: TaskQueue, agent_builder: Optional[CustomAgentBuilder] = None,
+                 worker_id: Optional[str] = None, lease_seconds: float = DEFAULT_LEASE_SECONDS,
+                 poll_interval: float = 1.0, concurrency: int = 1):
+        self.queue = queue
+        self.agent_builder = agent_builder or CustomAgentBuilder(agent_pool=default_agent_pool())
+        self.worker_id = worker_id or f"{socket.gethostname()}-{os.getpid()}-{uuid.uuid4().hex[:8]}"
+        self.lease_seconds = lease_seconds
+        self.poll_interval = poll_interval
+        self.concurrency = max(1, concurrency)
+        self.processed = 0
+        self._count_lock = threading.Lock()
+
+    def run(self, stop_event: Optional[threading.Event] = None, max_tasks: Optional[int] = None) -> int:
+        """
+        Process tasks until stop_event is set or max_tasks tasks were processed,
+        running up to `concurrency` of them at a time. Returns the number processed.
+        """
+        stop_event = stop_event or threading.Event()
+        if self.concurrency == 1:
+            self._work(stop_event, max_tasks)
+            return self.processed
+        threads = [
+            threading.Thread(target=self._work, args=(stop_event, max_tasks), name=f"reasonflow-worker-{slot}")
+            for slot in range(self.concurrency)
+        ]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        return self.processed
+
+    def _work(self, stop_event: threading.Event, max_tasks: Optional[int]) -> None:
+        while not stop_event.is_set():
+            with self._count_lock:
+                if max_tasks is not None and self.processed >= max_tasks:
+                    return
+            if not self.run_once():
+                stop_event.wait(self.poll_interval)
+
+    def run_once(self) -> bool:
+        """Lease and process a single task. Returns False if the queue had none."""
+        task = self.queue.lease(self.worker_id, self.lease_seconds)
+        if task is None:
+            return False
+        stop_heartbeat = threading.Event()
+        heartbeat = threading.Thread(target=self._heartbeat, args=(task, stop_heartbeat), daemon=True)
+        heartbeat.start()
+        try:
+            result = self.execute(task)
+        finally:
+            stop_heartbeat.set()
+            heartbeat.join()
+        self.queue.complete(task.id, self.worker_id, result)
+        with self._count_lock:
+            self.processed += 1
+        return True
+
+    def _heartbeat(self, task: QueuedTask, stop: threading.Event) -> None:
+        while not stop.wait(self.lease_seconds / 3):
+            try:
+                if not self.queue.heartbeat(task.id, self.worker_id, self.lease_seconds):
+                    # The lease was lost, another worker may already be running the task
+                    return
+            except Exception as e:
+                print(f"Error renewing lease of task {task.id}: {str(e)}")
+
+    def execute(self, task: QueuedTask) -> Dict[str, Any]:
+        """Run a leased task with a pooled agent and return its (fully streamed) result."""
+        payload = task.payload
+        task_id = payload.get("task_id", task.id)
+        config = payload.get("config", {})
+        agent = None
+        try:
+            agent = self.agent_builder.acquire_agent(payload["agent_type"], config)
+            if not agent:
+                raise ValueError(f"Failed to initialize agent for task {task_id}")
+            result = agent.execute(**config.get("params", {}))
+            streams = wrap_streams(result, config.get("stream_buffer", DEFAULT_STREAM_BUFFER))
+            if streams:
+                for stream in streams.values():
+                    stream.start()
+                result = gather_streams(result, streams).result()
+            return result
+        except Exception as e:
+            return {"status": "error", "message": f"Error executing task {task_id}: {str(e)}"}
+        finally:
+            if agent is not None:
+                self.agent_builder.release_agent(agent)
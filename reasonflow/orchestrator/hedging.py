@@ -0,0 +1,85 @@
+import threading
+from typing import Any, Dict, Optional, Tuple
+
+# Share of hedge-enabled requests that may be duplicated
+DEFAULT_HEDGE_RATIO = 0.05
+
+
+class HedgePolicy:
+    """
+    When to send a duplicate ("hedge") of a slow request, from a task's "hedge" config, e.g.
+    {"percentile": 95, "min_samples": 20,
+     "fallback": {"agent_type": "llm", "agent_config": {"provider": "groq", "model": "llama3-8b-8192"}}}.
+    A hedge goes out once the request has run longer than the given percentile of the
+    task's recent successful durations; the first successful response wins.
+    """
+
+    def __init__(self, percentile: float = 95.0, min_samples: int = 20, min_delay: float = 0.0,
+                 fallback: Optional[Dict[str, Any]] = None):
+        """
+        :param percentile: Percentile of historical latency after which to hedge.
+        :param min_samples: Recorded durations needed before the task is hedged at all.
+        :param min_delay: Never hedge earlier than this many seconds.
+        :param fallback: Send the hedge with this agent_type, agent_config and params
+                         (merged over the task's own) instead of repeating the request.
+        """
+        if not 0 < percentile <= 100:
+            raise ValueError(f"Hedge percentile must be in (0, 100], got {percentile}")
+        self.percentile = percentile
+        self.min_samples = min_samples
+        self.min_delay = min_delay
+        self.fallback = fallback or {}
+
+    @classmethod
+    def from_config(cls, value: Any) -> Optional["HedgePolicy"]:
+        """Policy of a task's "hedge" setting: True for defaults, a dict of options, or None/False."""
+        if not value:
+            return None
+        if value is True:
+            return cls()
+        return cls(**value)
+
+    def delay(self, metrics, task_key: str) -> Optional[float]:
+        """Seconds to wait before hedging, or None while the task lacks history."""
+        latency = metrics.get_duration_percentile(task_key, self.percentile, self.min_samples)
+        if latency is None:
+            return None
+        return max(latency, self.min_delay)
+
+    def hedge_task(self, agent_type: str, config: Dict) -> Tuple[str, Dict]:
+        """Agent type and config of the duplicate request."""
+        if not self.fallback:
+            return agent_type, config
+        hedge_config = dict(config)
+        hedge_config["agent_config"] = {**config.get("agent_config", {}), **self.fallback.get("agent_config", {})}
+        hedge_config["params"] = {**config.get("params", {}), **self.fallback.get("params", {})}
+        return self.fallback.get("agent_type", agent_type), hedge_config
+
+
+class HedgeBudget:
+    """
+    Caps hedges at a share of the requests that could be hedged, so that a slow
+    provider is not hit with twice the traffic exactly when it is struggling.
+    """
+
+    def __init__(self, ratio: float = DEFAULT_HEDGE_RATIO):
+        self.ratio = ratio
+        self.requests = 0
+        self.hedges = 0
+        self._lock = threading.Lock()
+
+    def record_request(self) -> None:
+        with self._lock:
+            self.requests += 1
+
+    def try_acquire(self) -> bool:
+        """Take one hedge if it stays within the budget."""
+        with self._lock:
+            if self.hedges + 1 > self.ratio * self.requests:
+                return False
+            self.hedges += 1
+            return True
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {"requests": self.requests, "hedges": self.hedges, "ratio": self.ratio}
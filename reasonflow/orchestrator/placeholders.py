@@ -0,0 +1,81 @@
+import re
+from typing import Any, Dict, Tuple, Union
+
+# Matches {{task_id.field}} references to the output of another task
+PLACEHOLDER_PATTERN = re.compile(r'\{\{([\w\-\.]+)\.([\w\-\.]+)\}\}')
+UNRESOLVED = "[UNRESOLVED]"
+
+Segment = Union[str, Tuple[str, str]]
+
+
+class CompiledTemplate:
+    """
+    A string parameter split once into literal segments and (task_id, field)
+    references, so it can be rendered for every run without re-parsing.
+    """
+    __slots__ = ("source", "segments", "references")
+
+    def __init__(self, source: str):
+        segments = []
+        position = 0
+        for match in PLACEHOLDER_PATTERN.finditer(source):
+            if match.start() > position:
+                segments.append(source[position:match.start()])
+            segments.append((match.group(1), match.group(2)))
+            position = match.end()
+        if position < len(source):
+            segments.append(source[position:])
+
+        self.source = source
+        self.segments: Tuple[Segment, ...] = tuple(segments)
+        self.references: Tuple[Tuple[str, str], ...] = tuple(
+            segment for segment in self.segments if isinstance(segment, tuple)
+        )
+
+    @property
+    def single_reference(self):
+        """The (task_id, field) reference if the template is exactly one placeholder, else None."""
+        if len(self.segments) == 1 and isinstance(self.segments[0], tuple):
+            return self.segments[0]
+        return None
+
+    def render(self, task_results: Dict[str, Dict]) -> str:
+        """Substitute every reference with the matching field of an upstream result."""
+        parts = []
+        for segment in self.segments:
+            if isinstance(segment, str):
+                parts.append(segment)
+                continue
+            ref_task_id, field = segment
+            result = task_results.get(ref_task_id)
+            if isinstance(result, dict) and field in result:
+                parts.append(str(result[field]))
+            else:
+                parts.append(UNRESOLVED)
+        return "".join(parts)
+
+    def __repr__(self):
+        return f"CompiledTemplate({self.source!r})"
+
+
+def compile_params(params: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Compile task parameters into a resolution plan. String values containing
+    placeholders become CompiledTemplate objects; everything else is kept as is.
+    """
+    compiled = {}
+    for key, value in (params or {}).items():
+        if isinstance(value, str) and PLACEHOLDER_PATTERN.search(value):
+            compiled[key] = CompiledTemplate(value)
+        else:
+            compiled[key] = value
+    return compiled
+
+
+def render_params(compiled: Dict[str, Any], task_results: Dict[str, Dict]) -> Dict[str, Any]:
+    """Render a compiled resolution plan into a fresh params dict for one run."""
+    return {
+        key: value.render(task_results) if isinstance(value, CompiledTemplate) else value
+        for key, value in compiled.items()
+    }
+
@@ -0,0 +1,213 @@
+import asyncio
+import threading
+import time
+from typing import Any, Dict, List, Optional
+
+# How often async waiters re-check limits that are bound by concurrency rather than time
+ASYNC_POLL_INTERVAL = 0.05
+# Rough characters-per-token ratio used to estimate the size of a request
+CHARS_PER_TOKEN = 4
+
+
+class TokenBucket:
+    """Refills `rate_per_minute` units per minute, holding at most one minute's worth."""
+
+    def __init__(self, rate_per_minute: float):
+        self.capacity = float(rate_per_minute)
+        self.rate = self.capacity / 60.0
+        self.available = self.capacity
+        self.updated = time.monotonic()
+
+    def _refill(self, now: float) -> None:
+        self.available = min(self.capacity, self.available + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def wait_time(self, amount: float, now: float) -> float:
+        """Seconds until `amount` units are available (0 when they are)."""
+        self._refill(now)
+        # Requests larger than the bucket are let through once it is full
+        amount = min(amount, self.capacity)
+        if self.available >= amount:
+            return 0.0
+        return (amount - self.available) / self.rate
+
+    def take(self, amount: float) -> None:
+        self.available -= min(amount, self.capacity)
+
+
+class RateLimit:
+    """Limits of one provider, model or API: concurrent requests, requests and tokens per minute."""
+
+    def __init__(self, max_concurrent: Optional[int] = None, requests_per_minute: Optional[float] = None,
+                 tokens_per_minute: Optional[float] = None):
+        self.max_concurrent = max_concurrent
+        self.requests = TokenBucket(requests_per_minute) if requests_per_minute else None
+        self.tokens = TokenBucket(tokens_per_minute) if tokens_per_minute else None
+        self.active = 0
+
+    def wait_time(self, tokens: float, now: float) -> Optional[float]:
+        """Seconds to wait for capacity; None when only a finishing request can free it."""
+        if self.max_concurrent is not None and self.active >= self.max_concurrent:
+            return None
+        wait = 0.0
+        if self.requests is not None:
+            wait = max(wait, self.requests.wait_time(1, now))
+        if self.tokens is not None and tokens:
+            wait = max(wait, self.tokens.wait_time(tokens, now))
+        return wait
+
+    def take(self, tokens: float) -> None:
+        self.active += 1
+        if self.requests is not None:
+            self.requests.take(1)
+        if self.tokens is not None and tokens:
+            self.tokens.take(tokens)
+
+
+class RateLimitLease:
+    """Capacity held by one request; released when the request finishes."""
+
+    def __init__(self, limiter: "RateLimiter", limits: List[RateLimit], tokens: float):
+        self.limiter = limiter
+        self.limits = limits
+        self.tokens = tokens
+        self.waited = 0.0
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.limiter.release(self)
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc):
+        self.limiter.release(self)
+
+
+class RateLimiter:
+    """
+    Process-wide limits keyed by provider ("provider:openai"), model
+    ("model:openai/gpt-4o") or API base URL ("url:https://api.example.com").
+    A request acquires capacity on every configured key it maps to at once, waiting
+    (instead of failing) until all of them have room. Keys without limits are ignored.
+    """
+
+    def __init__(self):
+        self._limits: Dict[str, RateLimit] = {}
+        self._condition = threading.Condition()
+
+    def configure(self, key: str, max_concurrent: Optional[int] = None, requests_per_minute: Optional[float] = None,
+                  tokens_per_minute: Optional[float] = None) -> None:
+        """Set the limits of a key, replacing any previous ones."""
+        with self._condition:
+            self._limits[key] = RateLimit(max_concurrent, requests_per_minute, tokens_per_minute)
+            self._condition.notify_all()
+
+    def remove(self, key: str) -> None:
+        with self._condition:
+            self._limits.pop(key, None)
+            self._condition.notify_all()
+
+    def limits_for(self, keys: List[str]) -> List[RateLimit]:
+        with self._condition:
+            return [self._limits[key] for key in keys if key in self._limits]
+
+    def _try_take(self, limits: List[RateLimit], tokens: float) -> Optional[float]:
+        """Take capacity on all limits if possible (0.0), else return the wait (None: unknown)."""
+        now = time.monotonic()
+        waits = [limit.wait_time(tokens, now) for limit in limits]
+        if all(wait == 0.0 for wait in waits):
+            for limit in limits:
+                limit.take(tokens)
+            return 0.0
+        if any(wait is None for wait in waits):
+            return None
+        return max(waits)
+
+    def acquire(self, keys: List[str], tokens: float = 0) -> RateLimitLease:
+        """Block until every limit of `keys` has capacity for one request of `tokens` tokens."""
+        limits = self.limits_for(keys)
+        lease = RateLimitLease(self, limits, tokens)
+        if not limits:
+            return lease
+        started = time.monotonic()
+        with self._condition:
+            wait = self._try_take(limits, tokens)
+            if wait == 0.0:
+                return lease
+            while wait != 0.0:
+                # Woken early when a request finishes or limits change
+                self._condition.wait(wait)
+                wait = self._try_take(limits, tokens)
+        lease.waited = time.monotonic() - started
+        return lease
+
+    async def acquire_async(self, keys: List[str], tokens: float = 0) -> RateLimitLease:
+        """Like acquire(), but waits without blocking the event loop."""
+        limits = self.limits_for(keys)
+        lease = RateLimitLease(self, limits, tokens)
+        if not limits:
+            return lease
+        started = time.monotonic()
+        with self._condition:
+            wait = self._try_take(limits, tokens)
+        if wait == 0.0:
+            return lease
+        while wait != 0.0:
+            await asyncio.sleep(ASYNC_POLL_INTERVAL if wait is None else min(wait, ASYNC_POLL_INTERVAL * 10))
+            with self._condition:
+                wait = self._try_take(limits, tokens)
+        lease.waited = time.monotonic() - started
+        return lease
+
+    def release(self, lease: RateLimitLease) -> None:
+        """Give back the concurrency slots of a finished request."""
+        if not lease.limits:
+            return
+        with self._condition:
+            for limit in lease.limits:
+                limit.active = max(0, limit.active - 1)
+            lease.limits = []
+            self._condition.notify_all()
+
+
+def limit_keys(config: Dict[str, Any]) -> List[str]:
+    """
+    Rate limit keys of a task: the provider and model of an LLMIntegration passed as
+    "agent" or of an LLM agent_config, and the base URL of an API connector.
+    """
+    keys = []
+    agent_config = config.get("agent_config") or {}
+    agent = config.get("agent")
+    provider = getattr(agent, "provider", None) or agent_config.get("api_provider") or agent_config.get("provider")
+    model = getattr(agent, "model", None) or agent_config.get("model")
+    if isinstance(provider, str):
+        keys.append(f"provider:{provider}")
+        if isinstance(model, str):
+            keys.append(f"model:{provider}/{model}")
+    base_url = agent_config.get("base_url")
+    if isinstance(base_url, str):
+        keys.append(f"url:{base_url.rstrip('/')}")
+    return keys
+
+
+def estimate_tokens(params: Dict[str, Any]) -> int:
+    """Rough token count of a request: its text params plus any requested max_tokens."""
+    text_length = sum(len(value) for value in params.values() if isinstance(value, str))
+    max_tokens = params.get("max_tokens")
+    return text_length // CHARS_PER_TOKEN + (max_tokens if isinstance(max_tokens, int) else 0)
+
+
+_default_limiter: Optional[RateLimiter] = None
+_default_limiter_lock = threading.Lock()
+
+
+def default_rate_limiter() -> RateLimiter:
+    """The limiter shared by every workflow engine in the process."""
+    global _default_limiter
+    with _default_limiter_lock:
+        if _default_limiter is None:
+            _default_limiter = RateLimiter()
+        return _default_limiter
@@ -0,0 +1,146 @@
+import hashlib
+import json
+import os
+import pickle
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Optional, Tuple
+
+
+def _normalize(value: Any) -> Any:
+    """Reduce a value to a JSON-encodable structure with a stable ordering."""
+    if isinstance(value, dict):
+        return {str(key): _normalize(item) for key, item in value.items()}
+    if isinstance(value, (list, tuple)):
+        return [_normalize(item) for item in value]
+    if isinstance(value, (set, frozenset)):
+        return sorted((_normalize(item) for item in value), key=repr)
+    if isinstance(value, (str, int, float, bool)) or value is None:
+        return value
+    # Live objects such as an LLMIntegration passed as "agent" are identified by
+    # their type and plain attributes (provider, model, ...), not by memory address.
+    attributes = getattr(value, "__dict__", None)
+    if isinstance(attributes, dict):
+        normalized = {
+            key: item for key, item in attributes.items()
+            if isinstance(item, (str, int, float, bool)) or item is None
+        }
+        normalized["__type__"] = f"{type(value).__module__}.{type(value).__qualname__}"
+        return normalized
+    return repr(value)
+
+
+def fingerprint(*parts: Any) -> str:
+    """Stable SHA-256 content hash of arbitrary configuration values."""
+    payload = json.dumps([_normalize(part) for part in parts], sort_keys=True, separators=(",", ":"))
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+class TaskResultCache:
+    """
+    Content-addressed cache of task results with a bounded in-memory LRU tier
+    and an optional on-disk tier. Entries may carry a TTL in seconds.
+    """
+
+    def __init__(self, max_entries: int = 1024, disk_path: Optional[str] = None, default_ttl: Optional[float] = None):
+        self.max_entries = max_entries
+        self.disk_path = disk_path
+        self.default_ttl = default_ttl
+        self._entries: "OrderedDict[str, Tuple[Optional[float], Dict]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.disk_hits = 0
+
+        if disk_path:
+            os.makedirs(disk_path, exist_ok=True)
+
+    @staticmethod
+    def make_key(agent_type: str, agent_config: Dict, params: Dict, agent: Any = None) -> str:
+        """Build the cache key of a task from its agent type, agent config and resolved params."""
+        return fingerprint(agent_type, agent_config, agent, params)
+
+    def get(self, key: str) -> Optional[Dict]:
+        """Return a cached result, or None on a miss or expired entry."""
+        now = time.time()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                expires_at, result = entry
+                if expires_at is None or expires_at > now:
+                    self._entries.move_to_end(key)
+                    self.hits += 1
+                    return result
+                del self._entries[key]
+
+        entry = self._read_disk(key)
+        with self._lock:
+            if entry is not None and (entry[0] is None or entry[0] > now):
+                self._remember(key, entry)
+                self.hits += 1
+                self.disk_hits += 1
+                return entry[1]
+            self.misses += 1
+        return None
+
+    def set(self, key: str, result: Dict, ttl: Optional[float] = None) -> None:
+        """Store a result under the given key."""
+        ttl = self.default_ttl if ttl is None else ttl
+        entry = (time.time() + ttl if ttl else None, result)
+        with self._lock:
+            self._remember(key, entry)
+        self._write_disk(key, entry)
+
+    def clear(self) -> None:
+        """Drop all in-memory entries and reset counters."""
+        with self._lock:
+            self._entries.clear()
+            self.hits = self.misses = self.disk_hits = 0
+
+    def stats(self) -> Dict[str, int]:
+        """Hit and miss counters of the cache."""
+        with self._lock:
+            return {
+                "cache_hits": self.hits,
+                "cache_misses": self.misses,
+                "cache_disk_hits": self.disk_hits,
+                "cache_size": len(self._entries),
+            }
+
+    def _remember(self, key: str, entry: Tuple[Optional[float], Dict]) -> None:
+        self._entries[key] = entry
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    def _disk_file(self, key: str) -> str:
+        return os.path.join(self.disk_path, key[:2], f"{key}.pkl")
+
+    def _read_disk(self, key: str) -> Optional[Tuple[Optional[float], Dict]]:
+        if not self.disk_path:
+            return None
+        try:
+            with open(self._disk_file(key), "rb") as f:
+                return pickle.load(f)
+        except FileNotFoundError:
+            return None
+        except Exception as e:
+            print(f"Error reading cached result {key}: {str(e)}")
+            return None
+
+    def _write_disk(self, key: str, entry: Tuple[Optional[float], Dict]) -> None:
+        if not self.disk_path:
+            return
+        file_path = self._disk_file(key)
+        temp_path = f"{file_path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        try:
+            os.makedirs(os.path.dirname(file_path), exist_ok=True)
+            with open(temp_path, "wb") as f:
+                pickle.dump(entry, f, protocol=pickle.HIGHEST_PROTOCOL)
+            os.replace(temp_path, file_path)
+        except Exception as e:
+            # Results that cannot be pickled simply stay memory-only
+            print(f"Error writing cached result {key}: {str(e)}")
+            if os.path.exists(temp_path):
+                os.remove(temp_path)
@@ -0,0 +1,68 @@
+import heapq
+import itertools
+from typing import Callable, Dict, Iterable, List, Optional
+
+SCHEDULING_POLICIES = ("critical_path", "priority", "fifo")
+
+
+def compute_critical_paths(
+    execution_order: List[str],
+    successors: Callable[[str], Iterable[str]],
+    durations: Dict[str, Optional[float]],
+    default_duration: Optional[float] = None
+) -> Dict[str, float]:
+    """
+    Compute the remaining critical path of every task: its own expected duration plus
+    the longest expected chain of work downstream of it.
+    :param execution_order: Tasks in topological order.
+    :param successors: Function returning the direct successors of a task.
+    :param durations: Historical mean duration per task (None when unknown).
+    :param default_duration: Estimate for tasks without history; defaults to the mean of known ones.
+    """
+    if default_duration is None:
+        known = [duration for duration in durations.values() if duration is not None]
+        default_duration = sum(known) / len(known) if known else 1.0
+
+    paths: Dict[str, float] = {}
+    for task_id in reversed(execution_order):
+        duration = durations.get(task_id)
+        own = default_duration if duration is None else duration
+        paths[task_id] = own + max((paths[succ] for succ in successors(task_id)), default=0.0)
+    return paths
+
+
+class ReadyQueue:
+    """
+    Tasks whose dependencies are satisfied, ordered by a scheduling policy:
+    - critical_path: longest remaining critical path first, ties by static priority
+    - priority: highest static priority first, ties by critical path
+    - fifo: in the order tasks became ready
+    """
+
+    def __init__(self, policy: str = "critical_path", priorities: Optional[Dict[str, int]] = None,
+                 critical_paths: Optional[Dict[str, float]] = None):
+        if policy not in SCHEDULING_POLICIES:
+            raise ValueError(f"Unknown scheduling policy: {policy}. Use one of {SCHEDULING_POLICIES}")
+        self.policy = policy
+        self.priorities = priorities or {}
+        self.critical_paths = critical_paths or {}
+        self._heap = []
+        self._sequence = itertools.count()
+
+    def _key(self, task_id: str):
+        priority = self.priorities.get(task_id, 1)
+        path = self.critical_paths.get(task_id, 0.0)
+        if self.policy == "critical_path":
+            return (-path, -priority)
+        if self.policy == "priority":
+            return (-priority, -path)
+        return ()
+
+    def push(self, task_id: str) -> None:
+        heapq.heappush(self._heap, (self._key(task_id), next(self._sequence), task_id))
+
+    def pop(self) -> str:
+        return heapq.heappop(self._heap)[-1]
+
+    def __len__(self) -> int:
+        return len(self._heap)
@@ -102,7 +102,63 @@ class StateManager:
             state_path = os.path.join(self.storage_path, f"{workflow_id}.json")
             if os.path.exists(state_path):
                 os.remove(state_path)
+            self.clear_checkpoints(workflow_id)
             return True
         except Exception as e:
             print(f"Error deleting state: {str(e)}")
-            return False 
\ No newline at end of file
+            return False
+
+    def _checkpoint_path(self, workflow_id: str) -> str:
+        return os.path.join(self.storage_path, f"{workflow_id}.checkpoints.jsonl")
+
+    def save_checkpoint(self, workflow_id: str, task_id: str, result: Dict, fingerprint: Optional[str] = None) -> bool:
+        """
+        Persist the result of a completed task. Checkpoints are appended one JSON line
+        per task, so each write is small and a crash never corrupts earlier entries.
+        """
+        try:
+            entry = self._serialize_config({
+                "task_id": task_id,
+                "fingerprint": fingerprint,
+                "result": result,
+                "timestamp": datetime.now().isoformat()
+            })
+            line = json.dumps(entry)
+            with self.lock:
+                with open(self._checkpoint_path(workflow_id), "a", encoding="utf-8") as f:
+                    f.write(line + "\n")
+                    f.flush()
+            return True
+        except Exception as e:
+            print(f"Error saving checkpoint for task {task_id}: {str(e)}")
+            return False
+
+    def load_checkpoints(self, workflow_id: str) -> Dict[str, Dict]:
+        """Load task checkpoints of a workflow, keyed by task ID (latest entry wins)."""
+        checkpoints = {}
+        checkpoint_path = self._checkpoint_path(workflow_id)
+        if not os.path.exists(checkpoint_path):
+            return checkpoints
+        try:
+            with open(checkpoint_path, "r", encoding="utf-8") as f:
+                for line in f:
+                    try:
+                        entry = json.loads(line)
+                    except json.JSONDecodeError:
+                        # A partially written last line from an interrupted process
+                        continue
+                    checkpoints[entry["task_id"]] = entry
+        except Exception as e:
+            print(f"Error loading checkpoints: {str(e)}")
+        return checkpoints
+
+    def clear_checkpoints(self, workflow_id: str) -> bool:
+        """Remove all task checkpoints of a workflow."""
+        try:
+            checkpoint_path = self._checkpoint_path(workflow_id)
+            if os.path.exists(checkpoint_path):
+                os.remove(checkpoint_path)
+            return True
+        except Exception as e:
+            print(f"Error clearing checkpoints: {str(e)}")
+            return False
@@ -0,0 +1,242 @@
+import asyncio
+import threading
+from collections.abc import AsyncIterator, Iterator
+from concurrent.futures import Future
+from typing import Any, Dict, List, Optional
+
+DEFAULT_STREAM_BUFFER = 64
+_END = object()
+
+
+def is_stream_source(value: Any) -> bool:
+    """Check whether a task output value is produced incrementally."""
+    if isinstance(value, (str, bytes, dict, list, tuple)):
+        return False
+    return isinstance(value, (TaskStream, Iterator, AsyncIterator))
+
+
+class TaskStream:
+    """
+    A task output produced as a sequence of chunks.
+
+    A pump thread drains the source iterator (or async iterator) into a buffer that
+    any number of downstream consumers read through subscribe(). The producer is held
+    back when it gets `max_buffer` chunks ahead of the slowest active consumer. Once the
+    source is exhausted, the chunks are assembled into the full value for storage.
+    """
+
+    def __init__(self, source: Any, max_buffer: int = DEFAULT_STREAM_BUFFER):
+        self._source = source
+        self.max_buffer = max(1, max_buffer)
+        self._chunks: List[Any] = []
+        self._cursors: Dict[int, int] = {}
+        self._done = False
+        self._error: Optional[BaseException] = None
+        self._condition = threading.Condition()
+        self._started = False
+        # Resolves to the assembled value once the source is exhausted
+        self.future: Future = Future()
+
+    def start(self, loop: Optional[asyncio.AbstractEventLoop] = None) -> "TaskStream":
+        """
+        Start draining the source. Async sources are pumped on `loop` when given,
+        so they stay on the event loop that created them.
+        """
+        with self._condition:
+            if self._started:
+                return self
+            self._started = True
+
+        if isinstance(self._source, AsyncIterator):
+            if loop is not None:
+                asyncio.run_coroutine_threadsafe(self._pump_async(), loop)
+            else:
+                threading.Thread(target=lambda: asyncio.run(self._pump_async()), daemon=True).start()
+        else:
+            threading.Thread(target=self._pump, daemon=True).start()
+        return self
+
+    def _has_capacity(self) -> bool:
+        if not self._cursors:
+            return True
+        return len(self._chunks) - min(self._cursors.values()) < self.max_buffer
+
+    def _wait_for_capacity(self) -> None:
+        with self._condition:
+            self._condition.wait_for(self._has_capacity)
+
+    def _append(self, chunk: Any) -> None:
+        with self._condition:
+            self._chunks.append(chunk)
+            self._condition.notify_all()
+
+    def _finish(self, error: Optional[BaseException] = None) -> None:
+        with self._condition:
+            self._done = True
+            self._error = error
+            self._condition.notify_all()
+        if error is not None:
+            self.future.set_exception(error)
+        else:
+            self.future.set_result(self._assemble())
+
+    def _pump(self) -> None:
+        try:
+            for chunk in self._source:
+                self._wait_for_capacity()
+                self._append(chunk)
+            self._finish()
+        except Exception as e:
+            self._finish(e)
+
+    async def _pump_async(self) -> None:
+        loop = asyncio.get_running_loop()
+        try:
+            async for chunk in self._source:
+                if not self._has_capacity():
+                    await loop.run_in_executor(None, self._wait_for_capacity)
+                self._append(chunk)
+            self._finish()
+        except Exception as e:
+            self._finish(e)
+
+    def _assemble(self) -> Any:
+        chunks = list(self._chunks)
+        if chunks and all(isinstance(chunk, str) for chunk in chunks):
+            return "".join(chunks)
+        if chunks and all(isinstance(chunk, bytes) for chunk in chunks):
+            return b"".join(chunks)
+        return chunks
+
+    def subscribe(self) -> "StreamSubscription":
+        """Iterate over the chunks from the beginning, as they are produced."""
+        return StreamSubscription(self)
+
+    def result(self, timeout: Optional[float] = None) -> Any:
+        """Block until the stream is complete and return the assembled value."""
+        return self.future.result(timeout)
+
+    @property
+    def done(self) -> bool:
+        return self.future.done()
+
+    def __str__(self):
+        # Textual use of a stream (e.g. inside a larger prompt) needs the full value
+        return str(self.result())
+
+    def __repr__(self):
+        return f"TaskStream(chunks={len(self._chunks)}, done={self._done})"
+
+
+class StreamSubscription:
+    """
+    One consumer's position in a TaskStream. Usable with `for` and `async for`.
+    The consumer only holds back the producer once it has started reading.
+    """
+
+    def __init__(self, stream: TaskStream):
+        self._stream = stream
+        self._index = 0
+        self._registered = False
+        self._closed = False
+
+    def _next_chunk(self) -> Any:
+        """Return the next chunk, or the _END sentinel once the stream is exhausted."""
+        stream = self._stream
+        with stream._condition:
+            if self._closed:
+                return _END
+            if not self._registered:
+                stream._cursors[id(self)] = self._index
+                self._registered = True
+            stream._condition.wait_for(lambda: self._index < len(stream._chunks) or stream._done)
+            if self._index < len(stream._chunks):
+                chunk = stream._chunks[self._index]
+                self._index += 1
+                stream._cursors[id(self)] = self._index
+                stream._condition.notify_all()
+                return chunk
+            error = stream._error
+        self.close()
+        if error is not None:
+            raise error
+        return _END
+
+    def close(self) -> None:
+        """Stop consuming; the producer no longer waits for this subscription."""
+        stream = self._stream
+        with stream._condition:
+            self._closed = True
+            if self._registered:
+                stream._cursors.pop(id(self), None)
+                self._registered = False
+                stream._condition.notify_all()
+
+    def __iter__(self):
+        return self
+
+    def __next__(self) -> Any:
+        chunk = self._next_chunk()
+        if chunk is _END:
+            raise StopIteration
+        return chunk
+
+    def __aiter__(self):
+        return self
+
+    async def __anext__(self) -> Any:
+        loop = asyncio.get_running_loop()
+        chunk = await loop.run_in_executor(None, self._next_chunk)
+        if chunk is _END:
+            raise StopAsyncIteration
+        return chunk
+
+    def __del__(self):
+        try:
+            self.close()
+        except Exception:
+            pass
+
+
+def wrap_streams(result: Any, max_buffer: int = DEFAULT_STREAM_BUFFER) -> Dict[str, TaskStream]:
+    """
+    Replace every incrementally produced field of a task result with a TaskStream.
+    :return: The streams keyed by field; empty for regular results.
+    """
+    streams = {}
+    if not isinstance(result, dict):
+        return streams
+    for field, value in list(result.items()):
+        if is_stream_source(value):
+            stream = value if isinstance(value, TaskStream) else TaskStream(value, max_buffer)
+            result[field] = stream
+            streams[field] = stream
+    return streams
+
+
+def gather_streams(result: Dict, streams: Dict[str, TaskStream]) -> Future:
+    """
+    Future resolving to `result` once every stream has finished. Each stream field of
+    the result is replaced by its assembled value before the future completes.
+    """
+    future: Future = Future()
+    remaining = [len(streams)]
+    lock = threading.Lock()
+
+    def on_stream_done(_):
+        with lock:
+            remaining[0] -= 1
+            if remaining[0]:
+                return
+        for field, stream in streams.items():
+            try:
+                result[field] = stream.result()
+            except Exception as e:
+                result[field] = stream._assemble()
+                result["status"] = "error"
+                result["message"] = f"Stream '{field}' failed: {str(e)}"
+        future.set_result(result)
+
+    for stream in streams.values():
+        stream.future.add_done_callback(on_stream_done)
+    return future
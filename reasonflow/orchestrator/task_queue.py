@@ -0,0 +1,189 @@
+import json
+import sqlite3
+import time
+import uuid
+from abc import ABC, abstractmethod
+from contextlib import closing
+from typing import Any, Dict, List, Optional
+
+DEFAULT_LEASE_SECONDS = 30.0
+DEFAULT_MAX_ATTEMPTS = 3
+
+
+class QueuedTask:
+    """A task handed to a worker: its queue id, payload and delivery count."""
+
+    def __init__(self, task_id: str, payload: Dict[str, Any], attempts: int, worker_id: str):
+        self.id = task_id
+        self.payload = payload
+        self.attempts = attempts
+        self.worker_id = worker_id
+
+    def __repr__(self):
+        return f"QueuedTask(id={self.id!r}, attempts={self.attempts}, worker_id={self.worker_id!r})"
+
+
+class TaskQueue(ABC):
+    """
+    Durable queue between a coordinating engine and worker processes.
+    A worker leases a task for a limited time and keeps the lease alive with heartbeats;
+    a task whose lease runs out (its worker died or hung) is delivered again, up to
+    max_attempts times, after which it completes with an error result.
+    """
+
+    @abstractmethod
+    def put(self, payload: Dict[str, Any]) -> str:
+        """Enqueue a JSON-serializable task payload and return its queue id."""
+
+    @abstractmethod
+    def lease(self, worker_id: str, lease_seconds: float = DEFAULT_LEASE_SECONDS) -> Optional[QueuedTask]:
+        """Take the oldest deliverable task for `lease_seconds`, or None if there is none."""
+
+    @abstractmethod
+    def heartbeat(self, task_id: str, worker_id: str, lease_seconds: float = DEFAULT_LEASE_SECONDS) -> bool:
+        """Extend a lease. Returns False if the worker no longer holds it."""
+
+    @abstractmethod
+    def complete(self, task_id: str, worker_id: str, result: Dict[str, Any]) -> bool:
+        """Store the result of a task. The first result reported for a task wins."""
+
+    @abstractmethod
+    def release(self, task_id: str, worker_id: str) -> bool:
+        """Give a leased task back for immediate re-delivery, e.g. when a worker shuts down."""
+
+    @abstractmethod
+    def results(self, task_ids: List[str]) -> Dict[str, Dict[str, Any]]:
+        """Results of the given tasks that have completed."""
+
+    @abstractmethod
+    def acknowledge(self, task_ids: List[str]) -> None:
+        """Remove completed tasks once their results have been consumed."""
+
+    @abstractmethod
+    def stats(self) -> Dict[str, int]:
+        """Number of pending, leased and done tasks."""
+
+
+class SQLiteTaskQueue(TaskQueue):
+    """
+    TaskQueue stored in a SQLite database file, shared by processes on one machine
+    (or on a network file system that supports SQLite locking).
+    """
+
+    def __init__(self, path: str = "reasonflow_queue.db", max_attempts: int = DEFAULT_MAX_ATTEMPTS,
+                 busy_timeout: float = 30.0):
+        self.path = path
+        self.max_attempts = max_attempts
+        self.busy_timeout = busy_timeout
+        with closing(self._connect()) as conn:
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS tasks ("
+                " id TEXT PRIMARY KEY, payload TEXT NOT NULL, status TEXT NOT NULL,"
+                " worker_id TEXT, lease_until REAL, attempts INTEGER NOT NULL DEFAULT 0,"
+                " result TEXT, created_at REAL NOT NULL, updated_at REAL NOT NULL)"
+            )
+            conn.execute("CREATE INDEX IF NOT EXISTS tasks_status ON tasks (status, created_at)")
+
+    def _connect(self) -> sqlite3.Connection:
+        # Autocommit mode; write transactions are opened explicitly with BEGIN IMMEDIATE
+        return sqlite3.connect(self.path, timeout=self.busy_timeout, isolation_level=None)
+
+    def put(self, payload: Dict[str, Any]) -> str:
+        task_id = str(uuid.uuid4())
+        now = time.time()
+        with closing(self._connect()) as conn:
+            conn.execute(
+                "INSERT INTO tasks (id, payload, status, created_at, updated_at) VALUES (?, ?, 'pending', ?, ?)",
+                (task_id, json.dumps(payload), now, now)
+            )
+        return task_id
+
+    def lease(self, worker_id: str, lease_seconds: float = DEFAULT_LEASE_SECONDS) -> Optional[QueuedTask]:
+        now = time.time()
+        with closing(self._connect()) as conn:
+            conn.execute("BEGIN IMMEDIATE")
+            try:
+                # Tasks whose last delivery also timed out are given up on
+                abandoned = {
+                    "status": "error",
+                    "message": f"Task abandoned after {self.max_attempts} deliveries without a result",
+                }
+                conn.execute(
+                    "UPDATE tasks SET status = 'done', result = ?, worker_id = NULL, updated_at = ?"
+                    " WHERE status = 'leased' AND lease_until < ? AND attempts >= ?",
+                    (json.dumps(abandoned), now, now, self.max_attempts)
+                )
+                row = conn.execute(
+                    "SELECT id, payload, attempts FROM tasks"
+                    " WHERE status = 'pending' OR (status = 'leased' AND lease_until < ?)"
+                    " ORDER BY created_at LIMIT 1",
+                    (now,)
+                ).fetchone()
+                if row is None:
+                    conn.execute("COMMIT")
+                    return None
+                task_id, payload, attempts = row
+                conn.execute(
+                    "UPDATE tasks SET status = 'leased', worker_id = ?, lease_until = ?, attempts = ?,"
+                    " updated_at = ? WHERE id = ?",
+                    (worker_id, now + lease_seconds, attempts + 1, now, task_id)
+                )
+                conn.execute("COMMIT")
+            except Exception:
+                conn.execute("ROLLBACK")
+                raise
+        return QueuedTask(task_id, json.loads(payload), attempts + 1, worker_id)
+
+    def heartbeat(self, task_id: str, worker_id: str, lease_seconds: float = DEFAULT_LEASE_SECONDS) -> bool:
+        now = time.time()
+        with closing(self._connect()) as conn:
+            cursor = conn.execute(
+                "UPDATE tasks SET lease_until = ?, updated_at = ?"
+                " WHERE id = ? AND status = 'leased' AND worker_id = ?",
+                (now + lease_seconds, now, task_id, worker_id)
+            )
+            return cursor.rowcount == 1
+
+    def complete(self, task_id: str, worker_id: str, result: Dict[str, Any]) -> bool:
+        with closing(self._connect()) as conn:
+            cursor = conn.execute(
+                "UPDATE tasks SET status = 'done', result = ?, worker_id = NULL, updated_at = ?"
+                " WHERE id = ? AND status != 'done'",
+                (json.dumps(result, default=str), time.time(), task_id)
+            )
+            return cursor.rowcount == 1
+
+    def release(self, task_id: str, worker_id: str) -> bool:
+        with closing(self._connect()) as conn:
+            cursor = conn.execute(
+                "UPDATE tasks SET status = 'pending', worker_id = NULL, lease_until = NULL, updated_at = ?"
+                " WHERE id = ? AND status = 'leased' AND worker_id = ?",
+                (time.time(), task_id, worker_id)
+            )
+            return cursor.rowcount == 1
+
+    def results(self, task_ids: List[str]) -> Dict[str, Dict[str, Any]]:
+        if not task_ids:
+            return {}
+        placeholders = ",".join("?" for _ in task_ids)
+        with closing(self._connect()) as conn:
+            rows = conn.execute(
+                f"SELECT id, result FROM tasks WHERE status = 'done' AND id IN ({placeholders})",
+                list(task_ids)
+            ).fetchall()
+        return {task_id: json.loads(result) for task_id, result in rows}
+
+    def acknowledge(self, task_ids: List[str]) -> None:
+        if not task_ids:
+            return
+        placeholders = ",".join("?" for _ in task_ids)
+        with closing(self._connect()) as conn:
+            conn.execute(f"DELETE FROM tasks WHERE status = 'done' AND id IN ({placeholders})", list(task_ids))
+
+    def stats(self) -> Dict[str, int]:
+        counts = {"pending": 0, "leased": 0, "done": 0}
+        with closing(self._connect()) as conn:
+            for status, count in conn.execute("SELECT status, COUNT(*) FROM tasks GROUP BY status"):
+                counts[status] = count
+        return counts
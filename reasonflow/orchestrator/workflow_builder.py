@@ -1,7 +1,8 @@
-from typing import Dict, Any, Optional
+from typing import Dict, Any, Iterable, Iterator, Optional
 import uuid
 from reasonflow.orchestrator.workflow_engine import WorkflowEngine
 from reasonflow.orchestrator.state_manager import StateManager
+from reasonflow.orchestrator.workflow_plan import WorkflowPlan, compile_workflow
 from reasonflow.orchestrator.input_parser import InputParser
 from reasonflow.tasks.task_manager import TaskManager
 from reasonchain.memory import SharedMemory
@@ -9,51 +10,94 @@ import os
 import numpy as np
 
 class WorkflowBuilder:
-    def __init__(self, task_manager=None, tracker_type="basic", tracker_config=None):
-        """Initialize WorkflowBuilder with optional task manager and tracking"""
+    def __init__(self, task_manager=None, tracker_type="basic", tracker_config=None, max_workers=None,
+                 process_workers=None, cache_config=None, scheduling_policy="critical_path", rate_limits=None,
+                 task_queue=None):
+        """
+        Initialize WorkflowBuilder with optional task manager and tracking.
+        Pass a task_queue to execute agent tasks on `reasonflow worker` processes.
+        """
         self.task_manager = task_manager or TaskManager(shared_memory=SharedMemory())
+        self.state_manager = StateManager()
+        # Settings shared by every engine this builder creates
+        self.engine_options = {
+            "tracker_type": tracker_type,
+            "tracker_config": tracker_config,
+            "max_workers": max_workers,
+            "process_workers": process_workers,
+            "cache_config": cache_config,
+            "scheduling_policy": scheduling_policy,
+            "rate_limits": rate_limits,
+            "task_queue": task_queue,
+        }
         self.engine = WorkflowEngine(
             task_manager=self.task_manager,
-            tracker_type=tracker_type,
-            tracker_config=tracker_config
+            state_manager=self.state_manager,
+            **self.engine_options
         )
-        self.state_manager = StateManager()
         self.parser = InputParser()
 
     def create_workflow(self, config: Dict[str, Any]) -> str:
         """Create a new workflow from configuration."""
         try:
             workflow_id = str(uuid.uuid4())
-            serializable_config = self._make_config_serializable(config)
-
-            if not self.parser.validate_workflow(serializable_config):
-                raise ValueError("Invalid workflow configuration")
-
-            # Set workflow context in engine
-            self.engine.set_workflow_context(workflow_id, serializable_config)
-
-            # Add tasks to the workflow engine
-            for task_id, task_config in serializable_config["tasks"].items():
-                self.engine.add_task(task_id, task_config["type"], task_config.get("config", {}))
-                self.task_manager.add_task({
-                    "id": task_id,
-                    "name": task_config.get("name", task_id),
-                    "dependencies": task_config.get("dependencies", []),
-                    "status": "pending",
-                    "priority": task_config.get("priority", 1),
-                })
-
-            # Add dependencies to the workflow engine
-            for dep in serializable_config["dependencies"]:
-                self.engine.add_dependency(dep["from"], dep["to"])
+            plan = self.compile_workflow(config)
+            self._load_workflow(workflow_id, plan)
 
             # Save initial state
-            self.state_manager.save_state(workflow_id, {"status": "created", "config": serializable_config})
+            self.state_manager.save_state(workflow_id, {"status": "created", "config": plan.definition})
             return workflow_id
         except Exception as e:
             print(f"Error creating workflow: {e}")
             return ""
 
+    def compile_workflow(self, config: Dict[str, Any]) -> WorkflowPlan:
+        """
+        Compile a workflow definition into an execution plan. Plans are cached by definition
+        hash, so serializing, validating and compiling a given workflow shape happens once.
+        """
+        return compile_workflow(config, prepare=self._make_config_serializable)
+
+    def map_workflow(self, config: Dict[str, Any], inputs: Iterable[Any],
+                     concurrency: Optional[int] = None) -> Iterator[Dict]:
+        """
+        Run one workflow definition over many input records, e.g. one query per customer.
+        The definition is validated and built once into a dedicated engine whose agents are
+        shared by all records; no per-record workflow id or state file is created.
+        Task params refer to the current record as {{input.field}}.
+        Yields each record's outcome as it finishes, see WorkflowEngine.map_inputs().
+        """
+        plan = self.compile_workflow(config)
+        engine = WorkflowEngine(task_manager=self.task_manager, **self.engine_options)
+        # Agent types registered on the builder's engine are available to the batch too
+        engine.agent_builder = self.engine.agent_builder
+        self._load_workflow(f"batch-{uuid.uuid4()}", plan, engine=engine, track_tasks=False)
+        return self._map_records(engine, inputs, concurrency)
+
+    @staticmethod
+    def _map_records(engine: WorkflowEngine, inputs: Iterable[Any], concurrency: Optional[int]) -> Iterator[Dict]:
+        try:
+            yield from engine.map_inputs(inputs, concurrency=concurrency)
+        finally:
+            engine.shutdown()
+
+    def _load_workflow(self, workflow_id: str, plan: WorkflowPlan, engine: Optional[WorkflowEngine] = None,
+                       track_tasks: bool = True) -> None:
+        """Load the tasks and dependencies of a compiled workflow into the engine."""
+        engine = engine or self.engine
+        engine.load_plan(workflow_id, plan)
+        if not track_tasks:
+            return
+
+        for task_id, task_config in plan.definition["tasks"].items():
+            self.task_manager.add_task({
+                "id": task_id,
+                "name": task_config.get("name", task_id),
+                "dependencies": task_config.get("dependencies", []),
+                "status": "pending",
+                "priority": task_config.get("priority", 1),
+            })
+
     def _make_config_serializable(self, config: Dict) -> Dict:
         """
         Convert config to a JSON-serializable format while preserving critical data.
@@ -101,23 +145,32 @@ class WorkflowBuilder:
             # Handle serialization errors gracefully
             return f"// Serialization Error: {str(e)}"
 
-    def execute_workflow(self, workflow_id: str) -> Dict:
-        """Execute a workflow by ID."""
+    def execute_workflow(self, workflow_id: str, parallel: bool = False, max_workers: Optional[int] = None,
+                         incremental: bool = False, timeout: Optional[float] = None) -> Dict:
+        """
+        Execute a workflow by ID. Set parallel=True to run independent tasks concurrently,
+        and incremental=True to only re-run tasks whose inputs changed since the last run.
+        A run that exceeds `timeout` seconds, or is stopped, ends with status "stopped".
+        """
         try:
             # Load workflow state
             state = self.state_manager.load_state(workflow_id)
             if not state:
                 raise ValueError(f"Workflow {workflow_id} not found")
+            self._ensure_loaded(workflow_id, state)
 
             # Update status to running
             state["status"] = "running"
             self.state_manager.save_state(workflow_id, state)
 
-            # Execute tasks in topological order
-            results = self.engine.execute_workflow()
+            # Execute tasks in topological order, or concurrently as dependencies allow
+            results = self.engine.execute_workflow(
+                parallel=parallel, max_workers=max_workers, incremental=incremental, workflow_id=workflow_id,
+                timeout=timeout
+            )
 
             # Update state after execution
-            state["status"] = "completed"
+            state["status"] = self._final_status(workflow_id)
             state["results"] = results
             self.state_manager.save_state(workflow_id, state)
 
@@ -127,13 +180,115 @@ class WorkflowBuilder:
             self.state_manager.save_state(workflow_id, error_state)
             return {"error": str(e)}
 
+    async def execute_workflow_async(self, workflow_id: str, max_concurrency: Optional[int] = None,
+                                     incremental: bool = False, timeout: Optional[float] = None) -> Dict:
+        """
+        Execute a workflow by ID on the running event loop.
+        Every workflow has its own run in the engine, so concurrent calls for different
+        workflows, e.g. from the API endpoint, execute side by side on the shared workers.
+        """
+        try:
+            state = self.state_manager.load_state(workflow_id)
+            if not state:
+                raise ValueError(f"Workflow {workflow_id} not found")
+            self._ensure_loaded(workflow_id, state)
+
+            state["status"] = "running"
+            self.state_manager.save_state(workflow_id, state)
+
+            results = await self.engine.execute_workflow_async(
+                max_concurrency=max_concurrency, incremental=incremental, workflow_id=workflow_id,
+                timeout=timeout
+            )
+
+            state["status"] = self._final_status(workflow_id)
+            state["results"] = results
+            self.state_manager.save_state(workflow_id, state)
+
+            return results
+        except Exception as e:
+            error_state = {"status": "failed", "error": str(e)}
+            self.state_manager.save_state(workflow_id, error_state)
+            return {"error": str(e)}
+
+    def _final_status(self, workflow_id: str) -> str:
+        """Stored status of a workflow whose execution returned."""
+        return "stopped" if self.engine.get_run(workflow_id).status == "cancelled" else "completed"
+
+    def _ensure_loaded(self, workflow_id: str, state: Dict[str, Any], config: Optional[Dict[str, Any]] = None) -> None:
+        """
+        Make sure the engine holds the workflow, rebuilding it from `config` or, failing
+        that, from the stored state (e.g. after a restart). Passing `config` always rebuilds.
+        """
+        if config is None and workflow_id in self.engine.runs:
+            return
+        if config is not None:
+            plan = self.compile_workflow(config)
+        elif state.get("config") and self.parser.validate_workflow(state["config"]):
+            plan = compile_workflow(state["config"])
+        else:
+            raise ValueError(f"No valid configuration available to load workflow {workflow_id}")
+        self.engine.remove_run(workflow_id)
+        self._load_workflow(workflow_id, plan)
+
+    def resume_workflow(self, workflow_id: str, config: Optional[Dict[str, Any]] = None,
+                        parallel: bool = False, max_workers: Optional[int] = None) -> Dict:
+        """
+        Resume an interrupted workflow from its per-task checkpoints.
+        If the engine does not hold the workflow (e.g. after a restart), it is rebuilt from
+        `config` or, failing that, from the stored state. Live agent objects (such as an
+        LLMIntegration under "agent") are not persisted, so pass `config` for those workflows.
+        """
+        try:
+            state = self.state_manager.load_state(workflow_id)
+            if not state:
+                raise ValueError(f"Workflow {workflow_id} not found")
+
+            self._ensure_loaded(workflow_id, state, config)
+
+            state["status"] = "running"
+            self.state_manager.save_state(workflow_id, state)
+
+            results = self.engine.resume_workflow(workflow_id, parallel=parallel, max_workers=max_workers)
+
+            state["status"] = "completed"
+            state["results"] = results
+            self.state_manager.save_state(workflow_id, state)
+
+            return results
+        except Exception as e:
+            print(f"Error resuming workflow {workflow_id}: {e}")
+            return {"error": str(e)}
+
+    def update_task(self, workflow_id: str, task_id: str, config: Dict) -> bool:
+        """Update the configuration of one task, e.g. before an incremental re-run."""
+        try:
+            state = self.state_manager.load_state(workflow_id)
+            if not state:
+                raise ValueError(f"Workflow {workflow_id} not found")
+
+            self.engine.update_task(task_id, config, workflow_id=workflow_id)
+            tasks = state.get("config", {}).get("tasks", {})
+            if task_id in tasks:
+                tasks[task_id]["config"] = self._make_config_serializable(config)
+                self.state_manager.save_state(workflow_id, state)
+            return True
+        except Exception as e:
+            print(f"Error updating task {task_id}: {e}")
+            return False
+
     def stop_workflow(self, workflow_id: str) -> bool:
-        """Stop a running workflow."""
+        """
+        Stop a running workflow. Tasks that have not finished are cancelled; the ones
+        in progress are asked to stop and no longer waited for.
+        """
         try:
             state = self.state_manager.load_state(workflow_id)
             if not state:
                 raise ValueError(f"Workflow {workflow_id} not found")
 
+            if workflow_id in self.engine.runs:
+                self.engine.cancel_workflow(workflow_id, reason="stopped by user")
             if state["status"] == "running":
                 state["status"] = "stopped"
                 self.state_manager.save_state(workflow_id, state)
@@ -153,6 +308,7 @@ class WorkflowBuilder:
 
             # Remove workflow state
             os.remove(f"{self.state_manager.storage_path}/{workflow_id}.json")
+            self.engine.remove_run(workflow_id)
             return True
 
         except Exception as e:
@@ -209,7 +365,7 @@ class WorkflowBuilder:
         """Execute a task with retry logic."""
         for attempt in range(retries):
             try:
-                result = self.engine._execute_task(task_id, agent_type, config)
+                result = self.engine._execute_task(self.engine.current_run, task_id, agent_type, config)
                 if result.get("status") == "success":
                     return result
             except Exception as e:
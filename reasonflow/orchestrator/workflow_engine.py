@@ -1,141 +1,1440 @@
 import os
-from typing import Dict, List, Optional
+import asyncio
+import functools
+import inspect
+import threading
+from collections import ChainMap
+from concurrent.futures import Future, ThreadPoolExecutor, ProcessPoolExecutor, wait, FIRST_COMPLETED
+from typing import Any, Dict, Iterable, Iterator, List, Optional
 import networkx as nx
 from reasonchain.memory import SharedMemory
+from reasonflow.agents.agent_pool import AgentPool, default_agent_pool
 from reasonflow.agents.custom_agent_builder import CustomAgentBuilder
+from reasonflow.agents.custom_task_agent import run_custom_function
 from reasonflow.tasks.task_manager import TaskManager
-import re
 from reasonflow.observability.tracker_factory import TrackerFactory
+from reasonflow.observability.metrics import Metrics
+from reasonflow.orchestrator.placeholders import CompiledTemplate, compile_params, render_params
+from reasonflow.orchestrator.result_cache import TaskResultCache, fingerprint
+from reasonflow.orchestrator.state_manager import StateManager
+from reasonflow.orchestrator.scheduler import ReadyQueue, compute_critical_paths
+from reasonflow.orchestrator.rate_limiter import (
+    RateLimiter, RateLimitLease, default_rate_limiter, estimate_tokens, limit_keys
+)
+from reasonflow.orchestrator.cancellation import CancelToken, TaskCancelled
+from reasonflow.orchestrator.conditions import TRIGGER_RULES, Condition, evaluate_condition, validate_condition
+from reasonflow.orchestrator.distributed import QueueCoordinator, task_payload
+from reasonflow.orchestrator.hedging import DEFAULT_HEDGE_RATIO, HedgeBudget, HedgePolicy
+from reasonflow.orchestrator.streaming import DEFAULT_STREAM_BUFFER, gather_streams, wrap_streams
+from reasonflow.orchestrator.task_queue import TaskQueue
+from reasonflow.orchestrator.workflow_plan import WorkflowPlan
+from reasonflow.orchestrator.workflow_run import WorkflowRun
+
+@functools.lru_cache(maxsize=1024)
+def _declared_parameters(function) -> frozenset:
+    """Names of the parameters a function declares explicitly."""
+    try:
+        return frozenset(inspect.signature(function).parameters)
+    except (TypeError, ValueError):
+        return frozenset()
+
+
+def _start_thread(function, *args) -> Future:
+    """Run a call on its own daemon thread, so that it can be abandoned."""
+    future = Future()
+
+    def call():
+        try:
+            future.set_result(function(*args))
+        except BaseException as e:
+            future.set_exception(e)
+
+    threading.Thread(target=call, name="reasonflow-call", daemon=True).start()
+    return future
+
 
 class WorkflowEngine:
-    def __init__(self, task_manager=None, tracker_type="basic", tracker_config=None):
-        """Initialize WorkflowEngine with task management and tracking"""
+    DEFAULT_MAX_WORKERS = 8
+    # Pseudo-task exposing the current record of a batch run as {{input.field}}
+    MAP_INPUT_TASK = "input"
+    # Node types expanded at runtime into child tasks
+    FANOUT_TYPES = ("map", "reduce")
+    DEFAULT_REDUCE_SEPARATOR = "\n\n"
+
+    def __init__(self, task_manager=None, tracker_type="basic", tracker_config=None, max_workers: Optional[int] = None,
+                 process_workers: Optional[int] = None, cache_config: Optional[Dict] = None,
+                 state_manager: Optional[StateManager] = None, scheduling_policy: str = "critical_path",
+                 agent_pool: Optional[AgentPool] = None, rate_limiter: Optional[RateLimiter] = None,
+                 rate_limits: Optional[Dict[str, Dict]] = None, task_queue: Optional[TaskQueue] = None,
+                 hedge_ratio: float = DEFAULT_HEDGE_RATIO):
+        """
+        Initialize WorkflowEngine with task management and tracking.
+        The engine holds any number of workflows (see WorkflowRun), each with its own graph,
+        results and status; they can execute at the same time on one shared worker pool.
+        Calls without a workflow_id apply to the workflow chosen with set_workflow_context().
+        When a state_manager is given, every completed task is checkpointed so that an
+        interrupted run can continue with resume_workflow().
+        scheduling_policy decides which ready task gets a free worker first in parallel and
+        async runs: "critical_path" (from recorded task durations), "priority" or "fifo".
+        Agents are reused through agent_pool, by default the process-wide pool.
+        Calls to LLM providers and APIs wait for capacity on rate_limiter (by default the
+        process-wide limiter); rate_limits configures it, e.g.
+        {"provider:openai": {"max_concurrent": 8, "requests_per_minute": 500},
+         "model:openai/gpt-4o": {"tokens_per_minute": 30000}}.
+        With a task_queue (e.g. SQLiteTaskQueue), the engine acts as coordinator: agent tasks
+        are pushed to the queue as they become ready and executed by `reasonflow worker`
+        processes. Tasks with a live "agent" object, stream inputs or "executor": "local"
+        keep running in this process.
+        Tasks with a "hedge" config (see HedgePolicy) send a duplicate request when they run
+        slower than usual; hedge_ratio caps the share of such requests that get one.
+        """
         self.shared_memory = SharedMemory()
         self.task_manager = task_manager or TaskManager(shared_memory=self.shared_memory)
         self.tracker = TrackerFactory.create_tracker(tracker_type, tracker_config)
-        self.workflow_graph = nx.DiGraph()
+        # Task duration history for scheduling; kept on the engine, not published to shared memory
+        self.metrics = Metrics(shared_memory=None)
+        self.scheduling_policy = scheduling_policy
         self.current_state = {}
-        self.workflow_id = None
-        self.workflow_config = {}
-        self.agent_builder = CustomAgentBuilder()
-        self.task_results = {}
+        # Workflows by id; tasks added before any workflow is selected go to an unnamed run
+        self.runs: Dict[str, WorkflowRun] = {}
+        self._current = WorkflowRun()
+        self._runs_lock = threading.Lock()
+        self.agent_builder = CustomAgentBuilder(
+            agent_pool=agent_pool if agent_pool is not None else default_agent_pool()
+        )
+        self.state_manager = state_manager
+        self.max_workers = max_workers or self.DEFAULT_MAX_WORKERS
+        self.process_workers = process_workers
+        self._thread_pool = None
+        self._process_pool = None
+        self._pool_lock = threading.Lock()
+        # Result caching is opt-in: pass cache_config={} for defaults, or e.g.
+        # {"max_entries": 4096, "disk_path": ".reasonflow_cache", "default_ttl": 3600}
+        self.result_cache = TaskResultCache(**cache_config) if cache_config is not None else None
+        self.rate_limiter = rate_limiter or default_rate_limiter()
+        for key, limits in (rate_limits or {}).items():
+            self.rate_limiter.configure(key, **limits)
+        self.coordinator = QueueCoordinator(task_queue) if task_queue is not None else None
+        self.hedge_budget = HedgeBudget(hedge_ratio)
+
+    # The selected workflow, as exposed before an engine could hold several of them
+
+    @property
+    def current_run(self) -> WorkflowRun:
+        return self._current
+
+    @property
+    def workflow_id(self) -> Optional[str]:
+        return self._current.workflow_id
+
+    @property
+    def workflow_config(self) -> Dict:
+        return self._current.config
+
+    @workflow_config.setter
+    def workflow_config(self, config: Dict) -> None:
+        self._current.config = config
+
+    @property
+    def workflow_graph(self) -> nx.DiGraph:
+        return self._current.graph
+
+    @workflow_graph.setter
+    def workflow_graph(self, graph: nx.DiGraph) -> None:
+        self._current.graph = graph
+        self._current.plan = None
+
+    @property
+    def task_results(self) -> Dict:
+        return self._current.task_results
+
+    @task_results.setter
+    def task_results(self, task_results: Dict) -> None:
+        self._current.task_results = task_results
+
+    @property
+    def task_fingerprints(self) -> Dict[str, str]:
+        return self._current.task_fingerprints
+
+    @task_fingerprints.setter
+    def task_fingerprints(self, task_fingerprints: Dict[str, str]) -> None:
+        self._current.task_fingerprints = task_fingerprints
+
+    def set_workflow_context(self, workflow_id: str, config: Optional[Dict]) -> WorkflowRun:
+        """
+        Select the workflow that calls without a workflow_id apply to, creating it if the
+        engine does not hold it yet. Tasks added before any workflow was selected become
+        part of the first workflow selected.
+        """
+        with self._runs_lock:
+            run = self.runs.get(workflow_id)
+            if run is None:
+                if self._current.workflow_id is None:
+                    run = self._current
+                    run.workflow_id = workflow_id
+                else:
+                    run = WorkflowRun(workflow_id)
+                self.runs[workflow_id] = run
+            if config is not None:
+                run.config = config
+            self._current = run
+            return run
+
+    def get_run(self, workflow_id: Optional[str] = None) -> WorkflowRun:
+        """The run of a workflow held by the engine, or the selected one."""
+        if workflow_id is None:
+            return self._current
+        run = self.runs.get(workflow_id)
+        if run is None:
+            raise ValueError(f"Workflow {workflow_id} is not loaded in this engine")
+        return run
 
-    def set_workflow_context(self, workflow_id: str, config: Dict):
-        """Set workflow context before execution"""
-        self.workflow_id = workflow_id
-        self.workflow_config = config
+    def remove_run(self, workflow_id: str) -> None:
+        """Forget a workflow and its results, e.g. once it has been deleted."""
+        with self._runs_lock:
+            run = self.runs.pop(workflow_id, None)
+            if run is not None and run is self._current:
+                self._current = WorkflowRun()
 
-    def add_task(self, task_id: str, agent_type: str, config: Dict) -> None:
+    def clear_workflow(self, workflow_id: Optional[str] = None) -> None:
+        """Drop a workflow's graph and its stored results, e.g. before rebuilding it."""
+        self.get_run(workflow_id).reset()
+
+    def load_plan(self, workflow_id: str, plan: WorkflowPlan) -> WorkflowRun:
+        """
+        Load a compiled workflow plan as the given workflow. Its placeholder templates and
+        topological order are reused as they are instead of being recomputed.
+        """
+        run = self.set_workflow_context(workflow_id, plan.definition)
+        was_empty = run.graph.number_of_nodes() == 0
+        run.graph.add_nodes_from(
+            (task_id, {
+                "agent_type": plan.agent_types[position],
+                "config": plan.configs[position],
+                "priority": plan.priorities[position],
+                "params_template": plan.templates[position],
+            })
+            for position, task_id in enumerate(plan.task_ids)
+        )
+        run.graph.add_edges_from(
+            (source, target, {"condition": plan.conditions[(source, target)]})
+            if (source, target) in plan.conditions else (source, target)
+            for source, target in plan.edges
+        )
+        run.plan = plan if was_empty else None
+        return run
+
+    def add_task(self, task_id: str, agent_type: str, config: Dict, priority: int = 1,
+                 workflow_id: Optional[str] = None) -> None:
+        run = self.get_run(workflow_id)
+        run.plan = None
         try:
-            self.workflow_graph.add_node(task_id, agent_type=agent_type, config=config)
+            # Placeholders are compiled once here and rendered per run, leaving config untouched
+            run.graph.add_node(
+                task_id,
+                agent_type=agent_type,
+                config=config,
+                priority=priority,
+                params_template=compile_params(config.get("params", {}))
+            )
         except Exception as e:
             print(f"Error adding task: {str(e)}")
-            
-    def add_dependency(self, from_task: str, to_task: str) -> None:
+
+    def update_task(self, task_id: str, config: Dict, agent_type: Optional[str] = None,
+                    workflow_id: Optional[str] = None) -> None:
+        """Replace the configuration of an existing task, e.g. to tune a prompt before re-running."""
+        graph = self.get_run(workflow_id).graph
+        if task_id not in graph.nodes:
+            raise KeyError(f"Task {task_id} not found")
+        node_data = graph.nodes[task_id]
+        node_data["config"] = config
+        node_data["params_template"] = compile_params(config.get("params", {}))
+        if agent_type:
+            node_data["agent_type"] = agent_type
+
+    def add_dependency(self, from_task: str, to_task: str, workflow_id: Optional[str] = None,
+                       condition: Optional[Condition] = None) -> None:
+        """
+        Make to_task wait for from_task.
+        :param condition: Only follow the edge when from_task's result meets it, e.g.
+            {"field": "output.count", "op": "gt", "value": 0} (see conditions.py). A task
+            runs when all of its incoming edges are followed, or any one of them with
+            config["trigger_rule"] = "any"; otherwise it is skipped, as are the tasks
+            depending on it.
+        """
+        if condition is not None:
+            validate_condition(condition)
+        run = self.get_run(workflow_id)
+        run.plan = None
         try:
-            self.workflow_graph.add_edge(from_task, to_task)
+            if condition is not None:
+                run.graph.add_edge(from_task, to_task, condition=condition)
+            else:
+                run.graph.add_edge(from_task, to_task)
         except Exception as e:
             print(f"Error adding dependency: {str(e)}")
-            
+
+    def shutdown(self) -> None:
+        """Release the worker threads and the worker processes used by `executor: process` tasks."""
+        with self._pool_lock:
+            thread_pool, self._thread_pool = self._thread_pool, None
+            process_pool, self._process_pool = self._process_pool, None
+        if thread_pool is not None:
+            thread_pool.shutdown(wait=True)
+        if process_pool is not None:
+            process_pool.shutdown(wait=True)
+
+    def _get_thread_pool(self) -> ThreadPoolExecutor:
+        """Return the worker threads shared by all runs of the engine, starting them on first use."""
+        with self._pool_lock:
+            if self._thread_pool is None:
+                self._thread_pool = ThreadPoolExecutor(
+                    max_workers=self.max_workers, thread_name_prefix="reasonflow-task"
+                )
+            return self._thread_pool
+
+    def _get_process_pool(self) -> ProcessPoolExecutor:
+        """Return the persistent process pool, starting it on first use."""
+        with self._pool_lock:
+            if self._process_pool is None:
+                self._process_pool = ProcessPoolExecutor(max_workers=self.process_workers)
+            return self._process_pool
+
+    def _submit_to_process(self, task_id: str, agent_type: str, config: Dict):
+        """
+        Submit a CPU-bound custom task to the process pool. Only the function path and
+        resolved params are pickled; workers load each function module once and reuse it.
+        """
+        if agent_type != "custom_task":
+            raise ValueError(f"Task {task_id}: executor 'process' is only supported for custom_task nodes")
+        function_path = config.get("agent_config", {}).get("function_path")
+        return self._get_process_pool().submit(run_custom_function, function_path, config.get("params", {}))
+
+    def _runs_on_queue(self, config: Dict) -> bool:
+        """Whether a task is executed by a queue worker rather than in this process."""
+        return (self.coordinator is not None and config.get("executor") not in ("local", "process")
+                and "agent" not in config and not config.get("stream_inputs"))
+
+    def _submit_to_queue(self, run: WorkflowRun, task_id: str, agent_type: str, config: Dict) -> Future:
+        """Push a task with resolved params to the worker queue; workers return streamed output assembled."""
+        return self.coordinator.submit(task_payload(run.workflow_id, task_id, agent_type, config))
+
     def _format_task_output(self, task_id: str, output: Dict) -> str:
         """Format task output for use in prompts."""
         if output.get("status") == "success":
             return output.get("output", "")
         return f"Error in task {task_id}: {output.get('message', 'Unknown error')}"
 
-    def _execute_task(self, task_id: str, agent_type: str, config: Dict) -> Dict:
+    def _create_task_agent(self, task_id: str, agent_type: str, config: Dict):
+        """Get the agent that runs a task; hand it back with _release_task_agent()."""
+        agent = self.agent_builder.acquire_agent(agent_type, config)
+        if not agent:
+            raise ValueError(f"Failed to initialize agent for task {task_id}")
+        return agent
+
+    def _release_task_agent(self, agent) -> None:
+        """Return a task's agent to the pool once the task is done with it."""
+        self.agent_builder.release_agent(agent)
+
+    def _acquire_capacity(self, run: WorkflowRun, task_id: str, config: Dict) -> RateLimitLease:
+        """Wait until the task's provider, model or API has capacity for one more request."""
+        lease = self.rate_limiter.acquire(limit_keys(config), estimate_tokens(config.get("params", {})))
+        self._track_throttling(run, task_id, lease)
+        return lease
+
+    async def _acquire_capacity_async(self, run: WorkflowRun, task_id: str, config: Dict) -> RateLimitLease:
+        lease = await self.rate_limiter.acquire_async(limit_keys(config), estimate_tokens(config.get("params", {})))
+        self._track_throttling(run, task_id, lease)
+        return lease
+
+    def _track_throttling(self, run: WorkflowRun, task_id: str, lease: RateLimitLease) -> None:
+        if lease.waited > 0:
+            self.tracker.track_task(
+                task_id=task_id,
+                workflow_id=run.workflow_id,
+                event_type="throttled",
+                data={"name": task_id, "waited": lease.waited}
+            )
+
+    def _task_error(self, task_id: str, error: Exception) -> Dict:
+        """Record a task failure and build its error result."""
+        error_msg = f"Error executing task {task_id}: {str(error)}"
+        self.shared_memory.add_entry(f"{task_id}_error", error_msg)
+        return {"status": "error", "message": error_msg}
+
+    def _cancelled_result(self, run: WorkflowRun, task_id: str, reason: Optional[str]) -> Dict:
+        self.tracker.track_task(
+            task_id=task_id,
+            workflow_id=run.workflow_id,
+            event_type="cancelled",
+            data={"name": task_id, "reason": reason}
+        )
+        return {"status": "cancelled", "message": f"Task {task_id} cancelled: {reason}"}
+
+    def _task_interrupted(self, run: WorkflowRun, run_token: CancelToken, task_id: str, error: TaskCancelled) -> Dict:
+        """Result of a task stopped by cancellation of its run, or by its own timeout (an error)."""
+        if run_token.cancelled:
+            return self._cancelled_result(run, task_id, run_token.reason)
+        return self._task_error(task_id, error)
+
+    def _skip_reason(self, run: WorkflowRun, task_id: str, task_results: Dict) -> Optional[str]:
+        """Why a task should not run given its predecessors' results, or None if it should."""
+        inactive = []
+        predecessors = 0
+        for predecessor in run.graph.predecessors(task_id):
+            predecessors += 1
+            result = task_results.get(predecessor)
+            if isinstance(result, dict) and result.get("status") == "skipped":
+                inactive.append(f"{predecessor} was skipped")
+            elif not evaluate_condition(run.graph.edges[predecessor, task_id].get("condition"), result):
+                inactive.append(f"condition on {predecessor} not met")
+        if not inactive:
+            return None
+        trigger_rule = run.graph.nodes[task_id]["config"].get("trigger_rule", "all")
+        if trigger_rule not in TRIGGER_RULES:
+            raise ValueError(f"Task {task_id}: unknown trigger_rule '{trigger_rule}', expected one of {TRIGGER_RULES}")
+        if trigger_rule == "any" and len(inactive) < predecessors:
+            return None
+        return "; ".join(inactive)
+
+    def _skipped_result(self, run: WorkflowRun, task_id: str, task_results: Optional[Dict] = None) -> Optional[Dict]:
+        """
+        The result of a task on a branch that was not taken, or None if the task should run.
+        The result is stored like any other, so that dependent tasks are skipped as well.
+        """
+        shared = task_results is None
+        if shared:
+            task_results = run.task_results
+        reason = self._skip_reason(run, task_id, task_results)
+        if reason is None:
+            return None
+        self.tracker.track_task(
+            task_id=task_id,
+            workflow_id=run.workflow_id,
+            event_type="skipped",
+            data={"name": task_id, "reason": reason}
+        )
+        result = {"status": "skipped", "message": f"Task {task_id} skipped: {reason}"}
+        task_results[task_id] = result
+        if shared:
+            run.task_fingerprints.pop(task_id, None)
+        return result
+
+    def _record_cancelled(self, run: WorkflowRun, execution_order: List[str], results: Dict) -> None:
+        """Give the tasks a cancelled run did not finish a cancelled result."""
+        for task_id in execution_order:
+            if task_id not in results:
+                results[task_id] = self._cancelled_result(run, task_id, run.cancel_token.reason)
+
+    @staticmethod
+    def _cancellation_params(function, params: Dict, token: CancelToken) -> Dict:
+        """
+        Pass the task's cancel token, and its remaining time as `timeout`, to agents whose
+        execute()/aexecute() declare those parameters, so HTTP and LLM clients can give up
+        on their own instead of being abandoned.
+        """
+        declared = _declared_parameters(getattr(function, "__func__", function))
+        extra = {}
+        if "cancel_token" in declared:
+            extra["cancel_token"] = token
+        remaining = token.remaining()
+        if remaining is not None and "timeout" in declared and params.get("timeout") is None:
+            extra["timeout"] = remaining
+        return {**params, **extra} if extra else params
+
+    def _call_agent(self, token: CancelToken, function, params: Dict) -> Dict:
+        """
+        Call a synchronous agent. With a deadline, the call runs on a watched thread that
+        is abandoned once the deadline passes or the run is cancelled, so a hung provider
+        call cannot pin a worker.
+        """
+        params = self._cancellation_params(function, params, token)
+        token.raise_if_cancelled()
+        if token.deadline is None:
+            return function(**params)
+        return token.wait_for(_start_thread(lambda: function(**params)))
+
+    def _run_agent(self, run: WorkflowRun, task_id: str, agent_type: str, config: Dict, token: CancelToken) -> Dict:
+        """Call a task's agent within its rate limits, handing the agent back afterwards."""
+        agent = self._create_task_agent(task_id, agent_type, config)
+        try:
+            with self._acquire_capacity(run, task_id, config):
+                return self._call_agent(token, agent.execute, config.get("params", {}))
+        finally:
+            self._release_task_agent(agent)
+
+    def _execute_hedged(self, run: WorkflowRun, task_id: str, agent_type: str, config: Dict,
+                        token: CancelToken, policy: HedgePolicy) -> Dict:
+        """
+        Call a task's agent and, if it is still running after the policy's latency
+        percentile and the hedge budget allows, send a duplicate request. The first
+        successful response wins; the other request is cancelled.
+        """
+        task_key = self._metrics_key(run, task_id)
+        delay = policy.delay(self.metrics, task_key)
+        self.hedge_budget.record_request()
+        if delay is None:
+            return self._run_agent(run, task_id, agent_type, config, token)
+
+        cancelled = token.signal()
+        calls = {}
+        primary_token = token.child()
+        primary = _start_thread(self._run_agent, run, task_id, agent_type, config, primary_token)
+        calls[primary] = primary_token
+        remaining = token.remaining()
+        wait([primary, cancelled], timeout=delay if remaining is None else min(delay, remaining),
+             return_when=FIRST_COMPLETED)
+        if primary.done() or token.cancelled:
+            return token.wait_for(primary)
+        if not self.hedge_budget.try_acquire():
+            self.metrics.record_hedge(task_key, "denied")
+            return token.wait_for(primary)
+
+        hedge_type, hedge_config = policy.hedge_task(agent_type, config)
+        hedge_token = token.child()
+        hedge = _start_thread(self._run_agent, run, task_id, hedge_type, hedge_config, hedge_token)
+        calls[hedge] = hedge_token
+        self.metrics.record_hedge(task_key, "hedged")
+        self.tracker.track_task(
+            task_id=task_id,
+            workflow_id=run.workflow_id,
+            event_type="hedged",
+            data={"name": task_id, "after": delay, "agent_type": hedge_type}
+        )
+
+        winner, failure = None, None
+        pending = set(calls)
+        while pending and winner is None:
+            done, _ = wait(pending | {cancelled}, timeout=token.remaining(), return_when=FIRST_COMPLETED)
+            token.raise_if_cancelled()
+            for future in done & pending:
+                pending.discard(future)
+                try:
+                    outcome = future.result()
+                except TaskCancelled:
+                    raise
+                except Exception as e:
+                    failure = e
+                    continue
+                if isinstance(outcome, dict) and outcome.get("status") == "success":
+                    winner = future
+                    break
+                failure = outcome
+
+        if winner is None:
+            # Both requests failed; report the last failure
+            if isinstance(failure, Exception):
+                raise failure
+            return failure
+        for future, call_token in calls.items():
+            if future is not winner:
+                call_token.cancel("lost hedge race")
+        if winner is hedge:
+            self.metrics.record_hedge(task_key, "won")
+        return winner.result()
+
+    async def _await_cancellable(self, token: CancelToken, awaitable) -> Dict:
+        """Await an async agent call or a future, cancelling it when the run is cancelled or the deadline passes."""
+        call = asyncio.ensure_future(awaitable)
+        loop = asyncio.get_running_loop()
+        remove = token.add_callback(lambda: loop.call_soon_threadsafe(call.cancel))
+        try:
+            return await asyncio.wait_for(call, token.remaining())
+        except asyncio.TimeoutError:
+            raise TaskCancelled(token.reason or "deadline exceeded")
+        except asyncio.CancelledError:
+            if call.cancelled() and token.cancelled:
+                raise TaskCancelled(token.reason)
+            raise
+        finally:
+            remove()
+
+    def _cached_result(self, run: WorkflowRun, task_id: str, agent_type: str, config: Dict):
+        """
+        Look up a task in the result cache.
+        Tasks opt out with config["cache"] = False.
+        :return: Tuple of (cache key or None, cached result or None).
         """
-        Execute a task using its agent type and configuration.
+        # Tasks consuming streams have inputs that are not known up front
+        if self.result_cache is None or config.get("cache") is False or config.get("stream_inputs"):
+            return None, None
+        cache_key = self.result_cache.make_key(
+            agent_type, config.get("agent_config", {}), config.get("params", {}), config.get("agent")
+        )
+        result = self.result_cache.get(cache_key)
+        self.tracker.track_task(
+            task_id=task_id,
+            workflow_id=run.workflow_id,
+            event_type="cache_hit" if result is not None else "cache_miss",
+            data={"name": task_id, **self.result_cache.stats()}
+        )
+        return cache_key, result
+
+    def _cache_result(self, cache_key: Optional[str], config: Dict, result: Dict) -> None:
+        """Store a successful result; config["cache_ttl"] sets a per-task TTL in seconds."""
+        if cache_key and isinstance(result, dict) and result.get("status") == "success":
+            self.result_cache.set(cache_key, result, ttl=config.get("cache_ttl"))
+
+    def _task_fingerprint(self, run: WorkflowRun, task_id: str, agent_type: str, config: Dict) -> str:
         """
+        Fingerprint a task from its resolved inputs and the fingerprints of its upstream
+        tasks, so a change anywhere upstream marks everything downstream as dirty.
+        """
+        upstream = []
+        if task_id in run.graph.nodes:
+            upstream = [
+                (pred, run.task_fingerprints.get(pred))
+                for pred in sorted(run.graph.predecessors(task_id))
+            ]
+        return fingerprint(
+            agent_type, config.get("agent_config", {}), config.get("agent"), config.get("params", {}), upstream
+        )
+
+    def _reusable_result(self, run: WorkflowRun, task_id: str, task_fingerprint: str) -> Optional[Dict]:
+        """In incremental runs, return the stored result of a task whose inputs are unchanged."""
+        if not run.incremental or run.task_fingerprints.get(task_id) != task_fingerprint:
+            return None
+        previous = run.task_results.get(task_id)
+        if not isinstance(previous, dict) or previous.get("status") != "success":
+            return None
+        self.tracker.track_task(
+            task_id=task_id,
+            workflow_id=run.workflow_id,
+            event_type="reused",
+            data={"name": task_id, "fingerprint": task_fingerprint}
+        )
+        run.reused_tasks.add(task_id)
+        return previous
+
+    def _store_task_result(self, run: WorkflowRun, task_id: str, task_fingerprint: str, result: Dict) -> Dict:
+        """Keep a task result and its input fingerprint for downstream tasks and later runs."""
+        run.task_results[task_id] = result
+        run.task_fingerprints[task_id] = task_fingerprint
+        return result
+
+    def _metrics_key(self, run: WorkflowRun, task_id: str) -> str:
+        """Duration history key of a task, so equally named tasks of other workflows don't mix."""
+        return f"{run.workflow_id}:{task_id}" if run.workflow_id else task_id
+
+    def _record_duration(self, run: WorkflowRun, task_id: str, start_time: float, result: Dict) -> None:
+        """Record how long a task ran; the history drives critical-path scheduling."""
         try:
+            success = isinstance(result, dict) and result.get("status") == "success"
+            self.metrics.record_task_metrics(
+                self._metrics_key(run, task_id), self.metrics.end_timer(start_time), success=success
+            )
+        except Exception as e:
+            # Bookkeeping must never turn a finished task into a failed one
+            print(f"Error recording metrics for task {task_id}: {str(e)}")
+
+    def _start_streams(self, run: WorkflowRun, task_id: str, config: Dict, result: Dict, loop=None):
+        """
+        Start pumping the streaming fields (iterators or async iterators) of a result.
+        :return: Future resolving to the assembled result, or None for regular results.
+        """
+        streams = wrap_streams(result, config.get("stream_buffer", DEFAULT_STREAM_BUFFER))
+        if not streams:
+            return None
+        for stream in streams.values():
+            stream.start(loop)
+        run.task_streams[task_id] = streams
+        completion = gather_streams(result, streams)
+        run.stream_completions[task_id] = completion
+        return completion
+
+    def _finish_result(self, run: WorkflowRun, task_id: str, start_time: float, cache_key: Optional[str],
+                       config: Dict, result: Dict, loop=None) -> None:
+        """Record duration and cache a fresh result, once any streamed output is complete."""
+        completion = self._start_streams(run, task_id, config, result, loop)
+        if completion is None:
+            self._record_duration(run, task_id, start_time, result)
+            self._cache_result(cache_key, config, result)
+            return
+
+        def on_complete(future):
+            self._record_duration(run, task_id, start_time, future.result())
+            self._cache_result(cache_key, config, future.result())
+
+        completion.add_done_callback(on_complete)
+
+    def _execute_task(self, run: WorkflowRun, task_id: str, agent_type: str, config: Dict) -> Dict:
+        """
+        Execute a task of a workflow run using its agent type and configuration.
+        config["timeout"] limits the task to that many seconds; config["hedge"] enables
+        hedged requests (see HedgePolicy).
+        """
+        run_token = run.cancel_token
+        token = run_token.child(config.get("timeout"))
+        try:
+            if agent_type in self.FANOUT_TYPES:
+                return self._execute_fanout_task(run, task_id, agent_type, config)
             # Resolve placeholders in config before execution
-            #print("Before Resolving config",config)
-            config = self._resolve_placeholders(task_id, config)
-            #print(f"Resolved config for task {task_id}: {config}")
-            # Create and execute the agent
-            agent = self.agent_builder.create_agent(agent_type, config)
-            if not agent:
-                raise ValueError(f"Failed to initialize agent for task {task_id}")
+            config = self._resolve_placeholders(run, task_id, config)
+            task_fingerprint = self._task_fingerprint(run, task_id, agent_type, config)
+            result = self._reusable_result(run, task_id, task_fingerprint)
+            if result is not None:
+                return result
 
-            result = agent.execute(**config.get("params", {}))
+            cache_key, result = self._cached_result(run, task_id, agent_type, config)
+            if result is None:
+                token.raise_if_cancelled()
+                start_time = self.metrics.start_timer()
+                if config.get("executor") == "process":
+                    # CPU-bound custom functions run outside the GIL in a worker process
+                    result = token.wait_for(self._submit_to_process(task_id, agent_type, config))
+                elif self._runs_on_queue(config):
+                    # Executed by a worker process, possibly on another machine
+                    with self._acquire_capacity(run, task_id, config):
+                        result = token.wait_for(self._submit_to_queue(run, task_id, agent_type, config))
+                else:
+                    # Create and execute the agent, hedging slow requests when the task opts in
+                    policy = HedgePolicy.from_config(config.get("hedge"))
+                    if policy is not None:
+                        result = self._execute_hedged(run, task_id, agent_type, config, token, policy)
+                    else:
+                        result = self._run_agent(run, task_id, agent_type, config, token)
+                # A run cancelled meanwhile has moved on; don't store what it no longer waits for
+                run_token.raise_if_cancelled()
+                self._finish_result(run, task_id, start_time, cache_key, config, result)
 
             # Store task result for future use
-            self.task_results[task_id] = result
-            return result
+            return self._store_task_result(run, task_id, task_fingerprint, result)
+        except TaskCancelled as e:
+            return self._task_interrupted(run, run_token, task_id, e)
+        except Exception as e:
+            return self._task_error(task_id, e)
+
+    async def _execute_task_async(self, run: WorkflowRun, task_id: str, agent_type: str, config: Dict,
+                                  executor=None) -> Dict:
+        """
+        Execute a task without blocking the event loop. Agents implementing `aexecute()`
+        are awaited directly; synchronous agents run on the given executor.
+        """
+        loop = asyncio.get_running_loop()
+        if agent_type in self.FANOUT_TYPES or config.get("hedge"):
+            # Children and hedged requests run on their own threads; keep waiting on them off the event loop
+            return await loop.run_in_executor(executor, self._execute_task, run, task_id, agent_type, config)
+        run_token = run.cancel_token
+        token = run_token.child(config.get("timeout"))
+        try:
+            if config.get("stream_inputs"):
+                # Rendering may wait on upstream streams, keep that off the event loop
+                config = await loop.run_in_executor(executor, self._resolve_placeholders, run, task_id, config)
+            else:
+                config = self._resolve_placeholders(run, task_id, config)
+            task_fingerprint = self._task_fingerprint(run, task_id, agent_type, config)
+            result = self._reusable_result(run, task_id, task_fingerprint)
+            if result is not None:
+                return result
+
+            cache_key, result = self._cached_result(run, task_id, agent_type, config)
+            if result is None:
+                token.raise_if_cancelled()
+                start_time = self.metrics.start_timer()
+                if config.get("executor") == "process":
+                    future = self._submit_to_process(task_id, agent_type, config)
+                    result = await self._await_cancellable(token, asyncio.wrap_future(future))
+                elif self._runs_on_queue(config):
+                    async with await self._acquire_capacity_async(run, task_id, config):
+                        future = self._submit_to_queue(run, task_id, agent_type, config)
+                        result = await self._await_cancellable(token, asyncio.wrap_future(future))
+                else:
+                    agent = await loop.run_in_executor(
+                        executor, self._create_task_agent, task_id, agent_type, config
+                    )
+                    params = config.get("params", {})
+                    try:
+                        async with await self._acquire_capacity_async(run, task_id, config):
+                            if self.agent_builder.supports_async(agent):
+                                params = self._cancellation_params(agent.aexecute, params, token)
+                                result = await self._await_cancellable(token, agent.aexecute(**params))
+                            else:
+                                result = await loop.run_in_executor(
+                                    executor, self._call_agent, token, agent.execute, params
+                                )
+                    finally:
+                        self._release_task_agent(agent)
+                run_token.raise_if_cancelled()
+                self._finish_result(run, task_id, start_time, cache_key, config, result, loop)
+
+            return self._store_task_result(run, task_id, task_fingerprint, result)
+        except TaskCancelled as e:
+            return self._task_interrupted(run, run_token, task_id, e)
         except Exception as e:
-            error_msg = f"Error executing task {task_id}: {str(e)}"
-            self.shared_memory.add_entry(f"{task_id}_error", error_msg)
-            return {"status": "error", "message": error_msg}
-            
-    def _resolve_placeholders(self, task_id: str, config: Dict) -> Dict:
+            return self._task_error(task_id, e)
+
+    def _resolve_placeholders(self, run: WorkflowRun, task_id: str, config: Dict) -> Dict:
         """
         Resolve placeholders in task parameters using the outputs of preceding tasks.
+        Returns a new config with freshly rendered params; the given config is not modified.
         """
-        #print(f"Resolving placeholders for task {task_id}")
-        #print(f"Params before resolution: {config.get('params', {})}")
-        #print(f"Available task results: {self.task_results}")
+        node_data = run.graph.nodes.get(task_id)
+        if node_data is not None and node_data.get("config") is config:
+            template = node_data["params_template"]
+        else:
+            template = compile_params(config.get("params", {}))
 
-        params = config.get("params", {})
-        for key, value in params.items():
-            if not isinstance(value, str):
-                print(f"Skipping placeholder resolution for key '{key}': Value is not a string")
-                continue
+        resolved = dict(config)
+        if config.get("stream_inputs"):
+            resolved["params"] = self._render_stream_params(run, template)
+        else:
+            resolved["params"] = render_params(template, run.task_results)
+        return resolved
 
-            #print(f"Processing key '{key}' with value: {value}")
-            for match in re.finditer(r'\{\{([\w\-\.]+)\.([\w\-\.]+)\}\}', value):
-                ref_task_id, field = match.groups()
-                #print(f"Found placeholder: ref_task_id={ref_task_id}, field={field}")
-                
-                if ref_task_id in self.task_results:
-                    if field in self.task_results[ref_task_id]:
-                        field_value = self.task_results[ref_task_id][field]
-                 #       print(f"Resolving placeholder '{{{{{ref_task_id}.{field}}}}}' with value: {field_value}")
-                        params[key] = value.replace(match.group(0), str(field_value))
-                    else:
-                        #print(f"Warning: Field '{field}' not found in results of task {ref_task_id}")
-                        params[key] = value.replace(match.group(0), "[UNRESOLVED]")
-                else:
-                    #print(f"Warning: Task ID '{ref_task_id}' not found in task results")
-                    params[key] = value.replace(match.group(0), "[UNRESOLVED]")
+    def _render_stream_params(self, run: WorkflowRun, template: Dict) -> Dict:
+        """
+        Render params for a task with "stream_inputs": a param that is exactly one
+        placeholder for a streamed field receives an iterator over its chunks (also usable
+        with `async for`) and can be consumed while the upstream task is still producing.
+        """
+        params = {}
+        for key, value in template.items():
+            reference = value.single_reference if isinstance(value, CompiledTemplate) else None
+            stream = run.task_streams.get(reference[0], {}).get(reference[1]) if reference else None
+            if stream is not None:
+                params[key] = stream.subscribe()
+            elif isinstance(value, CompiledTemplate):
+                params[key] = value.render(run.task_results)
+            else:
+                params[key] = value
+        return params
+
+    def execute_workflow(self, parallel: bool = False, max_workers: Optional[int] = None,
+                         incremental: bool = False, scheduling_policy: Optional[str] = None,
+                         workflow_id: Optional[str] = None, timeout: Optional[float] = None) -> Dict:
+        """
+        Execute all tasks of a workflow. The run can be stopped with cancel_workflow().
+        :param parallel: Start each task as soon as its predecessors finish instead of
+                         running the topological order one task at a time.
+        :param max_workers: Tasks of this run in flight at once in parallel mode (defaults to
+                            the engine setting); the worker threads are shared by all runs.
+        :param incremental: Reuse stored results of tasks whose inputs and upstream results
+                            are unchanged since the previous run; only dirty tasks execute.
+        :param scheduling_policy: Override the engine's scheduling policy for this run.
+        :param workflow_id: Workflow to run (defaults to the selected one). Different
+                            workflows can be executed concurrently from several threads.
+        :param timeout: Seconds after which the run is cancelled (defaults to the "timeout"
+                        of the workflow definition, if any).
+        """
+        run = self.get_run(workflow_id)
+        return self._run_workflow(
+            run, parallel, max_workers, scheduling_policy, incremental=incremental, timeout=timeout
+        )
 
-        #print(f"Params after resolution: {params}")
-        config["params"] = params
-        return config
+    def cancel_workflow(self, workflow_id: Optional[str] = None, reason: str = "cancelled by user") -> bool:
+        """
+        Cancel the execution of a workflow. No further tasks are dispatched; in-flight tasks
+        are interrupted where possible (async agents, calls with a deadline, agents checking
+        their cancel_token) and otherwise abandoned. Unfinished tasks get a "cancelled" result.
+        :return: Whether the workflow was running.
+        """
+        return self.get_run(workflow_id).cancel(reason)
 
+    def resume_workflow(self, workflow_id: Optional[str] = None, parallel: bool = False,
+                        max_workers: Optional[int] = None, timeout: Optional[float] = None) -> Dict:
+        """
+        Continue an interrupted run from its checkpoints. Tasks that completed before the
+        interruption are restored and skipped; execution continues from the frontier.
+        A restored task only re-runs if its inputs changed since it was checkpointed.
+        """
+        if self.state_manager is None:
+            raise ValueError("Resuming requires a WorkflowEngine created with a state_manager")
+        run = self.runs.get(workflow_id) if workflow_id else self._current
+        if run is None:
+            run = self.set_workflow_context(workflow_id, None)
 
+        checkpoints = self.state_manager.load_checkpoints(run.workflow_id)
+        return self._run_workflow(run, parallel, max_workers, checkpoints=checkpoints, timeout=timeout)
 
-    def execute_workflow(self) -> Dict:
-        try:
+    def _begin_run(self, run: WorkflowRun, incremental: bool, timeout: Optional[float]) -> None:
+        if timeout is None:
+            timeout = run.config.get("timeout") if isinstance(run.config, dict) else None
+        run.begin(incremental, timeout)
+
+    def _start_run(self, run: WorkflowRun, checkpoints: Optional[Dict] = None) -> None:
+        """Restore the checkpoints of a resumed run or clear those of a fresh one, and track the start."""
+        if checkpoints is not None:
+            for task_id, checkpoint in checkpoints.items():
+                if task_id in run.graph.nodes:
+                    run.task_results[task_id] = checkpoint["result"]
+                    run.task_fingerprints[task_id] = checkpoint["fingerprint"]
+                    run.restored_tasks.add(task_id)
             self.tracker.track_workflow(
-                workflow_id=self.workflow_id,
-                event_type="started",
-                data={"config": self.workflow_config}
+                workflow_id=run.workflow_id,
+                event_type="resumed",
+                data={"completed_tasks": sorted(run.restored_tasks)}
             )
-            execution_order = list(nx.topological_sort(self.workflow_graph))
-            print(f"Execution order: {execution_order}")  # Debugging the task order
+        elif self.state_manager and run.workflow_id:
+            # A fresh run starts a new set of checkpoints
+            self.state_manager.clear_checkpoints(run.workflow_id)
+        self.tracker.track_workflow(
+            workflow_id=run.workflow_id,
+            event_type="started",
+            data={"config": run.config}
+        )
 
-            results = {}
+    def _run_workflow(self, run: WorkflowRun, parallel: bool, max_workers: Optional[int],
+                      scheduling_policy: Optional[str] = None, incremental: bool = False,
+                      checkpoints: Optional[Dict] = None, timeout: Optional[float] = None) -> Dict:
+        # Restored tasks are skipped through the incremental fingerprint check
+        self._begin_run(run, incremental or checkpoints is not None, timeout)
+        try:
+            self._start_run(run, checkpoints)
+            execution_order = run.execution_order()
+            print(f"Execution order: {execution_order}")  # Debugging the task order
 
-            for task_id in execution_order:
-                node_data = self.workflow_graph.nodes[task_id]
-                agent_type = node_data['agent_type']
-                config = node_data['config']
-                result = self._execute_task(task_id, agent_type, config)
-                results[task_id] = result
-                if isinstance(self.shared_memory, SharedMemory):
-                    self.shared_memory.add_entry(task_id, result)
+            if parallel:
+                results = self._execute_parallel(
+                    run, execution_order, max_workers or self.max_workers, scheduling_policy
+                )
+            else:
+                results = self._execute_serial(run, execution_order)
+            return self._finish_run(run, execution_order, results)
+        except Exception as e:
+            run.finish("failed")
+            self.tracker.track_workflow(
+                workflow_id=run.workflow_id,
+                event_type="failed",
+                data={"error": str(e)}
+            )
+            return {"status": "error", "message": str(e)}
 
+    def _finish_run(self, run: WorkflowRun, execution_order: List[str], results: Dict) -> Dict:
+        """Close a run that went through its tasks, or stopped because it was cancelled."""
+        if run.cancel_token.cancelled:
+            self._record_cancelled(run, execution_order, results)
+            reason = run.cancel_token.reason
+            run.finish("cancelled")
             self.tracker.track_workflow(
-                workflow_id=self.workflow_id,
+                workflow_id=run.workflow_id,
+                event_type="cancelled",
+                data={"reason": reason, **self._completion_data(results)}
+            )
+        else:
+            run.finish("completed")
+            self.tracker.track_workflow(
+                workflow_id=run.workflow_id,
                 event_type="completed",
-                data={"results": results}
+                data=self._completion_data(results)
             )
-            return results
+        return {task_id: results[task_id] for task_id in execution_order if task_id in results}
+
+    def _completion_data(self, results: Dict) -> Dict:
+        """Build the tracker payload of a completed workflow."""
+        data = {"results": results}
+        if self.result_cache is not None:
+            data["cache"] = self.result_cache.stats()
+        return data
+
+    def _record_result(self, run: WorkflowRun, task_id: str, result: Dict, results: Dict) -> None:
+        """Store a finished task result for the current run and checkpoint it."""
+        results[task_id] = result
+        if isinstance(self.shared_memory, SharedMemory):
+            self.shared_memory.add_entry(task_id, result)
+        # A restored task that was reused is already in the checkpoint file
+        already_checkpointed = task_id in run.restored_tasks and task_id in run.reused_tasks
+        if (self.state_manager and run.workflow_id and not already_checkpointed
+                and isinstance(result, dict) and result.get("status") == "success"):
+            self.state_manager.save_checkpoint(
+                run.workflow_id, task_id, result, run.task_fingerprints.get(task_id)
+            )
+
+    def _run_node(self, run: WorkflowRun, task_id: str) -> Dict:
+        """Execute a graph node with its stored agent type and configuration."""
+        node_data = run.graph.nodes[task_id]
+        return self._execute_task(run, task_id, node_data['agent_type'], node_data['config'])
+
+    def _execute_serial(self, run: WorkflowRun, execution_order: List[str]) -> Dict:
+        """Run tasks one at a time in topological order."""
+        results = {}
+        token = run.cancel_token
+        for task_id in execution_order:
+            if token.cancelled:
+                break
+            skipped = self._skipped_result(run, task_id)
+            if skipped is not None:
+                self._record_result(run, task_id, skipped, results)
+                continue
+            result = self._run_node(run, task_id)
+            completion = run.stream_completions.pop(task_id, None)
+            if completion is not None:
+                try:
+                    result = token.wait_for(completion)
+                except TaskCancelled:
+                    break
+            self._record_result(run, task_id, result, results)
+        return results
+
+    def _release_successors(self, run: WorkflowRun, task_id: str, remaining: Dict[str, int], ready: ReadyQueue,
+                            stream_phase: Optional[str] = None) -> None:
+        """
+        Count a finished predecessor for each successor and queue the ones that became ready.
+        :param stream_phase: "started" when a streaming task returned, which only releases
+            successors with "stream_inputs"; "finished" once its streams are complete, which
+            releases the others. None releases every successor.
+        """
+        for successor in run.graph.successors(task_id):
+            streams_inputs = bool(run.graph.nodes[successor]["config"].get("stream_inputs"))
+            if (stream_phase == "started" and not streams_inputs) or (stream_phase == "finished" and streams_inputs):
+                continue
+            remaining[successor] -= 1
+            if remaining[successor] == 0:
+                ready.push(successor)
+
+    def _ready_queue(self, run: WorkflowRun, execution_order: List[str],
+                     scheduling_policy: Optional[str] = None) -> ReadyQueue:
+        """Build the ready queue of a run from static priorities and recorded task durations."""
+        policy = scheduling_policy or self.scheduling_policy
+        priorities = {task_id: run.graph.nodes[task_id].get("priority", 1) for task_id in execution_order}
+        critical_paths = None
+        if policy != "fifo":
+            critical_paths = compute_critical_paths(
+                execution_order,
+                run.graph.successors,
+                {
+                    task_id: self.metrics.get_average_duration(self._metrics_key(run, task_id))
+                    for task_id in execution_order
+                }
+            )
+        return ReadyQueue(policy, priorities, critical_paths)
+
+    def _execute_parallel(self, run: WorkflowRun, execution_order: List[str], max_workers: int,
+                          scheduling_policy: Optional[str] = None) -> Dict:
+        """
+        Run tasks on the engine's worker pool, dispatching each task once all of its
+        predecessors have finished. Results are returned in topological order, as in serial mode.
+        """
+        results = {}
+        remaining = {task_id: run.graph.in_degree(task_id) for task_id in execution_order}
+        ready = self._ready_queue(run, execution_order, scheduling_policy)
+        for task_id in execution_order:
+            if remaining[task_id] == 0:
+                ready.push(task_id)
+        in_flight = {}
+        # Tasks whose agent returned but whose streamed output is still being produced;
+        # they do not occupy a worker
+        streaming = {}
+
+        executor = self._get_thread_pool()
+        token = run.cancel_token
+        cancelled = token.signal()
+        # On cancellation nothing more is dispatched and in-flight tasks are no longer waited for
+        while (ready or in_flight or streaming) and not token.cancelled:
+            # Only hand the pool as many tasks as this run may have in flight, so that
+            # dispatch order stays under our control rather than the executor's queue.
+            while ready and len(in_flight) < max_workers:
+                task_id = ready.pop()
+                skipped = self._skipped_result(run, task_id)
+                if skipped is not None:
+                    # Nothing to run; its successors are released (and most likely skipped) right away
+                    self._record_result(run, task_id, skipped, results)
+                    self._release_successors(run, task_id, remaining, ready)
+                    continue
+                in_flight[executor.submit(self._run_node, run, task_id)] = task_id
+
+            done, _ = wait(
+                list(in_flight) + list(streaming) + [cancelled], timeout=token.remaining(), return_when=FIRST_COMPLETED
+            )
+            for future in done:
+                if future is cancelled:
+                    continue
+                if future in streaming:
+                    task_id = streaming.pop(future)
+                    self._record_result(run, task_id, future.result(), results)
+                    self._release_successors(run, task_id, remaining, ready, "finished")
+                    continue
+
+                task_id = in_flight.pop(future)
+                result = future.result()
+                completion = run.stream_completions.pop(task_id, None)
+                if completion is not None:
+                    streaming[completion] = task_id
+                    self._release_successors(run, task_id, remaining, ready, "started")
+                    continue
+                self._record_result(run, task_id, result, results)
+                self._release_successors(run, task_id, remaining, ready)
+
+        return {task_id: results[task_id] for task_id in execution_order if task_id in results}
+
+    def map_inputs(self, inputs: Iterable[Any], concurrency: Optional[int] = None,
+                   workflow_id: Optional[str] = None) -> Iterator[Dict]:
+        """
+        Run a workflow once per input record and yield each record's outcome as soon as
+        it finishes (not in input order). The graph is ordered once and every task's agent
+        is created once and shared by all records. Records are read lazily from `inputs`,
+        so it may be a generator over a large data set.
+        Inside task params a record is available as {{input.field}}; records that are not
+        dicts are exposed as {{input.value}}.
+        :param concurrency: Records in flight at once (defaults to the engine's max_workers).
+        :param workflow_id: Workflow to run (defaults to the selected one).
+        :return: Iterator of dicts with index, input, status, results and running progress
+                 counts (completed, succeeded, failed).
+        """
+        run = self.get_run(workflow_id)
+        if self.MAP_INPUT_TASK in run.graph.nodes:
+            raise ValueError(f"Task id '{self.MAP_INPUT_TASK}' is reserved for the input record of a batch run")
+        concurrency = concurrency or self.max_workers
+        execution_order = run.execution_order()
+        agents = self._create_shared_agents(run, execution_order)
+        progress = {"completed": 0, "succeeded": 0, "failed": 0}
+
+        self.tracker.track_workflow(
+            workflow_id=run.workflow_id,
+            event_type="started",
+            data={"config": run.config, "batch": True}
+        )
+        records = enumerate(inputs)
+        in_flight = {}
+        exhausted = False
+        try:
+            with ThreadPoolExecutor(max_workers=concurrency, thread_name_prefix="reasonflow-record") as executor:
+                while True:
+                    while not exhausted and len(in_flight) < concurrency:
+                        try:
+                            index, record = next(records)
+                        except StopIteration:
+                            exhausted = True
+                            break
+                        future = executor.submit(self._run_record, run, execution_order, record, agents)
+                        in_flight[future] = (index, record)
+                    if not in_flight:
+                        break
+
+                    done, _ = wait(in_flight, return_when=FIRST_COMPLETED)
+                    for future in done:
+                        index, record = in_flight.pop(future)
+                        results = future.result()
+                        succeeded = all(
+                            # Tasks on branches that were not taken don't fail the record
+                            isinstance(result, dict) and result.get("status") in ("success", "skipped")
+                            for result in results.values()
+                        )
+                        progress["completed"] += 1
+                        progress["succeeded" if succeeded else "failed"] += 1
+                        yield {
+                            "index": index,
+                            "input": record,
+                            "status": "success" if succeeded else "error",
+                            "results": results,
+                            "progress": dict(progress),
+                        }
+        finally:
+            for agent in agents.values():
+                if not isinstance(agent, Exception):
+                    self._release_task_agent(agent)
+
+        self.tracker.track_workflow(
+            workflow_id=run.workflow_id,
+            event_type="completed",
+            data={"batch": True, **progress}
+        )
+
+    def _create_shared_agents(self, run: WorkflowRun, execution_order: List[str]) -> Dict[str, Any]:
+        """
+        Create one agent per task for a batch run. A task whose agent cannot be created
+        keeps the error, so that it fails per record rather than failing the whole batch.
+        """
+        agents = {}
+        for task_id in execution_order:
+            node_data = run.graph.nodes[task_id]
+            if (node_data["config"].get("executor") == "process" or node_data["agent_type"] in self.FANOUT_TYPES
+                    or self._runs_on_queue(node_data["config"])):
+                continue
+            try:
+                agents[task_id] = self._create_task_agent(task_id, node_data["agent_type"], node_data["config"])
+            except Exception as e:
+                agents[task_id] = e
+        return agents
+
+    def _run_record(self, run: WorkflowRun, execution_order: List[str], record: Any, agents: Dict[str, Any]) -> Dict:
+        """Run every task of the workflow for one batch record, keeping its results apart."""
+        task_results = {self.MAP_INPUT_TASK: record if isinstance(record, dict) else {"value": record}}
+        results = {}
+        for task_id in execution_order:
+            result = self._skipped_result(run, task_id, task_results)
+            if result is None:
+                result = self._execute_record_task(run, task_id, task_results, agents.get(task_id))
+            task_results[task_id] = result
+            results[task_id] = result
+        return results
+
+    def _execute_record_task(self, run: WorkflowRun, task_id: str, task_results: Dict, agent: Any) -> Dict:
+        """Execute one task of a batch record against the record's own upstream results."""
+        node_data = run.graph.nodes[task_id]
+        if isinstance(agent, Exception):
+            return self._task_error(task_id, agent)
+        return self._execute_detached(
+            run, task_id, node_data["agent_type"], node_data["config"], node_data["params_template"],
+            task_results, agent
+        )
+
+    def _execute_detached(self, run: WorkflowRun, task_id: str, agent_type: str, config: Dict,
+                          params_template: Dict, task_results: Dict, agent: Any = None) -> Dict:
+        """
+        Execute a task against the given upstream results instead of the run's shared
+        task_results, as batch records and the children of map/reduce nodes do.
+        """
+        run_token = run.cancel_token
+        token = run_token.child(config.get("timeout"))
+        try:
+            if agent_type in self.FANOUT_TYPES:
+                return self._execute_fanout(run, task_id, agent_type, config, task_results)
+            config = dict(config)
+            config["params"] = render_params(params_template, task_results)
+
+            cache_key, result = self._cached_result(run, task_id, agent_type, config)
+            if result is not None:
+                return result
+            token.raise_if_cancelled()
+            start_time = self.metrics.start_timer()
+            if config.get("executor") == "process":
+                result = token.wait_for(self._submit_to_process(task_id, agent_type, config))
+            elif self._runs_on_queue(config):
+                with self._acquire_capacity(run, task_id, config):
+                    result = token.wait_for(self._submit_to_queue(run, task_id, agent_type, config))
+            elif agent is not None:
+                with self._acquire_capacity(run, task_id, config):
+                    result = self._call_agent(token, agent.execute, config["params"])
+            else:
+                agent = self._create_task_agent(task_id, agent_type, config)
+                try:
+                    with self._acquire_capacity(run, task_id, config):
+                        result = self._call_agent(token, agent.execute, config["params"])
+                finally:
+                    self._release_task_agent(agent)
+            # Downstream tasks of the same record run right after, so streams are assembled here
+            streams = wrap_streams(result, config.get("stream_buffer", DEFAULT_STREAM_BUFFER))
+            if streams:
+                for stream in streams.values():
+                    stream.start()
+                result = gather_streams(result, streams).result()
+            self._record_duration(run, task_id, start_time, result)
+            self._cache_result(cache_key, config, result)
+            return result
+        except TaskCancelled as e:
+            return self._task_interrupted(run, run_token, task_id, e)
+        except Exception as e:
+            return self._task_error(task_id, e)
+
+    def _execute_fanout_task(self, run: WorkflowRun, task_id: str, agent_type: str, config: Dict) -> Dict:
+        """Run a map or reduce node of the workflow graph against the run's results."""
+        task_fingerprint = fingerprint(self._task_fingerprint(run, task_id, agent_type, config), config)
+        result = self._reusable_result(run, task_id, task_fingerprint)
+        if result is None:
+            start_time = self.metrics.start_timer()
+            result = self._execute_fanout(run, task_id, agent_type, config, run.task_results)
+            self._record_duration(run, task_id, start_time, result)
+        return self._store_task_result(run, task_id, task_fingerprint, result)
+
+    def _fanout_input(self, task_id: str, config: Dict, task_results: Dict) -> List[Any]:
+        """Resolve the "over" reference of a map or reduce node to the upstream list."""
+        over = config.get("over")
+        reference = CompiledTemplate(over).single_reference if isinstance(over, str) else None
+        if reference is None:
+            raise ValueError(f"Task {task_id}: 'over' must be a single placeholder such as {{{{task.field}}}}")
+        upstream = task_results.get(reference[0])
+        if not isinstance(upstream, dict) or reference[1] not in upstream:
+            raise ValueError(f"Task {task_id}: '{over}' did not resolve to an upstream result")
+        items = upstream[reference[1]]
+        if not isinstance(items, (list, tuple)):
+            raise ValueError(f"Task {task_id}: '{over}' is a {type(items).__name__}, not a list")
+        return list(items)
+
+    def _run_children(self, run: WorkflowRun, task_id: str, child_config: Dict, child_inputs: List[Dict],
+                      task_results: Dict, max_concurrency: Optional[int], child_ids: List[str]) -> List[Dict]:
+        """
+        Run one child task per entry of `child_inputs` (pseudo-results made available to the
+        child's placeholders), at most `max_concurrency` at a time. Every child is tracked
+        as a task of its own. Results are returned in input order.
+        """
+        agent_type = child_config.get("type")
+        config = child_config.get("config", {})
+        params_template = compile_params(config.get("params", {}))
+        def run_child(child_id, child_input):
+            self.tracker.track_task(
+                task_id=child_id, workflow_id=run.workflow_id, event_type="started",
+                data={"name": child_id, "parent": task_id}
+            )
+            result = self._execute_detached(
+                run, child_id, agent_type, config, params_template, ChainMap(child_input, task_results), agent
+            )
+            succeeded = isinstance(result, dict) and result.get("status") == "success"
+            self.tracker.track_task(
+                task_id=child_id, workflow_id=run.workflow_id, event_type="completed" if succeeded else "failed",
+                data={"name": child_id, "parent": task_id, "result": result}
+            )
+            return result
+
+        if not child_inputs:
+            return []
+        # Children of one node share an agent, unless they run in the process pool or on workers
+        agent = None
+        if (agent_type not in self.FANOUT_TYPES and config.get("executor") != "process"
+                and not self._runs_on_queue(config)):
+            agent = self._create_task_agent(task_id, agent_type, config)
+        workers = min(max_concurrency or self.max_workers, len(child_inputs))
+        try:
+            with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="reasonflow-child") as executor:
+                return list(executor.map(run_child, child_ids, child_inputs))
+        finally:
+            if agent is not None:
+                self._release_task_agent(agent)
+
+    def _execute_fanout(self, run: WorkflowRun, task_id: str, agent_type: str, config: Dict,
+                        task_results: Dict) -> Dict:
+        """
+        Expand a map or reduce node at runtime.
+
+        map: {"over": "{{task.list_field}}", "task": {"type": ..., "config": ...},
+              "max_concurrency": N} runs the task once per list element, with the element
+              available as {{item.value}} (and its fields, for dicts) and {{item.index}}.
+              The result lists the children's outputs in order under "output".
+        reduce: {"over": "{{task.list_field}}", "separator": "\n\n"} joins the elements into
+              one "output". With a "task", the joined text is passed to it as {{items.output}}
+              (and the element count as {{items.count}}); with "batch_size" as well, elements
+              are reduced in batches, up to "max_concurrency" at a time, until one remains.
+        """
+        items = self._fanout_input(task_id, config, task_results)
+        if agent_type == "map":
+            return self._execute_map(run, task_id, config, items, task_results)
+        return self._execute_reduce(run, task_id, config, items, task_results)
+
+    def _execute_map(self, run: WorkflowRun, task_id: str, config: Dict, items: List[Any], task_results: Dict) -> Dict:
+        child_inputs = [
+            {"item": {**(item if isinstance(item, dict) else {}), "value": item, "index": index}}
+            for index, item in enumerate(items)
+        ]
+        child_ids = [f"{task_id}[{index}]" for index in range(len(items))]
+        results = self._run_children(
+            run, task_id, config.get("task", {}), child_inputs, task_results, config.get("max_concurrency"), child_ids
+        )
+        failed = sum(1 for result in results if not (isinstance(result, dict) and result.get("status") == "success"))
+        output = {
+            "status": "success" if not failed else "error",
+            "output": [result.get("output") if isinstance(result, dict) else None for result in results],
+            "results": results,
+            "count": len(results),
+            "failed": failed,
+        }
+        if failed:
+            output["message"] = f"{failed} of {len(results)} items of map task {task_id} failed"
+        return output
+
+    def _execute_reduce(self, run: WorkflowRun, task_id: str, config: Dict, items: List[Any],
+                        task_results: Dict) -> Dict:
+        separator = config.get("separator", self.DEFAULT_REDUCE_SEPARATOR)
+        child_config = config.get("task")
+        if not child_config:
+            return {"status": "success", "output": separator.join(str(item) for item in items), "count": len(items)}
+
+        batch_size = config.get("batch_size") or len(items) or 1
+        level = 0
+        while True:
+            batches = [items[start:start + batch_size] for start in range(0, len(items), batch_size)] or [[]]
+            child_inputs = [
+                {"items": {"output": separator.join(str(item) for item in batch), "list": batch, "count": len(batch)}}
+                for batch in batches
+            ]
+            child_ids = [f"{task_id}[{level}.{index}]" for index in range(len(batches))]
+            results = self._run_children(
+                run, task_id, child_config, child_inputs, task_results, config.get("max_concurrency"), child_ids
+            )
+            for result in results:
+                if not (isinstance(result, dict) and result.get("status") == "success"):
+                    return result
+            if len(results) == 1:
+                return results[0]
+            items = [result.get("output") for result in results]
+            level += 1
+
+    async def execute_workflow_async(self, max_concurrency: Optional[int] = None, incremental: bool = False,
+                                     scheduling_policy: Optional[str] = None,
+                                     workflow_id: Optional[str] = None, timeout: Optional[float] = None) -> Dict:
+        """
+        Execute a workflow on the running event loop. Each task starts as soon as its
+        predecessors finish, so a single loop can drive many in-flight tasks, of one or
+        of several workflows at once.
+        :param max_concurrency: Optional cap on concurrently running tasks (unbounded by default).
+        :param incremental: Only execute tasks whose inputs changed since the previous run.
+        :param scheduling_policy: Override the engine's scheduling policy for this run.
+        :param workflow_id: Workflow to run (defaults to the selected one).
+        :param timeout: Seconds after which the run is cancelled (defaults to the workflow's "timeout").
+        """
+        run = self.get_run(workflow_id)
+        self._begin_run(run, incremental, timeout)
+        try:
+            self._start_run(run)
+            execution_order = run.execution_order()
+
+            # Synchronous agents fall back to the engine's worker pool
+            results = await self._execute_async(
+                run, execution_order, max_concurrency, self._get_thread_pool(), scheduling_policy
+            )
+            return self._finish_run(run, execution_order, results)
         except Exception as e:
+            run.finish("failed")
             self.tracker.track_workflow(
-                workflow_id=self.workflow_id,
+                workflow_id=run.workflow_id,
                 event_type="failed",
                 data={"error": str(e)}
             )
             return {"status": "error", "message": str(e)}
 
+    async def _execute_async(self, run: WorkflowRun, execution_order: List[str], max_concurrency: Optional[int],
+                             executor, scheduling_policy: Optional[str] = None) -> Dict:
+        """Dispatch tasks as asyncio tasks once all of their predecessors have finished."""
+        results = {}
+        remaining = {task_id: run.graph.in_degree(task_id) for task_id in execution_order}
+        ready = self._ready_queue(run, execution_order, scheduling_policy)
+        for task_id in execution_order:
+            if remaining[task_id] == 0:
+                ready.push(task_id)
+        in_flight = {}
+        streaming = {}
+        token = run.cancel_token
+        cancelled = asyncio.wrap_future(token.signal())
+
+        while (ready or in_flight or streaming) and not token.cancelled:
+            while ready and (not max_concurrency or len(in_flight) < max_concurrency):
+                task_id = ready.pop()
+                skipped = self._skipped_result(run, task_id)
+                if skipped is not None:
+                    self._record_result(run, task_id, skipped, results)
+                    self._release_successors(run, task_id, remaining, ready)
+                    continue
+                node_data = run.graph.nodes[task_id]
+                future = asyncio.ensure_future(
+                    self._execute_task_async(run, task_id, node_data['agent_type'], node_data['config'], executor)
+                )
+                in_flight[future] = task_id
+
+            done, _ = await asyncio.wait(
+                set(in_flight) | set(streaming) | {cancelled}, timeout=token.remaining(),
+                return_when=asyncio.FIRST_COMPLETED
+            )
+            for future in done:
+                if future is cancelled:
+                    continue
+                if future in streaming:
+                    task_id = streaming.pop(future)
+                    self._record_result(run, task_id, future.result(), results)
+                    self._release_successors(run, task_id, remaining, ready, "finished")
+                    continue
+
+                task_id = in_flight.pop(future)
+                result = future.result()
+                completion = run.stream_completions.pop(task_id, None)
+                if completion is not None:
+                    streaming[asyncio.wrap_future(completion)] = task_id
+                    self._release_successors(run, task_id, remaining, ready, "started")
+                    continue
+                self._record_result(run, task_id, result, results)
+                self._release_successors(run, task_id, remaining, ready)
+
+        # Unlike worker threads, coroutines can be interrupted
+        pending = [future for future in list(in_flight) + list(streaming) + [cancelled] if not future.done()]
+        for future in pending:
+            future.cancel()
+        if pending:
+            await asyncio.gather(*pending, return_exceptions=True)
+        return {task_id: results[task_id] for task_id in execution_order if task_id in results}
@@ -0,0 +1,169 @@
+import hashlib
+import json
+import threading
+from collections import OrderedDict
+from types import MappingProxyType
+from typing import Any, Callable, Dict, Mapping, Optional, Tuple
+from reasonflow.orchestrator.conditions import validate_condition
+from reasonflow.orchestrator.placeholders import compile_params
+
+DEFAULT_PLAN_CACHE_SIZE = 256
+
+
+def _identify(value: Any) -> str:
+    # Live objects (an LLMIntegration under "agent", ...) belong to the definition by identity
+    return f"{type(value).__module__}.{type(value).__qualname__}@{id(value)}"
+
+
+def definition_hash(config: Dict[str, Any]) -> str:
+    """Hash of a workflow definition, used as its plan cache key."""
+    payload = json.dumps(config, sort_keys=True, default=_identify)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+class WorkflowPlan:
+    """
+    Immutable, compiled form of a workflow definition. Tasks are numbered in the order
+    they are defined; the graph is stored as predecessor and successor index tuples
+    with topological levels, and task params are pre-compiled into placeholder templates.
+    Dependencies may carry a "condition" on the upstream result (see conditions.py).
+    A plan is shared by every run of the same definition.
+    """
+    __slots__ = (
+        "definition", "definition_hash", "task_ids", "index", "agent_types", "configs", "priorities",
+        "templates", "predecessors", "successors", "levels", "order", "edges", "conditions",
+    )
+
+    def __init__(self, definition: Dict[str, Any], digest: str):
+        tasks = definition["tasks"]
+        task_ids = tuple(tasks)
+        index = {task_id: position for position, task_id in enumerate(task_ids)}
+
+        predecessors = [[] for _ in task_ids]
+        successors = [[] for _ in task_ids]
+        edges = []
+        conditions = {}
+        for dep in definition["dependencies"]:
+            source, target = dep.get("from"), dep.get("to")
+            if source not in index or target not in index:
+                raise ValueError(f"Dependency {source} -> {target} refers to an unknown task")
+            if index[source] in predecessors[index[target]]:
+                continue
+            predecessors[index[target]].append(index[source])
+            successors[index[source]].append(index[target])
+            edges.append((source, target))
+            if dep.get("condition") is not None:
+                validate_condition(dep["condition"])
+                conditions[(source, target)] = dep["condition"]
+
+        # Kahn's algorithm, one level at a time
+        remaining = [len(preds) for preds in predecessors]
+        level = [position for position, count in enumerate(remaining) if count == 0]
+        levels = []
+        while level:
+            levels.append(tuple(level))
+            next_level = []
+            for position in level:
+                for successor in successors[position]:
+                    remaining[successor] -= 1
+                    if remaining[successor] == 0:
+                        next_level.append(successor)
+            level = next_level
+        order = tuple(position for level in levels for position in level)
+        if len(order) != len(task_ids):
+            cyclic = sorted(task_ids[position] for position, count in enumerate(remaining) if count > 0)
+            raise ValueError(f"Workflow contains a cycle through tasks: {cyclic}")
+
+        configs = tuple(tasks[task_id].get("config", {}) for task_id in task_ids)
+        values = {
+            "definition": definition,
+            "definition_hash": digest,
+            "task_ids": task_ids,
+            "index": MappingProxyType(index),
+            "agent_types": tuple(tasks[task_id]["type"] for task_id in task_ids),
+            "configs": configs,
+            "priorities": tuple(tasks[task_id].get("priority", 1) for task_id in task_ids),
+            "templates": tuple(
+                MappingProxyType(compile_params(config.get("params", {}))) for config in configs
+            ),
+            "predecessors": tuple(tuple(preds) for preds in predecessors),
+            "successors": tuple(tuple(succs) for succs in successors),
+            "levels": tuple(levels),
+            "order": order,
+            "edges": tuple(edges),
+            "conditions": MappingProxyType(conditions),
+        }
+        for name, value in values.items():
+            object.__setattr__(self, name, value)
+
+    def __setattr__(self, name, value):
+        raise AttributeError("WorkflowPlan is immutable")
+
+    def __len__(self):
+        return len(self.task_ids)
+
+    def topological_order(self) -> Tuple[str, ...]:
+        """Task ids in a valid execution order."""
+        return tuple(self.task_ids[position] for position in self.order)
+
+    def __repr__(self):
+        return f"WorkflowPlan(tasks={len(self.task_ids)}, levels={len(self.levels)}, hash={self.definition_hash[:12]})"
+
+
+class PlanCache:
+    """Bounded LRU cache of compiled plans keyed by definition hash."""
+
+    def __init__(self, max_entries: int = DEFAULT_PLAN_CACHE_SIZE):
+        self.max_entries = max_entries
+        self._plans: "OrderedDict[str, WorkflowPlan]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, digest: str) -> Optional[WorkflowPlan]:
+        with self._lock:
+            plan = self._plans.get(digest)
+            if plan is None:
+                self.misses += 1
+                return None
+            self._plans.move_to_end(digest)
+            self.hits += 1
+            return plan
+
+    def set(self, digest: str, plan: WorkflowPlan) -> None:
+        with self._lock:
+            self._plans[digest] = plan
+            self._plans.move_to_end(digest)
+            while len(self._plans) > self.max_entries:
+                self._plans.popitem(last=False)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._plans.clear()
+            self.hits = self.misses = 0
+
+
+plan_cache = PlanCache()
+
+
+def compile_workflow(config: Dict[str, Any], prepare: Optional[Callable[[Dict], Dict]] = None,
+                     cache: Optional[PlanCache] = plan_cache) -> WorkflowPlan:
+    """
+    Compile a workflow definition ({"tasks": {...}, "dependencies": [...]}) into a plan,
+    reusing the cached plan of an identical definition.
+    :param prepare: Optional transformation of the definition applied before compiling
+                    (e.g. making it serializable); it only runs on a cache miss.
+    :param cache: Plan cache to use, or None to always compile.
+    """
+    digest = definition_hash(config)
+    plan = cache.get(digest) if cache is not None else None
+    if plan is not None:
+        return plan
+
+    definition = prepare(config) if prepare else config
+    if not isinstance(definition, Mapping) or "tasks" not in definition or "dependencies" not in definition:
+        raise ValueError("Invalid workflow configuration")
+    plan = WorkflowPlan(definition, digest)
+    if cache is not None:
+        cache.set(digest, plan)
+    return plan
@@ -0,0 +1,80 @@
+import threading
+from typing import Any, Dict, List, Optional
+import networkx as nx
+from reasonflow.orchestrator.cancellation import CancelToken
+from reasonflow.orchestrator.workflow_plan import WorkflowPlan
+
+
+class WorkflowRun:
+    """
+    One workflow held by a WorkflowEngine: its task graph, the compiled plan the graph was
+    loaded from, and the results, input fingerprints and streams of its executions.
+    Runs of one engine are isolated from each other and may execute at the same time;
+    the engine's worker pool, agents, caches and rate limits are shared between them.
+    """
+
+    def __init__(self, workflow_id: Optional[str] = None, config: Optional[Dict] = None):
+        self.workflow_id = workflow_id
+        self.config = config if config is not None else {}
+        # created -> running -> completed / cancelled / failed
+        self.status = "created"
+        # Cancels the current execution; parent of the tokens of its tasks
+        self.cancel_token = CancelToken()
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self) -> None:
+        """Drop the graph and its stored results, e.g. before rebuilding the workflow."""
+        self.graph = nx.DiGraph()
+        # Compiled plan the graph was loaded from, while the graph still matches it
+        self.plan: Optional[WorkflowPlan] = None
+        self.task_results: Dict[str, Any] = {}
+        # Input fingerprints of the stored task results, used by incremental runs
+        self.task_fingerprints: Dict[str, str] = {}
+        self.incremental = False
+        self.restored_tasks = set()
+        self.reused_tasks = set()
+        # Streaming outputs of the current execution: task -> field -> TaskStream, and the
+        # futures that resolve once a streaming task's full result is assembled
+        self.task_streams = {}
+        self.stream_completions = {}
+
+    def execution_order(self) -> List[str]:
+        """Topological order of the graph, taken from the loaded plan when it still applies."""
+        if self.plan is not None:
+            return list(self.plan.topological_order())
+        return list(nx.topological_sort(self.graph))
+
+    def begin(self, incremental: bool, timeout: Optional[float] = None) -> None:
+        """
+        Start an execution. A workflow executes at most once at a time.
+        :param timeout: Seconds after which the execution is cancelled.
+        """
+        with self._lock:
+            if self.status == "running":
+                raise ValueError(f"Workflow {self.workflow_id} is already running")
+            self.status = "running"
+            self.cancel_token = CancelToken(timeout)
+        self.incremental = incremental
+        self.restored_tasks = set()
+        self.reused_tasks = set()
+        self.task_streams = {}
+        self.stream_completions = {}
+
+    def cancel(self, reason: str) -> bool:
+        """Cancel the current execution. Returns False when the workflow is not running."""
+        with self._lock:
+            if self.status != "running":
+                return False
+            token = self.cancel_token
+        token.cancel(reason)
+        return True
+
+    def finish(self, status: str) -> None:
+        with self._lock:
+            self.status = status
+            # Tasks abandoned by the finished execution keep the old token; later work gets a fresh one
+            self.cancel_token = CancelToken()
+
+    def __repr__(self):
+        return f"WorkflowRun(workflow_id={self.workflow_id!r}, status={self.status!r}, tasks={self.graph.number_of_nodes()})"
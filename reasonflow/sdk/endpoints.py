@@ -47,7 +47,7 @@ async def execute_workflow(workflow_id: str):
     Execute the workflow specified by the workflow_id.
     """
     try:
-        results = workflow_builder.execute_workflow(workflow_id)
+        results = await workflow_builder.execute_workflow_async(workflow_id)
         if "error" in results:
             raise HTTPException(status_code=500, detail=results["error"])
         return results
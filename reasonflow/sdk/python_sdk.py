@@ -42,7 +42,7 @@ class ReasonFlowSDK:
         Execute a workflow by its ID.
         """
         try:
-            results = self.engine.execute_workflow(workflow_id)
+            results = self.engine.execute_workflow(workflow_id=workflow_id)
             print(f"Workflow executed successfully: {workflow_id}")
             return results
         except KeyError:
@@ -0,0 +1,77 @@
+import time
+import unittest
+from reasonflow.agents.agent_pool import AgentPool, agent_key
+from reasonflow.agents.custom_agent_builder import CustomAgentBuilder
+
+
+class SessionAgent:
+    """Test agent holding a resource that must be closed"""
+    def __init__(self, base_url: str = ""):
+        self.base_url = base_url
+        self.closed = False
+
+    def close(self):
+        self.closed = True
+
+
+class StatefulAgent(SessionAgent):
+    poolable = False
+
+
+class TestAgentPool(unittest.TestCase):
+    def setUp(self):
+        self.pool = AgentPool(idle_timeout=60)
+
+    def test_reuses_agent_for_same_key(self):
+        key = agent_key("session", SessionAgent, {"base_url": "https://a"})
+        first = self.pool.acquire(key, lambda: SessionAgent("https://a"))
+        self.pool.release(first)
+        second = self.pool.acquire(key, lambda: SessionAgent("https://a"))
+        self.assertIs(first, second)
+        self.assertEqual(self.pool.stats()["created"], 1)
+        self.assertEqual(self.pool.stats()["reused"], 1)
+
+    def test_key_depends_on_config_and_class(self):
+        key = agent_key("session", SessionAgent, {"base_url": "https://a"})
+        self.assertEqual(key, agent_key("session", SessionAgent, {"base_url": "https://a"}))
+        self.assertNotEqual(key, agent_key("session", SessionAgent, {"base_url": "https://b"}))
+        self.assertNotEqual(key, agent_key("session", StatefulAgent, {"base_url": "https://a"}))
+
+    def test_evicts_and_closes_idle_agents(self):
+        self.pool.idle_timeout = 0.01
+        key = agent_key("session", SessionAgent, {})
+        agent = self.pool.acquire(key, SessionAgent)
+        time.sleep(0.02)
+        self.assertEqual(self.pool.evict_idle(), 0)  # still leased
+        self.pool.release(agent)
+        time.sleep(0.02)
+        self.assertEqual(self.pool.evict_idle(), 1)
+        self.assertTrue(agent.closed)
+        self.assertEqual(self.pool.stats()["agents"], 0)
+
+    def test_non_poolable_agents_are_not_shared(self):
+        key = agent_key("stateful", StatefulAgent, {})
+        first = self.pool.acquire(key, StatefulAgent)
+        second = self.pool.acquire(key, StatefulAgent)
+        self.assertIsNot(first, second)
+        self.pool.release(first)
+
+    def test_builder_acquire_agent(self):
+        builder = CustomAgentBuilder(agent_pool=self.pool)
+        builder.register_agent_type("session", SessionAgent)
+        config = {"agent_config": {"base_url": "https://a"}}
+        first = builder.acquire_agent("session", config)
+        builder.release_agent(first)
+        self.assertIs(builder.acquire_agent("session", config), first)
+        self.assertIsNot(builder.acquire_agent("session", {"agent_config": {"base_url": "https://b"}}), first)
+
+    def test_create_agent_leaves_config_untouched(self):
+        builder = CustomAgentBuilder()
+        builder.register_agent_type("memory", lambda shared_memory=None: object())
+        config = {"agent_config": {"shared_memory": "shared"}}
+        builder.create_agent("memory", config)
+        self.assertEqual(config["agent_config"]["shared_memory"], "shared")
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -30,6 +30,18 @@ class TestCustomAgentBuilder(unittest.TestCase):
         self.builder.register_agent_type("test", TestAgent)
         self.assertIn("test", self.builder.get_agent_types())
         
+    def test_supports_async(self):
+        class SyncAgent:
+            def execute(self, **params):
+                return {}
+
+        class AsyncAgent(SyncAgent):
+            async def aexecute(self, **params):
+                return {}
+
+        self.assertFalse(self.builder.supports_async(SyncAgent()))
+        self.assertTrue(self.builder.supports_async(AsyncAgent()))
+
     def test_create_known_agent(self):
         agent = self.builder.create_agent("llm", {"model": "test"})
         self.assertIsNotNone(agent)
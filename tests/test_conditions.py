@@ -0,0 +1,30 @@
+import unittest
+from reasonflow.orchestrator.conditions import evaluate_condition, validate_condition
+
+
+class TestConditions(unittest.TestCase):
+    def test_operators_on_result_fields(self):
+        result = {"status": "success", "output": {"documents": ["a", "b"], "label": "billing"}}
+        self.assertTrue(evaluate_condition({"field": "status", "op": "eq", "value": "success"}, result))
+        self.assertTrue(evaluate_condition({"field": "output.documents", "op": "not_empty"}, result))
+        self.assertTrue(evaluate_condition({"field": "output.documents.0", "op": "eq", "value": "a"}, result))
+        self.assertTrue(evaluate_condition({"field": "output.label", "op": "in", "value": ["billing", "refund"]}, result))
+        self.assertFalse(evaluate_condition({"field": "output.missing", "op": "gt", "value": 0}, result))
+        self.assertTrue(evaluate_condition({"field": "output.missing", "op": "empty"}, result))
+        self.assertTrue(evaluate_condition(lambda r: r["status"] == "success", result))
+        self.assertFalse(evaluate_condition([
+            {"field": "output.documents", "op": "not_empty"},
+            {"field": "output.label", "op": "eq", "value": "sales"},
+        ], result))
+        self.assertTrue(evaluate_condition(None, result))
+
+    def test_validate(self):
+        validate_condition({"op": "truthy"})
+        validate_condition([{"op": "eq", "value": 1}])
+        for condition in ({"op": "approx", "value": 1}, {"op": "eq"}, "status == success"):
+            with self.assertRaises(ValueError):
+                validate_condition(condition)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,98 @@
+import time
+import unittest
+from reasonflow.observability.metrics import Metrics
+from reasonflow.orchestrator.hedging import HedgeBudget, HedgePolicy
+from reasonflow.orchestrator.workflow_engine import WorkflowEngine
+
+
+class SlowFirstAgent:
+    """Test agent whose first call hangs, like an occasional slow provider response"""
+    calls = []
+
+    def execute(self, text: str = "", cancel_token=None, **kwargs):
+        self.calls.append(text)
+        if len(self.calls) == 1:
+            while not (cancel_token is not None and cancel_token.cancelled):
+                time.sleep(0.01)
+            return {"status": "error", "message": "abandoned"}
+        return {"status": "success", "output": text}
+
+
+class FallbackAgent:
+    """Test agent standing in for a fallback provider"""
+    def execute(self, text: str = "", **kwargs):
+        return {"status": "success", "output": f"fallback: {text}"}
+
+
+class TestHedgePolicy(unittest.TestCase):
+    def test_delay_uses_percentile_of_history(self):
+        metrics = Metrics(shared_memory=None)
+        policy = HedgePolicy(percentile=90, min_samples=10)
+        for duration in range(1, 10):
+            metrics.record_task_metrics("t", duration / 100)
+        self.assertIsNone(policy.delay(metrics, "t"))
+        metrics.record_task_metrics("t", 0.5)
+        # Failures don't count towards latency
+        metrics.record_task_metrics("t", 9.0, success=False)
+        self.assertAlmostEqual(policy.delay(metrics, "t"), 0.09)
+        self.assertEqual(HedgePolicy(percentile=90, min_samples=1, min_delay=1).delay(metrics, "t"), 1)
+
+    def test_fallback_config(self):
+        policy = HedgePolicy.from_config({"fallback": {"agent_type": "llm", "agent_config": {"provider": "groq"}}})
+        agent_type, config = policy.hedge_task("llm", {"agent_config": {"provider": "openai", "model": "m"},
+                                                       "params": {"prompt": "p"}})
+        self.assertEqual(agent_type, "llm")
+        self.assertEqual(config["agent_config"], {"provider": "groq", "model": "m"})
+        self.assertEqual(config["params"], {"prompt": "p"})
+        self.assertIsNone(HedgePolicy.from_config(None))
+
+    def test_budget_limits_share_of_requests(self):
+        budget = HedgeBudget(ratio=0.25)
+        granted = []
+        for _ in range(8):
+            budget.record_request()
+            granted.append(budget.try_acquire())
+        self.assertEqual(granted.count(True), 2)
+        self.assertEqual(budget.stats()["hedges"], 2)
+
+
+class TestHedgedExecution(unittest.TestCase):
+    def setUp(self):
+        SlowFirstAgent.calls = []
+
+    def _engine(self, hedge, hedge_ratio=1.0):
+        engine = WorkflowEngine(hedge_ratio=hedge_ratio)
+        engine.agent_builder.register_agent_type("slow_first", SlowFirstAgent)
+        engine.agent_builder.register_agent_type("fallback", FallbackAgent)
+        engine.add_task("ask", "slow_first", {"agent_config": {}, "params": {"text": "hi"}, "hedge": hedge})
+        for _ in range(5):
+            engine.metrics.record_task_metrics("ask", 0.05)
+        return engine
+
+    def test_hedge_wins_over_slow_request(self):
+        engine = self._engine({"percentile": 95, "min_samples": 5})
+        start = time.time()
+        results = engine.execute_workflow()
+        self.assertLess(time.time() - start, 0.5)
+        self.assertEqual(results["ask"]["output"], "hi")
+        self.assertEqual(engine.metrics.get_hedge_metrics("ask"),
+                         {"hedged_count": 1, "hedge_wins": 1, "denied_count": 0})
+        # The losing request was told to stop
+        time.sleep(0.05)
+        self.assertEqual(len(SlowFirstAgent.calls), 2)
+
+    def test_hedge_goes_to_fallback(self):
+        engine = self._engine({"min_samples": 5, "fallback": {"agent_type": "fallback"}})
+        results = engine.execute_workflow()
+        self.assertEqual(results["ask"]["output"], "fallback: hi")
+
+    def test_budget_denies_hedge(self):
+        engine = self._engine({"min_samples": 5}, hedge_ratio=0)
+        results = engine.execute_workflow(timeout=0.3)
+        self.assertEqual(results["ask"]["status"], "cancelled")
+        self.assertEqual(engine.metrics.get_hedge_metrics("ask")["denied_count"], 1)
+        self.assertEqual(len(SlowFirstAgent.calls), 1)
+
+
+if __name__ == '__main__':
+    unittest.main()
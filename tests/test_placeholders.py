@@ -0,0 +1,38 @@
+import unittest
+from reasonflow.orchestrator.placeholders import CompiledTemplate, compile_params, render_params, UNRESOLVED
+
+
+class TestCompiledTemplate(unittest.TestCase):
+    def test_segments(self):
+        template = CompiledTemplate("Summarize {{search.output}} for {{user.name}}.")
+        self.assertEqual(template.segments, (
+            "Summarize ", ("search", "output"), " for ", ("user", "name"), "."
+        ))
+        self.assertEqual(template.references, (("search", "output"), ("user", "name")))
+
+    def test_render_multiple_placeholders(self):
+        template = CompiledTemplate("{{a.output}}+{{b.output}}")
+        rendered = template.render({"a": {"output": 1}, "b": {"output": "two"}})
+        self.assertEqual(rendered, "1+two")
+
+    def test_render_unresolved(self):
+        template = CompiledTemplate("{{a.missing}} {{b.output}}")
+        self.assertEqual(template.render({"a": {"output": 1}}), f"{UNRESOLVED} {UNRESOLVED}")
+
+
+class TestCompileParams(unittest.TestCase):
+    def test_render_does_not_mutate_plan(self):
+        params = {"prompt": "Answer: {{search.output}}", "top_k": 5, "plain": "no refs"}
+        compiled = compile_params(params)
+        self.assertIsInstance(compiled["prompt"], CompiledTemplate)
+        self.assertEqual(compiled["top_k"], 5)
+
+        first = render_params(compiled, {"search": {"output": "x"}})
+        second = render_params(compiled, {"search": {"output": "y"}})
+        self.assertEqual(first["prompt"], "Answer: x")
+        self.assertEqual(second["prompt"], "Answer: y")
+        self.assertEqual(params["prompt"], "Answer: {{search.output}}")
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,98 @@
+import asyncio
+import threading
+import time
+import unittest
+from reasonflow.orchestrator.rate_limiter import RateLimiter, estimate_tokens, limit_keys
+from reasonflow.orchestrator.workflow_engine import WorkflowEngine
+
+
+class TestRateLimiter(unittest.TestCase):
+    def setUp(self):
+        self.limiter = RateLimiter()
+
+    def test_limit_keys(self):
+        class Integration:
+            provider = "openai"
+            model = "gpt-4o"
+
+        self.assertEqual(limit_keys({"agent": Integration()}), ["provider:openai", "model:openai/gpt-4o"])
+        self.assertEqual(limit_keys({"agent_config": {"base_url": "https://api.example.com/"}}),
+                         ["url:https://api.example.com"])
+        self.assertEqual(limit_keys({"agent_config": {}}), [])
+
+    def test_estimate_tokens(self):
+        self.assertEqual(estimate_tokens({"prompt": "x" * 40, "max_tokens": 100}), 110)
+
+    def test_unconfigured_keys_do_not_wait(self):
+        with self.limiter.acquire(["provider:openai"]) as lease:
+            self.assertEqual(lease.waited, 0.0)
+
+    def test_max_concurrent(self):
+        self.limiter.configure("provider:openai", max_concurrent=2)
+        active = []
+        peak = []
+
+        def call():
+            with self.limiter.acquire(["provider:openai", "model:openai/gpt-4o"]):
+                active.append(1)
+                peak.append(len(active))
+                time.sleep(0.02)
+                active.pop()
+
+        threads = [threading.Thread(target=call) for _ in range(6)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self.assertEqual(max(peak), 2)
+
+    def test_requests_per_minute(self):
+        self.limiter.configure("url:https://api.example.com", requests_per_minute=600)
+        for _ in range(600):
+            self.limiter.release(self.limiter.acquire(["url:https://api.example.com"]))
+        started = time.monotonic()
+        lease = self.limiter.acquire(["url:https://api.example.com"])
+        # One request refills every 0.1s at 600 requests per minute
+        self.assertGreater(time.monotonic() - started, 0.05)
+        self.assertGreater(lease.waited, 0.05)
+
+    def test_tokens_per_minute_async(self):
+        self.limiter.configure("model:openai/gpt-4o", tokens_per_minute=6000)
+
+        async def run():
+            first = await self.limiter.acquire_async(["model:openai/gpt-4o"], tokens=6000)
+            second = await self.limiter.acquire_async(["model:openai/gpt-4o"], tokens=10)
+            return first.waited, second.waited
+
+        first, second = asyncio.run(run())
+        self.assertEqual(first, 0.0)
+        self.assertGreater(second, 0.05)
+
+    def test_engine_queues_tasks_for_capacity(self):
+        active = []
+        peak = []
+
+        class ProviderAgent:
+            def __init__(self, api_provider: str, model: str):
+                pass
+
+            def execute(self, prompt: str = "", **kwargs):
+                active.append(prompt)
+                peak.append(len(active))
+                time.sleep(0.02)
+                active.remove(prompt)
+                return {"status": "success", "output": prompt}
+
+        engine = WorkflowEngine(rate_limiter=self.limiter, rate_limits={"provider:groq": {"max_concurrent": 1}})
+        engine.agent_builder.register_agent_type("provider", ProviderAgent)
+        for name in ("a", "b", "c"):
+            engine.add_task(name, "provider", {
+                "agent_config": {"api_provider": "groq", "model": "llama3-8b-8192"}, "params": {"prompt": name}
+            })
+        results = engine.execute_workflow(parallel=True, max_workers=3)
+        self.assertTrue(all(result["status"] == "success" for result in results.values()))
+        self.assertEqual(max(peak), 1)
+
+
+if __name__ == "__main__":
+    unittest.main()
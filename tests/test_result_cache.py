@@ -0,0 +1,48 @@
+import tempfile
+import time
+import unittest
+from reasonflow.orchestrator.result_cache import TaskResultCache, fingerprint
+
+
+class TestFingerprint(unittest.TestCase):
+    def test_key_order_independent(self):
+        self.assertEqual(fingerprint({"a": 1, "b": [1, 2]}), fingerprint({"b": [1, 2], "a": 1}))
+        self.assertNotEqual(fingerprint({"a": 1}), fingerprint({"a": 2}))
+
+    def test_objects_keyed_by_attributes(self):
+        class Agent:
+            def __init__(self, model):
+                self.model = model
+
+        self.assertEqual(fingerprint(Agent("gpt-4o")), fingerprint(Agent("gpt-4o")))
+        self.assertNotEqual(fingerprint(Agent("gpt-4o")), fingerprint(Agent("gpt-4o-mini")))
+
+
+class TestTaskResultCache(unittest.TestCase):
+    def test_lru_eviction(self):
+        cache = TaskResultCache(max_entries=2)
+        cache.set("a", {"status": "success"})
+        cache.set("b", {"status": "success"})
+        cache.get("a")
+        cache.set("c", {"status": "success"})
+        self.assertIsNotNone(cache.get("a"))
+        self.assertIsNone(cache.get("b"))
+        self.assertEqual(cache.stats()["cache_size"], 2)
+
+    def test_ttl_expiry(self):
+        cache = TaskResultCache()
+        cache.set("a", {"status": "success"}, ttl=0.05)
+        self.assertIsNotNone(cache.get("a"))
+        time.sleep(0.1)
+        self.assertIsNone(cache.get("a"))
+
+    def test_disk_tier(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            TaskResultCache(disk_path=tmp).set("k" * 64, {"status": "success", "output": "x"})
+            cache = TaskResultCache(disk_path=tmp)
+            self.assertEqual(cache.get("k" * 64)["output"], "x")
+            self.assertEqual(cache.stats()["cache_disk_hits"], 1)
+
+
+if __name__ == "__main__":
+    unittest.main()
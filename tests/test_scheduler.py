@@ -0,0 +1,50 @@
+import unittest
+from reasonflow.orchestrator.scheduler import ReadyQueue, compute_critical_paths
+
+
+class TestCriticalPaths(unittest.TestCase):
+    def setUp(self):
+        # fast -> merge, slow -> slow_2 -> merge
+        self.successors = {"fast": ["merge"], "slow": ["slow_2"], "slow_2": ["merge"], "merge": []}
+        self.order = ["fast", "slow", "slow_2", "merge"]
+
+    def test_remaining_path_lengths(self):
+        paths = compute_critical_paths(
+            self.order, self.successors.__getitem__,
+            {"fast": 1.0, "slow": 5.0, "slow_2": 2.0, "merge": 1.0}
+        )
+        self.assertEqual(paths, {"merge": 1.0, "slow_2": 3.0, "slow": 8.0, "fast": 2.0})
+
+    def test_unknown_durations_use_mean(self):
+        paths = compute_critical_paths(
+            self.order, self.successors.__getitem__,
+            {"fast": 1.0, "slow": 3.0, "slow_2": None, "merge": None}
+        )
+        self.assertEqual(paths["slow_2"], 4.0)
+
+
+class TestReadyQueue(unittest.TestCase):
+    def _drain(self, queue, tasks):
+        for task_id in tasks:
+            queue.push(task_id)
+        return [queue.pop() for _ in tasks]
+
+    def test_critical_path_first(self):
+        queue = ReadyQueue("critical_path", {"a": 5}, {"a": 1.0, "b": 9.0, "c": 3.0})
+        self.assertEqual(self._drain(queue, ["a", "b", "c"]), ["b", "c", "a"])
+
+    def test_static_priority_override(self):
+        queue = ReadyQueue("priority", {"a": 5}, {"a": 1.0, "b": 9.0, "c": 3.0})
+        self.assertEqual(self._drain(queue, ["a", "b", "c"]), ["a", "b", "c"])
+
+    def test_fifo(self):
+        queue = ReadyQueue("fifo", {"a": 5}, {"b": 9.0})
+        self.assertEqual(self._drain(queue, ["c", "a", "b"]), ["c", "a", "b"])
+
+    def test_unknown_policy(self):
+        with self.assertRaises(ValueError):
+            ReadyQueue("random")
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,90 @@
+import asyncio
+import time
+import unittest
+from reasonflow.orchestrator.streaming import TaskStream, gather_streams, wrap_streams
+
+
+def slow_words(words, delay=0.01):
+    for word in words:
+        time.sleep(delay)
+        yield word
+
+
+class TestStreaming(unittest.TestCase):
+    def test_assembles_text_chunks(self):
+        stream = TaskStream(iter(["a", "b", "c"])).start()
+        self.assertEqual(stream.result(timeout=1), "abc")
+        self.assertEqual(list(stream.subscribe()), ["a", "b", "c"])
+
+    def test_non_text_chunks_assemble_to_list(self):
+        stream = TaskStream(iter([1, 2, 3])).start()
+        self.assertEqual(stream.result(timeout=1), [1, 2, 3])
+
+    def test_multiple_subscribers_see_all_chunks(self):
+        stream = TaskStream(slow_words(["x", "y", "z"])).start()
+        first, second = stream.subscribe(), stream.subscribe()
+        self.assertEqual(list(first), ["x", "y", "z"])
+        self.assertEqual(list(second), ["x", "y", "z"])
+
+    def test_backpressure_holds_producer(self):
+        produced = []
+
+        def source():
+            for i in range(10):
+                time.sleep(0.002)
+                produced.append(i)
+                yield i
+
+        stream = TaskStream(source(), max_buffer=2).start()
+        subscription = stream.subscribe()
+        self.assertEqual(next(subscription), 0)
+        time.sleep(0.1)
+        # One chunk read, so at most max_buffer more may be buffered (plus one in hand)
+        self.assertLessEqual(len(produced), 4)
+        self.assertFalse(stream.done)
+        self.assertEqual(list(subscription), list(range(1, 10)))
+        self.assertEqual(stream.result(timeout=1), list(range(10)))
+
+    def test_unread_subscription_does_not_block_producer(self):
+        stream = TaskStream(iter(range(100)), max_buffer=2).start()
+        stream.subscribe()
+        self.assertEqual(len(stream.result(timeout=1)), 100)
+
+    def test_async_iteration(self):
+        async def source():
+            for word in ("p", "q"):
+                await asyncio.sleep(0)
+                yield word
+
+        async def consume():
+            stream = TaskStream(source()).start(asyncio.get_running_loop())
+            return [chunk async for chunk in stream.subscribe()], await asyncio.wrap_future(stream.future)
+
+        chunks, value = asyncio.run(consume())
+        self.assertEqual(chunks, ["p", "q"])
+        self.assertEqual(value, "pq")
+
+    def test_gather_replaces_fields(self):
+        result = {"status": "success", "output": slow_words(["a", "b"]), "meta": 1}
+        streams = wrap_streams(result)
+        self.assertEqual(list(streams), ["output"])
+        for stream in streams.values():
+            stream.start()
+        gathered = gather_streams(result, streams).result(timeout=1)
+        self.assertEqual(gathered, {"status": "success", "output": "ab", "meta": 1})
+
+    def test_failed_stream_marks_result_error(self):
+        def broken():
+            yield "a"
+            raise ValueError("boom")
+
+        result = {"status": "success", "output": broken()}
+        streams = wrap_streams(result)
+        streams["output"].start()
+        gathered = gather_streams(result, streams).result(timeout=1)
+        self.assertEqual(gathered["status"], "error")
+        self.assertIn("boom", gathered["message"])
+
+
+if __name__ == "__main__":
+    unittest.main()
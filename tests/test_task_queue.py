@@ -0,0 +1,120 @@
+import os
+import tempfile
+import threading
+import time
+import unittest
+from reasonflow.agents.agent_pool import AgentPool
+from reasonflow.agents.custom_agent_builder import CustomAgentBuilder
+from reasonflow.cli import main
+from reasonflow.orchestrator.distributed import Worker
+from reasonflow.orchestrator.task_queue import SQLiteTaskQueue
+from reasonflow.orchestrator.workflow_engine import WorkflowEngine
+
+
+class EchoAgent:
+    """Test agent that returns its input, noting the worker's process"""
+    def execute(self, text: str = "", **kwargs):
+        return {"status": "success", "output": text, "pid": os.getpid()}
+
+
+class TestSQLiteTaskQueue(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.queue = SQLiteTaskQueue(os.path.join(self.tmp.name, "queue.db"), max_attempts=2)
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def test_lease_complete_and_acknowledge(self):
+        queue_id = self.queue.put({"task_id": "a"})
+        task = self.queue.lease("w1", lease_seconds=10)
+        self.assertEqual((task.id, task.payload, task.attempts), (queue_id, {"task_id": "a"}, 1))
+        self.assertIsNone(self.queue.lease("w2"))
+        self.assertEqual(self.queue.results([queue_id]), {})
+
+        self.assertTrue(self.queue.complete(queue_id, "w1", {"status": "success"}))
+        self.assertEqual(self.queue.results([queue_id]), {queue_id: {"status": "success"}})
+        self.queue.acknowledge([queue_id])
+        self.assertEqual(self.queue.stats(), {"pending": 0, "leased": 0, "done": 0})
+
+    def test_expired_lease_is_redelivered_then_abandoned(self):
+        queue_id = self.queue.put({"task_id": "a"})
+        self.queue.lease("dead-worker", lease_seconds=0.05)
+        time.sleep(0.1)
+        redelivered = self.queue.lease("w2", lease_seconds=0.05)
+        self.assertEqual((redelivered.id, redelivered.attempts), (queue_id, 2))
+        # The first worker lost its lease
+        self.assertFalse(self.queue.heartbeat(queue_id, "dead-worker"))
+
+        time.sleep(0.1)
+        self.assertIsNone(self.queue.lease("w3"))
+        self.assertEqual(self.queue.results([queue_id])[queue_id]["status"], "error")
+
+    def test_heartbeat_keeps_lease(self):
+        self.queue.put({"task_id": "a"})
+        task = self.queue.lease("w1", lease_seconds=0.1)
+        time.sleep(0.06)
+        self.assertTrue(self.queue.heartbeat(task.id, "w1", lease_seconds=0.1))
+        time.sleep(0.06)
+        self.assertIsNone(self.queue.lease("w2"))
+
+    def test_first_result_wins(self):
+        queue_id = self.queue.put({"task_id": "a"})
+        self.queue.lease("w1")
+        self.assertTrue(self.queue.complete(queue_id, "w1", {"status": "success", "output": 1}))
+        self.assertFalse(self.queue.complete(queue_id, "w2", {"status": "success", "output": 2}))
+        self.assertEqual(self.queue.results([queue_id])[queue_id]["output"], 1)
+
+
+class TestDistributedExecution(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.tmp.name, "queue.db")
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def test_engine_runs_tasks_on_workers(self):
+        engine = WorkflowEngine(task_queue=SQLiteTaskQueue(self.path))
+        engine.coordinator.poll_interval = 0.02
+        engine.add_task("a", "echo", {"agent_config": {}, "params": {"text": "a"}})
+        engine.add_task("b", "echo", {"agent_config": {}, "params": {"text": "{{a.output}}b"}})
+        engine.add_dependency("a", "b")
+
+        builder = CustomAgentBuilder(agent_pool=AgentPool())
+        builder.register_agent_type("echo", EchoAgent)
+        worker = Worker(SQLiteTaskQueue(self.path), builder, poll_interval=0.02, concurrency=2)
+        stop = threading.Event()
+        thread = threading.Thread(target=worker.run, args=(stop,))
+        thread.start()
+        try:
+            results = engine.execute_workflow(parallel=True)
+        finally:
+            stop.set()
+            thread.join()
+        self.assertEqual(results["b"]["output"], "ab")
+        self.assertEqual(worker.processed, 2)
+        self.assertEqual(SQLiteTaskQueue(self.path).stats(), {"pending": 0, "leased": 0, "done": 0})
+
+    def test_unserializable_task_fails(self):
+        engine = WorkflowEngine(task_queue=SQLiteTaskQueue(self.path))
+        engine.add_task("a", "echo", {"agent_config": {}, "params": {"text": object()}})
+        results = engine.execute_workflow()
+        self.assertEqual(results["a"]["status"], "error")
+        self.assertIn("JSON-serializable", results["a"]["message"])
+
+    def test_cli_worker(self):
+        queue = SQLiteTaskQueue(self.path)
+        queue_id = queue.put({"task_id": "a", "agent_type": "echo", "config": {"params": {"text": "hi"}}})
+        args = ["worker", "--queue", self.path, "--max-tasks", "1", "--poll-interval", "0.02",
+                "--agent-type", f"echo={__name__}:EchoAgent"]
+        outcome = []
+        thread = threading.Thread(target=lambda: outcome.append(main(args)))
+        thread.start()
+        thread.join(timeout=10)
+        self.assertEqual(outcome, [0])
+        self.assertEqual(queue.results([queue_id])[queue_id]["output"], "hi")
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -1,3 +1,5 @@
+import asyncio
+import time
 import unittest
 from reasonflow.orchestrator.workflow_builder import WorkflowBuilder
 
@@ -46,5 +48,49 @@ class TestWorkflowBuilder(unittest.TestCase):
         status = self.builder.get_workflow_status(workflow_id)
         self.assertEqual(status['status'], 'created')
 
+    def test_map_workflow(self):
+        class UpperAgent:
+            def execute(self, text="", **kwargs):
+                return {"status": "success", "output": text.upper()}
+
+        self.builder.engine.agent_builder.register_agent_type("upper", UpperAgent)
+        config = {
+            "tasks": {"upper": {"type": "upper", "config": {"params": {"text": "{{input.query}}"}}}},
+            "dependencies": []
+        }
+        outcomes = list(self.builder.map_workflow(config, [{"query": "a"}, {"query": "b"}], concurrency=2))
+        outputs = sorted(outcome["results"]["upper"]["output"] for outcome in outcomes)
+        self.assertEqual(outputs, ["A", "B"])
+        self.assertEqual(self.builder.engine.workflow_graph.number_of_nodes(), 0)
+
+    def test_concurrent_workflows_are_isolated(self):
+        class SlowEchoAgent:
+            def execute(self, text="", **kwargs):
+                time.sleep(0.2)
+                return {"status": "success", "output": text}
+
+        def config(text):
+            return {
+                "tasks": {"say": {"type": "slow_echo", "config": {"params": {"text": text}}}},
+                "dependencies": []
+            }
+
+        self.builder.engine.agent_builder.register_agent_type("slow_echo", SlowEchoAgent)
+        first = self.builder.create_workflow(config("one"))
+        second = self.builder.create_workflow(config("two"))
+        self.assertEqual(self.builder.engine.get_run(first).graph.number_of_nodes(), 1)
+
+        async def run_both():
+            return await asyncio.gather(
+                self.builder.execute_workflow_async(first),
+                self.builder.execute_workflow_async(second)
+            )
+
+        start = time.time()
+        results = asyncio.run(run_both())
+        self.assertLess(time.time() - start, 0.35)
+        self.assertEqual([result["say"]["output"] for result in results], ["one", "two"])
+        self.assertEqual(self.builder.engine.get_run(second).task_results["say"]["output"], "two")
+
 if __name__ == '__main__':
     unittest.main() 
\ No newline at end of file
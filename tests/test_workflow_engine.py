@@ -1,6 +1,83 @@
+import asyncio
+import os
+import tempfile
+import time
 import unittest
+from concurrent.futures import ThreadPoolExecutor
+from reasonflow.orchestrator.state_manager import StateManager
 from reasonflow.orchestrator.workflow_engine import WorkflowEngine
 
+
+class EchoAgent:
+    """Test agent that returns its input after an optional delay"""
+    def __init__(self, delay: float = 0.0):
+        self.delay = delay
+
+    def execute(self, text: str = "", **kwargs):
+        time.sleep(self.delay)
+        return {"status": "success", "output": text}
+
+
+class AsyncEchoAgent(EchoAgent):
+    """Test agent implementing the async protocol"""
+    async def aexecute(self, text: str = "", **kwargs):
+        await asyncio.sleep(self.delay)
+        return {"status": "success", "output": text.upper()}
+
+
+class TokenAgent:
+    """Test agent that streams its words one at a time"""
+    def __init__(self, delay: float = 0.0):
+        self.delay = delay
+
+    def execute(self, text: str = "", **kwargs):
+        def tokens():
+            for word in text.split():
+                time.sleep(self.delay)
+                yield word + " "
+        return {"status": "success", "output": tokens()}
+
+
+class CountingAgent:
+    """Test agent consuming a stream and noting when it saw the first chunk"""
+    def execute(self, chunks=(), **kwargs):
+        seen = []
+        first_at = None
+        for chunk in chunks:
+            if first_at is None:
+                first_at = time.perf_counter()
+            seen.append(chunk)
+        return {"status": "success", "output": len(seen), "first_at": first_at}
+
+
+class ChunkAgent:
+    """Test agent returning a list of chunks"""
+    def execute(self, count: int = 3, **kwargs):
+        return {"status": "success", "chunks": [f"chunk{i}" for i in range(int(count))]}
+
+
+class PatientAgent:
+    """Test agent that sleeps in small steps until its cancel token is set"""
+    def execute(self, steps: int = 100, cancel_token=None, **kwargs):
+        for step in range(int(steps)):
+            if cancel_token is not None and cancel_token.cancelled:
+                return {"status": "success", "output": f"stopped at {step}"}
+            time.sleep(0.01)
+        return {"status": "success", "output": "done"}
+
+
+class RecordingTracker:
+    """Test tracker keeping task events"""
+    def __init__(self):
+        self.task_events = []
+
+    def track_workflow(self, workflow_id, event_type, data):
+        pass
+
+    def track_task(self, task_id, workflow_id, event_type, data):
+        self.task_events.append((task_id, event_type))
+
+
 class TestWorkflowEngine(unittest.TestCase):
     def setUp(self):
         self.engine = WorkflowEngine()
@@ -15,5 +92,467 @@ class TestWorkflowEngine(unittest.TestCase):
         self.engine.add_dependency("task1", "task2")
         self.assertTrue(("task1", "task2") in self.engine.workflow_graph.edges)
 
+    def _build_fan_in(self, engine, delay=0.0):
+        engine.agent_builder.register_agent_type("echo", EchoAgent)
+        for name in ("a", "b", "c"):
+            engine.add_task(name, "echo", {"agent_config": {"delay": delay}, "params": {"text": name}})
+        engine.add_task("merge", "echo", {
+            "agent_config": {"delay": 0.0},
+            "params": {"text": "{{a.output}}+{{b.output}}+{{c.output}}"}
+        })
+        for name in ("a", "b", "c"):
+            engine.add_dependency(name, "merge")
+
+    def test_parallel_matches_serial(self):
+        serial_engine = WorkflowEngine()
+        self._build_fan_in(serial_engine)
+        serial = serial_engine.execute_workflow()
+
+        self._build_fan_in(self.engine)
+        parallel = self.engine.execute_workflow(parallel=True, max_workers=3)
+        self.assertEqual(list(parallel), list(serial))
+        self.assertEqual(parallel["merge"], serial["merge"])
+
+    def test_repeated_execution_renders_fresh_params(self):
+        self._build_fan_in(self.engine)
+        first = self.engine.execute_workflow()
+        second = self.engine.execute_workflow()
+        self.assertEqual(first["merge"]["output"], "a+b+c")
+        self.assertEqual(second["merge"]["output"], "a+b+c")
+        params = self.engine.workflow_graph.nodes["merge"]["config"]["params"]
+        self.assertEqual(params["text"], "{{a.output}}+{{b.output}}+{{c.output}}")
+
+    def test_result_cache(self):
+        calls = []
+
+        class CountingAgent(EchoAgent):
+            def execute(self, text: str = "", **kwargs):
+                calls.append(text)
+                return super().execute(text=text)
+
+        engine = WorkflowEngine(cache_config={"max_entries": 16})
+        engine.agent_builder.register_agent_type("counting", CountingAgent)
+        engine.add_task("cached", "counting", {"agent_config": {"delay": 0.0}, "params": {"text": "x"}})
+        engine.add_task("uncached", "counting", {"agent_config": {"delay": 0.0}, "params": {"text": "y"}, "cache": False})
+        engine.execute_workflow()
+        engine.execute_workflow()
+        self.assertEqual(calls, ["x", "y", "y"])
+        self.assertEqual(engine.result_cache.stats()["cache_hits"], 1)
+
+    def test_incremental_reruns_only_dirty_tasks(self):
+        calls = []
+
+        class CountingAgent(EchoAgent):
+            def execute(self, text: str = "", **kwargs):
+                calls.append(text)
+                return super().execute(text=text)
+
+        self.engine.agent_builder.register_agent_type("counting", CountingAgent)
+        self.engine.add_task("a", "counting", {"agent_config": {}, "params": {"text": "a"}})
+        self.engine.add_task("b", "counting", {"agent_config": {}, "params": {"text": "b"}})
+        self.engine.add_task("c", "counting", {"agent_config": {}, "params": {"text": "{{a.output}}{{b.output}}"}})
+        self.engine.add_dependency("a", "c")
+        self.engine.add_dependency("b", "c")
+        self.engine.execute_workflow()
+
+        calls.clear()
+        self.engine.update_task("b", {"agent_config": {}, "params": {"text": "B"}})
+        results = self.engine.execute_workflow(incremental=True)
+        self.assertEqual(sorted(calls), ["B", "aB"])
+        self.assertEqual(results["c"]["output"], "aB")
+
+        calls.clear()
+        self.engine.execute_workflow(parallel=True, incremental=True)
+        self.assertEqual(calls, [])
+
+    def test_resume_skips_checkpointed_tasks(self):
+        calls = []
+        failing = {"b"}
+
+        class FlakyAgent(EchoAgent):
+            def execute(self, text: str = "", **kwargs):
+                calls.append(text)
+                if text in failing:
+                    raise RuntimeError("provider unavailable")
+                return super().execute(text=text)
+
+        with tempfile.TemporaryDirectory() as tmp:
+            engine = WorkflowEngine(state_manager=StateManager(storage_path=tmp))
+            engine.set_workflow_context("wf-resume", {})
+            engine.agent_builder.register_agent_type("flaky", FlakyAgent)
+            engine.add_task("a", "flaky", {"agent_config": {}, "params": {"text": "a"}})
+            engine.add_task("b", "flaky", {"agent_config": {}, "params": {"text": "b"}})
+            engine.add_dependency("a", "b")
+            first = engine.execute_workflow()
+            self.assertEqual(first["b"]["status"], "error")
+
+            # A new engine, as after a restart, only runs the unfinished task
+            calls.clear()
+            failing.clear()
+            resumed = WorkflowEngine(state_manager=StateManager(storage_path=tmp))
+            resumed.agent_builder.register_agent_type("flaky", FlakyAgent)
+            resumed.add_task("a", "flaky", {"agent_config": {}, "params": {"text": "a"}})
+            resumed.add_task("b", "flaky", {"agent_config": {}, "params": {"text": "b"}})
+            resumed.add_dependency("a", "b")
+            results = resumed.resume_workflow("wf-resume")
+            self.assertEqual(calls, ["b"])
+            self.assertEqual(results["a"]["output"], "a")
+            self.assertEqual(results["b"]["status"], "success")
+
+    def test_resume_checkpoints_changed_task(self):
+        def build(engine, text):
+            engine.agent_builder.register_agent_type("echo", EchoAgent)
+            engine.add_task("a", "echo", {"agent_config": {}, "params": {"text": text}})
+            engine.add_task("b", "echo", {"agent_config": {}, "params": {"text": "{{a.output}}!"}})
+            engine.add_dependency("a", "b")
+
+        with tempfile.TemporaryDirectory() as tmp:
+            engine = WorkflowEngine(state_manager=StateManager(storage_path=tmp))
+            engine.set_workflow_context("wf-changed", {})
+            build(engine, "v1")
+            engine.execute_workflow()
+
+            resumed = WorkflowEngine(state_manager=StateManager(storage_path=tmp))
+            build(resumed, "v2")
+            results = resumed.resume_workflow("wf-changed")
+            self.assertEqual(results["b"]["output"], "v2!")
+
+            checkpoints = StateManager(storage_path=tmp).load_checkpoints("wf-changed")
+            self.assertEqual(checkpoints["a"]["result"]["output"], "v2")
+            self.assertEqual(checkpoints["b"]["result"]["output"], "v2!")
+
+    def test_critical_path_dispatch_order(self):
+        started = []
+
+        class RecordingAgent(EchoAgent):
+            def execute(self, text: str = "", **kwargs):
+                started.append(text)
+                return super().execute(text=text)
+
+        self.engine.agent_builder.register_agent_type("recording", RecordingAgent)
+        for name in ("short", "long", "long_tail"):
+            self.engine.add_task(name, "recording", {"agent_config": {}, "params": {"text": name}})
+        self.engine.add_dependency("long", "long_tail")
+        self.engine.metrics.record_task_metrics("short", 1.0)
+        self.engine.metrics.record_task_metrics("long", 1.0)
+        self.engine.metrics.record_task_metrics("long_tail", 5.0)
+
+        self.engine.execute_workflow(parallel=True, max_workers=1)
+        self.assertEqual(started[0], "long")
+
+        started.clear()
+        self.engine.workflow_graph.nodes["short"]["priority"] = 10
+        self.engine.execute_workflow(parallel=True, max_workers=1, scheduling_policy="priority")
+        self.assertEqual(started[0], "short")
+
+    def test_duration_history_is_per_workflow(self):
+        self._build_fan_in(self.engine)
+        self.engine.set_workflow_context("wf-one", {})
+        self.engine.execute_workflow()
+        self.assertIsNotNone(self.engine.metrics.get_average_duration("wf-one:a"))
+        self.assertIsNone(self.engine.metrics.get_average_duration("a"))
+
+        self.engine.set_workflow_context("wf-two", {})
+        self.assertIsNone(self.engine.metrics.get_average_duration(self.engine._metrics_key(self.engine.current_run, "a")))
+
+    def test_metrics_failure_does_not_fail_task(self):
+        self._build_fan_in(self.engine)
+
+        def broken(*args, **kwargs):
+            raise RuntimeError("metrics backend down")
+
+        self.engine.metrics.record_task_metrics = broken
+        results = self.engine.execute_workflow()
+        self.assertEqual(results["merge"]["status"], "success")
+        self.assertEqual(results["merge"]["output"], "a+b+c")
+
+    def test_parallel_overlaps_independent_tasks(self):
+        self._build_fan_in(self.engine, delay=0.2)
+        start = time.time()
+        results = self.engine.execute_workflow(parallel=True, max_workers=3)
+        self.assertLess(time.time() - start, 0.5)
+        self.assertEqual(results["a"]["status"], "success")
+
+    def test_workflow_runs_are_isolated(self):
+        self.engine.agent_builder.register_agent_type("echo", EchoAgent)
+        for workflow_id in ("wf-x", "wf-y"):
+            self.engine.set_workflow_context(workflow_id, {})
+            self.engine.add_task("a", "echo", {"agent_config": {"delay": 0.2}, "params": {"text": workflow_id}})
+            self.engine.add_task("b", "echo", {"agent_config": {}, "params": {"text": "{{a.output}}!"}})
+            self.engine.add_dependency("a", "b")
+
+        start = time.time()
+        with ThreadPoolExecutor(max_workers=2) as pool:
+            futures = {
+                workflow_id: pool.submit(self.engine.execute_workflow, parallel=True, workflow_id=workflow_id)
+                for workflow_id in ("wf-x", "wf-y")
+            }
+            results = {workflow_id: future.result() for workflow_id, future in futures.items()}
+        self.assertLess(time.time() - start, 0.35)
+        self.assertEqual(results["wf-x"]["b"]["output"], "wf-x!")
+        self.assertEqual(results["wf-y"]["b"]["output"], "wf-y!")
+        self.assertEqual(self.engine.get_run("wf-x").status, "completed")
+        self.assertEqual(self.engine.get_run("wf-x").graph.number_of_nodes(), 2)
+
+        self.engine.remove_run("wf-x")
+        with self.assertRaises(ValueError):
+            self.engine.execute_workflow(workflow_id="wf-x")
+
+    def test_execute_workflow_async(self):
+        self.engine.agent_builder.register_agent_type("async_echo", AsyncEchoAgent)
+        self._build_fan_in(self.engine)
+        self.engine.add_task("shout", "async_echo", {"agent_config": {"delay": 0.01}, "params": {"text": "d"}})
+        self.engine.add_dependency("shout", "merge")
+        results = asyncio.run(self.engine.execute_workflow_async(max_concurrency=2))
+        self.assertEqual(results["shout"]["output"], "D")
+        self.assertEqual(results["a"]["output"], "a")
+        self.assertEqual(list(results)[-1], "merge")
+
+    def test_process_executor_for_custom_task(self):
+        with tempfile.NamedTemporaryFile("w", suffix=".py", delete=False) as f:
+            f.write("import os\n\ndef execute(n):\n    return {'total': sum(range(n)), 'pid': os.getpid()}\n")
+        try:
+            for executor in ("process", None):
+                config = {"agent_config": {"function_path": f.name}, "params": {"n": 10}}
+                if executor:
+                    config["executor"] = executor
+                engine = WorkflowEngine()
+                engine.add_task("score", "custom_task", config)
+                results = engine.execute_workflow()
+                engine.shutdown()
+                self.assertEqual(results["score"]["status"], "success", executor)
+                self.assertEqual(results["score"]["result"]["total"], 45)
+                if executor:
+                    self.assertNotEqual(results["score"]["result"]["pid"], os.getpid())
+                else:
+                    self.assertEqual(results["score"]["result"]["pid"], os.getpid())
+        finally:
+            os.unlink(f.name)
+
+    def test_map_inputs_shares_agents_across_records(self):
+        created = []
+
+        class CountedEchoAgent(EchoAgent):
+            def __init__(self, delay: float = 0.0):
+                created.append(self)
+                super().__init__(delay)
+
+            def execute(self, text: str = "", **kwargs):
+                if text == "hello bad":
+                    raise RuntimeError("rejected")
+                return super().execute(text=text)
+
+        self.engine.agent_builder.register_agent_type("counted", CountedEchoAgent)
+        self.engine.add_task("greet", "counted", {"agent_config": {"delay": 0.01}, "params": {"text": "hello {{input.name}}"}})
+        self.engine.add_task("shout", "counted", {"agent_config": {}, "params": {"text": "{{greet.output}}!"}})
+        self.engine.add_dependency("greet", "shout")
+
+        names = [{"name": f"user{i}"} for i in range(20)] + [{"name": "bad"}]
+        outcomes = list(self.engine.map_inputs(iter(names), concurrency=4))
+
+        self.assertEqual(len(created), 2)
+        self.assertEqual(sorted(outcome["index"] for outcome in outcomes), list(range(21)))
+        by_index = {outcome["index"]: outcome for outcome in outcomes}
+        self.assertEqual(by_index[3]["results"]["shout"]["output"], "hello user3!")
+        self.assertEqual(by_index[20]["status"], "error")
+        self.assertEqual(outcomes[-1]["progress"], {"completed": 21, "succeeded": 20, "failed": 1})
+
+    def test_map_inputs_scalar_records(self):
+        self.engine.agent_builder.register_agent_type("echo", EchoAgent)
+        self.engine.add_task("echo", "echo", {"agent_config": {}, "params": {"text": "<{{input.value}}>"}})
+        outputs = sorted(outcome["results"]["echo"]["output"] for outcome in self.engine.map_inputs([1, 2]))
+        self.assertEqual(outputs, ["<1>", "<2>"])
+
+    def test_map_and_reduce_nodes(self):
+        active = []
+        peak = []
+
+        class SummaryAgent(EchoAgent):
+            def execute(self, text: str = "", **kwargs):
+                active.append(text)
+                peak.append(len(active))
+                time.sleep(0.01)
+                active.remove(text)
+                return super().execute(text=text.upper())
+
+        self.engine.tracker = RecordingTracker()
+        self.engine.agent_builder.register_agent_type("chunks", ChunkAgent)
+        self.engine.agent_builder.register_agent_type("summary", SummaryAgent)
+        self.engine.add_task("retrieve", "chunks", {"agent_config": {}, "params": {"count": 6}})
+        self.engine.add_task("summarize", "map", {
+            "over": "{{retrieve.chunks}}",
+            "max_concurrency": 2,
+            "task": {"type": "summary", "config": {"agent_config": {}, "params": {"text": "{{item.index}}:{{item.value}}"}}}
+        })
+        self.engine.add_task("merge", "reduce", {"over": "{{summarize.output}}", "separator": "|"})
+        self.engine.add_dependency("retrieve", "summarize")
+        self.engine.add_dependency("summarize", "merge")
+
+        results = self.engine.execute_workflow(parallel=True)
+        self.assertEqual(results["summarize"]["output"], [f"{i}:CHUNK{i}" for i in range(6)])
+        self.assertEqual(results["merge"]["output"], "|".join(f"{i}:CHUNK{i}" for i in range(6)))
+        self.assertLessEqual(max(peak), 2)
+        self.assertIn(("summarize[5]", "completed"), self.engine.tracker.task_events)
+
+    def test_reduce_in_batches(self):
+        self.engine.agent_builder.register_agent_type("chunks", ChunkAgent)
+        self.engine.agent_builder.register_agent_type("echo", EchoAgent)
+        self.engine.add_task("retrieve", "chunks", {"agent_config": {}, "params": {"count": 5}})
+        self.engine.add_task("combine", "reduce", {
+            "over": "{{retrieve.chunks}}",
+            "separator": "+",
+            "batch_size": 2,
+            "task": {"type": "echo", "config": {"agent_config": {}, "params": {"text": "({{items.output}})"}}}
+        })
+        self.engine.add_dependency("retrieve", "combine")
+        results = asyncio.run(self.engine.execute_workflow_async())
+        self.assertEqual(results["combine"]["output"], "(((chunk0+chunk1)+(chunk2+chunk3))+((chunk4)))")
+
+    def test_map_reports_failed_items(self):
+        class PickyAgent(EchoAgent):
+            def execute(self, text: str = "", **kwargs):
+                if text == "chunk1":
+                    raise RuntimeError("too long")
+                return super().execute(text=text)
+
+        self.engine.agent_builder.register_agent_type("chunks", ChunkAgent)
+        self.engine.agent_builder.register_agent_type("picky", PickyAgent)
+        self.engine.add_task("retrieve", "chunks", {"agent_config": {}, "params": {"count": 3}})
+        self.engine.add_task("check", "map", {
+            "over": "{{retrieve.chunks}}",
+            "task": {"type": "picky", "config": {"agent_config": {}, "params": {"text": "{{item.value}}"}}}
+        })
+        self.engine.add_dependency("retrieve", "check")
+        result = self.engine.execute_workflow()["check"]
+        self.assertEqual(result["status"], "error")
+        self.assertEqual(result["failed"], 1)
+        self.assertEqual(result["output"], ["chunk0", None, "chunk2"])
+
+    def _build_stream(self, engine):
+        engine.agent_builder.register_agent_type("tokens", TokenAgent)
+        engine.agent_builder.register_agent_type("count", CountingAgent)
+        engine.add_task("speak", "tokens", {"agent_config": {"delay": 0.02}, "params": {"text": "one two three four five"}})
+        engine.add_task("count", "count", {"stream_inputs": True, "params": {"chunks": "{{speak.output}}"}})
+        engine.add_task("quote", "echo", {"params": {"text": "said: {{speak.output}}"}})
+        engine.add_dependency("speak", "count")
+        engine.add_dependency("speak", "quote")
+
+    def test_streamed_output_feeds_consumers_early(self):
+        self.engine.agent_builder.register_agent_type("echo", EchoAgent)
+        self._build_stream(self.engine)
+        started = time.perf_counter()
+        results = self.engine.execute_workflow(parallel=True, max_workers=2)
+        self.assertEqual(results["speak"]["output"], "one two three four five ")
+        self.assertEqual(results["count"]["output"], 5)
+        self.assertEqual(results["quote"]["output"], "said: one two three four five ")
+        # The consumer saw the first token well before the producer finished
+        self.assertLess(results["count"]["first_at"] - started, 0.08)
+
+    def test_streamed_output_in_serial_and_async_modes(self):
+        self.engine.agent_builder.register_agent_type("echo", EchoAgent)
+        self._build_stream(self.engine)
+        serial = self.engine.execute_workflow()
+        self.assertEqual(serial["speak"]["output"], "one two three four five ")
+        self.assertEqual(serial["count"]["output"], 5)
+
+        results = asyncio.run(self.engine.execute_workflow_async())
+        self.assertEqual(results["speak"]["output"], "one two three four five ")
+        self.assertEqual(results["count"]["output"], 5)
+        self.assertEqual(results["quote"]["output"], "said: one two three four five ")
+
+    def test_task_timeout_fails_slow_task(self):
+        self.engine.agent_builder.register_agent_type("echo", EchoAgent)
+        self.engine.add_task("slow", "echo", {"agent_config": {"delay": 1.0}, "params": {"text": "x"}, "timeout": 0.1})
+        self.engine.add_task("fast", "echo", {"agent_config": {}, "params": {"text": "y"}})
+        start = time.time()
+        results = self.engine.execute_workflow()
+        self.assertLess(time.time() - start, 0.5)
+        self.assertEqual(results["slow"]["status"], "error")
+        self.assertIn("deadline exceeded", results["slow"]["message"])
+        self.assertEqual(results["fast"]["output"], "y")
+        self.assertEqual(self.engine.current_run.status, "completed")
+
+    def test_cancel_workflow_stops_parallel_run(self):
+        self.engine.agent_builder.register_agent_type("echo", EchoAgent)
+        self.engine.agent_builder.register_agent_type("patient", PatientAgent)
+        self.engine.add_task("a", "patient", {"agent_config": {}, "params": {}})
+        self.engine.add_task("b", "echo", {"agent_config": {}, "params": {"text": "{{a.output}}"}})
+        self.engine.add_dependency("a", "b")
+        self.assertFalse(self.engine.cancel_workflow())
+
+        with ThreadPoolExecutor(max_workers=1) as pool:
+            future = pool.submit(self.engine.execute_workflow, parallel=True)
+            time.sleep(0.1)
+            self.assertTrue(self.engine.cancel_workflow())
+            results = future.result(timeout=1)
+        self.assertEqual(results["a"]["status"], "cancelled")
+        self.assertEqual(results["b"]["status"], "cancelled")
+        self.assertIn("cancelled by user", results["b"]["message"])
+        self.assertEqual(self.engine.current_run.status, "cancelled")
+
+        # The next execution starts with a fresh token
+        results = self.engine.execute_workflow(timeout=5)
+        self.assertEqual(results["b"]["output"], "done")
+
+    def test_agent_receives_cancel_token_on_workflow_timeout(self):
+        self.engine.agent_builder.register_agent_type("patient", PatientAgent)
+        self.engine.add_task("a", "patient", {"agent_config": {}, "params": {}})
+        start = time.time()
+        results = self.engine.execute_workflow(timeout=0.1)
+        self.assertLess(time.time() - start, 0.5)
+        self.assertEqual(results["a"]["status"], "cancelled")
+        self.assertIn("deadline exceeded", results["a"]["message"])
+
+    def test_async_workflow_timeout_interrupts_agents(self):
+        self.engine.agent_builder.register_agent_type("async_echo", AsyncEchoAgent)
+        self.engine.add_task("a", "async_echo", {"agent_config": {"delay": 0.01}, "params": {"text": "a"}})
+        self.engine.add_task("b", "async_echo", {"agent_config": {"delay": 5}, "params": {"text": "b"}})
+        self.engine.add_dependency("a", "b")
+        start = time.time()
+        results = asyncio.run(self.engine.execute_workflow_async(timeout=0.2))
+        self.assertLess(time.time() - start, 1)
+        self.assertEqual(results["a"]["output"], "A")
+        self.assertEqual(results["b"]["status"], "cancelled")
+        self.assertEqual(self.engine.current_run.status, "cancelled")
+
+    def _build_router(self, engine, route):
+        engine.agent_builder.register_agent_type("echo", EchoAgent)
+        engine.add_task("classify", "echo", {"agent_config": {}, "params": {"text": route}})
+        engine.add_task("search", "echo", {"agent_config": {}, "params": {"text": "searched"}})
+        engine.add_task("summarize", "echo", {"agent_config": {}, "params": {"text": "{{search.output}}!"}})
+        engine.add_task("chat", "echo", {"agent_config": {}, "params": {"text": "chatted"}})
+        engine.add_task("reply", "echo", {"agent_config": {}, "params": {"text": "done"}, "trigger_rule": "any"})
+        engine.add_dependency("classify", "search", condition={"op": "eq", "value": "search"})
+        engine.add_dependency("search", "summarize")
+        engine.add_dependency("classify", "chat", condition={"op": "eq", "value": "chat"})
+        engine.add_dependency("summarize", "reply")
+        engine.add_dependency("chat", "reply")
+
+    def test_conditional_edges_skip_branches(self):
+        tracker = RecordingTracker()
+        self.engine.tracker = tracker
+        self._build_router(self.engine, "chat")
+        for results in (self.engine.execute_workflow(), self.engine.execute_workflow(parallel=True),
+                        asyncio.run(self.engine.execute_workflow_async())):
+            self.assertEqual(results["search"]["status"], "skipped")
+            # The whole branch below an untaken edge is skipped
+            self.assertEqual(results["summarize"]["status"], "skipped")
+            self.assertIn("search was skipped", results["summarize"]["message"])
+            self.assertEqual(results["chat"]["output"], "chatted")
+            self.assertEqual(results["reply"]["output"], "done")
+        self.assertIn(("search", "skipped"), tracker.task_events)
+
+    def test_trigger_rule_all_skips_join(self):
+        self._build_router(self.engine, "search")
+        self.engine.update_task("reply", {"agent_config": {}, "params": {"text": "done"}})
+        results = self.engine.execute_workflow(parallel=True)
+        self.assertEqual(results["summarize"]["output"], "searched!")
+        self.assertEqual(results["chat"]["status"], "skipped")
+        self.assertEqual(results["reply"]["status"], "skipped")
+
+    def test_invalid_condition_is_rejected(self):
+        with self.assertRaises(ValueError):
+            self.engine.add_dependency("a", "b", condition={"op": "gt"})
+
 if __name__ == "__main__":
     unittest.main() 
\ No newline at end of file
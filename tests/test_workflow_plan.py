@@ -0,0 +1,109 @@
+import unittest
+from reasonflow.orchestrator.workflow_plan import PlanCache, compile_workflow, definition_hash
+from reasonflow.orchestrator.workflow_engine import WorkflowEngine
+
+
+def diamond():
+    return {
+        "tasks": {
+            "fetch": {"type": "echo", "config": {"params": {"text": "x"}}},
+            "left": {"type": "echo", "config": {"params": {"text": "{{fetch.output}}L"}}},
+            "right": {"type": "echo", "config": {"params": {"text": "{{fetch.output}}R"}}, "priority": 3},
+            "join": {"type": "echo", "config": {"params": {"text": "{{left.output}}{{right.output}}"}}},
+        },
+        "dependencies": [
+            {"from": "fetch", "to": "left"},
+            {"from": "fetch", "to": "right"},
+            {"from": "left", "to": "join"},
+            {"from": "right", "to": "join"},
+        ]
+    }
+
+
+class TestWorkflowPlan(unittest.TestCase):
+    def setUp(self):
+        self.cache = PlanCache()
+
+    def test_compiles_levels_and_adjacency(self):
+        plan = compile_workflow(diamond(), cache=self.cache)
+        self.assertEqual(plan.task_ids, ("fetch", "left", "right", "join"))
+        self.assertEqual(plan.levels, ((0,), (1, 2), (3,)))
+        self.assertEqual(plan.predecessors[3], (1, 2))
+        self.assertEqual(plan.successors[0], (1, 2))
+        self.assertEqual(plan.priorities[2], 3)
+        self.assertEqual(plan.templates[3]["text"].references, (("left", "output"), ("right", "output")))
+        self.assertEqual(plan.topological_order(), ("fetch", "left", "right", "join"))
+
+    def test_cached_by_definition_hash(self):
+        prepared = []
+
+        def prepare(config):
+            prepared.append(config)
+            return config
+
+        first = compile_workflow(diamond(), prepare=prepare, cache=self.cache)
+        second = compile_workflow(diamond(), prepare=prepare, cache=self.cache)
+        self.assertIs(first, second)
+        self.assertEqual(len(prepared), 1)
+        self.assertEqual(self.cache.hits, 1)
+
+        changed = diamond()
+        changed["tasks"]["left"]["config"]["params"]["text"] = "other"
+        self.assertNotEqual(definition_hash(changed), definition_hash(diamond()))
+        self.assertIsNot(compile_workflow(changed, cache=self.cache), first)
+
+    def test_plan_is_immutable(self):
+        plan = compile_workflow(diamond(), cache=self.cache)
+        with self.assertRaises(AttributeError):
+            plan.order = ()
+        with self.assertRaises(TypeError):
+            plan.index["extra"] = 9
+
+    def test_rejects_cycles_and_unknown_tasks(self):
+        cyclic = diamond()
+        cyclic["dependencies"].append({"from": "join", "to": "fetch"})
+        with self.assertRaises(ValueError):
+            compile_workflow(cyclic, cache=self.cache)
+
+        dangling = diamond()
+        dangling["dependencies"].append({"from": "fetch", "to": "missing"})
+        with self.assertRaises(ValueError):
+            compile_workflow(dangling, cache=self.cache)
+
+    def test_engine_runs_loaded_plan(self):
+        class EchoAgent:
+            def execute(self, text="", **kwargs):
+                return {"status": "success", "output": text}
+
+        engine = WorkflowEngine()
+        engine.agent_builder.register_agent_type("echo", EchoAgent)
+        engine.load_plan("wf-plan", compile_workflow(diamond(), cache=self.cache))
+        results = engine.execute_workflow(parallel=True)
+        self.assertEqual(results["join"]["output"], "xLxR")
+        self.assertEqual(list(results), ["fetch", "left", "right", "join"])
+
+    def test_conditional_dependencies(self):
+        class EchoAgent:
+            def execute(self, text="", **kwargs):
+                return {"status": "success", "output": text}
+
+        definition = diamond()
+        definition["dependencies"][1]["condition"] = {"field": "output", "op": "eq", "value": "y"}
+        definition["tasks"]["join"]["config"]["trigger_rule"] = "any"
+        plan = compile_workflow(definition, cache=self.cache)
+        self.assertEqual(dict(plan.conditions), {("fetch", "right"): {"field": "output", "op": "eq", "value": "y"}})
+
+        engine = WorkflowEngine()
+        engine.agent_builder.register_agent_type("echo", EchoAgent)
+        engine.load_plan("wf-branch", plan)
+        results = engine.execute_workflow(parallel=True)
+        self.assertEqual(results["right"]["status"], "skipped")
+        self.assertEqual(results["join"]["status"], "success")
+
+        definition["dependencies"][0]["condition"] = {"op": "between"}
+        with self.assertRaises(ValueError):
+            compile_workflow(definition, cache=self.cache)
+
+
+if __name__ == "__main__":
+    unittest.main()